@@ -0,0 +1,152 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from core.db import migrations
+
+# --- CONFIG ---
+EVENTS_KEPT_FOR_RUNS = 50  # Finished runs whose progress events stay in memory (SSE replay); older ones answer from the DB
+
+TERMINAL = ("SUCCESS", "FAILED")
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+class JobStore:
+    """
+    Pipeline run records for the API: persisted in vibe_core.db (pipeline_runs, migration v5),
+    progress events kept in memory for Server-Sent Events.
+    Own connection (WAL): HTTP handlers read/write run records while the scheduler's run holds the
+    pipeline connections, so /trigger and /runs never wait for a run to finish.
+    Idempotency: a request id is stored in processed_requests with the run it was folded into.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = None  # Opened by open() (server startup)
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+        self.events = {}  # run_id -> [event]
+
+    def open(self):
+        with self.lock:
+            if self.conn is None:
+                self.conn = migrations.connect(self.db_path, check_same_thread=False)
+                self.conn.row_factory = sqlite3.Row
+
+    # --- IDEMPOTENCY ---
+    def find_request(self, request_id):
+        """run_id an earlier trigger with this request id went into, or None."""
+        with self.lock:
+            row = self.conn.execute("SELECT run_id FROM processed_requests WHERE request_id = ?", (request_id,)).fetchone()
+            return row[0] if row else None
+
+    # --- LIFECYCLE ---
+    def queue(self, run_id, source, request_id=None):
+        """A trigger joined run_id (creates the record on the first one). Never moves a started run back to QUEUED."""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT sources FROM pipeline_runs WHERE run_id = ?", (run_id,)).fetchone()
+            sources = sorted(set(json.loads(row[0]) if row and row[0] else []) | {source})
+            self.conn.execute("""
+                INSERT INTO pipeline_runs (run_id, status, sources, triggers, queued_at) VALUES (?, 'QUEUED', ?, 1, ?)
+                ON CONFLICT(run_id) DO UPDATE SET sources = excluded.sources, triggers = triggers + 1,
+                    queued_at = COALESCE(queued_at, excluded.queued_at)
+            """, (run_id, json.dumps(sources), _now()))
+            if request_id:
+                self.conn.execute("INSERT OR IGNORE INTO processed_requests (request_id, status, run_id) VALUES (?, 'ACCEPTED', ?)",
+                                  (request_id, run_id))
+            self.events.setdefault(run_id, [])
+            self._emit(run_id, "run", state="queued", source=source)
+
+    def start(self, run_id):
+        with self.lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO pipeline_runs (run_id, status, started_at) VALUES (?, 'RUNNING', ?)
+                ON CONFLICT(run_id) DO UPDATE SET status = 'RUNNING', started_at = excluded.started_at
+            """, (run_id, _now()))
+            self._emit(run_id, "run", state="started")
+
+    def progress(self, run_id, stage, **info):
+        """Stage progress from the pipeline (ghost / ingest / planner days solved)."""
+        with self.lock:
+            self._emit(run_id, stage, **info)
+            if info.get("state") == "started":
+                with self.conn:
+                    self.conn.execute("UPDATE pipeline_runs SET stage = ? WHERE run_id = ?", (stage, run_id))
+
+    def finish(self, run_id, status, duration_s, result=None, error=None):
+        with self.lock, self.conn:
+            self.conn.execute("""
+                UPDATE pipeline_runs SET status = ?, finished_at = ?, duration_s = ?, error = ?, result = ?
+                WHERE run_id = ?
+            """, (status, _now(), round(duration_s, 3), error, json.dumps(result, default=str) if result is not None else None, run_id))
+            self.conn.execute("UPDATE processed_requests SET status = ? WHERE run_id = ?", (status, run_id))
+            self._emit(run_id, "run", state="finished", status=status, duration_s=round(duration_s, 3), error=error)
+            self._forget_old_events()
+
+    def recover(self):
+        """Server restart: queued / running runs of the previous process will never finish."""
+        with self.lock, self.conn:
+            return self.conn.execute("""
+                UPDATE pipeline_runs SET status = 'FAILED', error = 'Server restarted before the run finished', finished_at = ?
+                WHERE status IN ('QUEUED', 'RUNNING')
+            """, (_now(),)).rowcount
+
+    # --- READS ---
+    def get(self, run_id):
+        """Run record without the (possibly big) result, or None."""
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT run_id, status, stage, sources, triggers, queued_at, started_at, finished_at, duration_s, error
+                FROM pipeline_runs WHERE run_id = ?
+            """, (run_id,)).fetchone()
+        if not row:
+            return None
+        record = dict(row)
+        record["sources"] = json.loads(record["sources"]) if record["sources"] else []
+        return record
+
+    def result(self, run_id):
+        with self.lock:
+            row = self.conn.execute("SELECT result FROM pipeline_runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def recent(self, limit=20):
+        with self.lock:
+            rows = self.conn.execute("SELECT run_id FROM pipeline_runs ORDER BY queued_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self.get(row[0]) for row in rows]
+
+    def wait_events(self, run_id, after, timeout=15.0):
+        """
+        (events after index `after`, done) -- blocks up to `timeout` for new ones.
+        Runs no longer in memory (older / previous process) answer with their final state from the DB.
+        """
+        with self.changed:
+            if run_id not in self.events:
+                record = self.get(run_id)
+                done = record is None or record["status"] in TERMINAL
+                final = [{"seq": 0, "stage": "run", "state": "finished", "status": record["status"]}] if record and done else []
+                return final[after:], done
+            if len(self.events[run_id]) <= after:
+                self.changed.wait(timeout)
+            events = self.events.get(run_id, [])
+            done = bool(events) and events[-1]["stage"] == "run" and events[-1]["state"] == "finished"
+            return events[after:], done
+
+    # --- INTERNAL ---
+    def _emit(self, run_id, stage, **info):
+        events = self.events.setdefault(run_id, [])
+        events.append({"seq": len(events), "at": _now(), "stage": stage, **info})
+        self.changed.notify_all()
+
+    def _forget_old_events(self):
+        finished = [run_id for run_id, events in self.events.items()
+                    if events and events[-1]["stage"] == "run" and events[-1]["state"] == "finished"]
+        for run_id in finished[:-EVENTS_KEPT_FOR_RUNS]:
+            del self.events[run_id]
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
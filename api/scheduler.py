@@ -0,0 +1,135 @@
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from core.metrics import METRICS
+
+# --- CONFIG ---
+DEBOUNCE_S = 2.0           # Quiet time after the last trigger before a run starts (file saves, bursts of drops)
+MAX_WAIT_S = 10.0          # A steady stream of triggers can't postpone a run longer than this
+MAX_QUEUED_TRIGGERS = 50   # Backpressure: beyond this, new triggers are rejected (they'd fold into the same run anyway)
+
+class PipelineScheduler:
+    """
+    The only way the pipeline runs inside the server.
+    - Single flight: one worker thread, so at most one run at a time (no racing runs on the SQLite files).
+    - Debounce: a run starts DEBOUNCE_S after the last trigger (capped at MAX_WAIT_S after the first).
+    - Coalescing: every trigger queued meanwhile (20 dropped files, n8n + watcher) becomes ONE run.
+    - Backpressure: request() refuses triggers once MAX_QUEUED_TRIGGERS are waiting.
+    Each batch has a run_id from its first trigger on; every trigger folded into it gets the same id.
+    run_fn(run_id, triggers) gets the coalesced triggers: [{"source": ..., "at": datetime}].
+    """
+    def __init__(self, run_fn, debounce_s=DEBOUNCE_S, max_wait_s=MAX_WAIT_S, max_queued=MAX_QUEUED_TRIGGERS):
+        self.run_fn = run_fn
+        self.debounce_s = debounce_s
+        self.max_wait_s = max_wait_s
+        self.max_queued = max_queued
+        self._cond = threading.Condition()
+        self._pending = []
+        self._pending_run_id = None
+        self._first_at = None  # monotonic time of the oldest pending trigger
+        self._last_at = None   # ... and of the newest
+        self._thread = None
+        self._stopping = False
+        self.in_flight = None  # {"run_id", "sources", "started_at"} while a run is going
+        self.last_run = None
+        self.runs = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    # --- PRODUCERS (watcher thread, HTTP handlers) ---
+    def request(self, source):
+        """Queues a trigger. Returns {"accepted", "run_id", "queue_depth", "in_flight"} -- never blocks on a run."""
+        with self._cond:
+            if len(self._pending) >= self.max_queued:
+                self.rejected += 1
+                METRICS.inc("vibeos_pipeline_rejected_triggers_total")
+                return {"accepted": False, "run_id": None, "queue_depth": len(self._pending), "in_flight": self.in_flight is not None}
+            now = time.monotonic()
+            if not self._pending:
+                self._first_at = now
+                self._pending_run_id = str(uuid.uuid4())
+            self._last_at = now
+            self._pending.append({"source": source, "at": datetime.now()})
+            self._cond.notify()
+            return {"accepted": True, "run_id": self._pending_run_id, "queue_depth": len(self._pending),
+                    "in_flight": self.in_flight is not None}
+
+    # --- WORKER ---
+    def _due_in(self):
+        """Seconds until the pending batch may run (<= 0 = now)."""
+        now = time.monotonic()
+        return min(self._last_at + self.debounce_s, self._first_at + self.max_wait_s) - now
+
+    def _take_batch(self):
+        """Blocks until a debounced batch is due (or stop); returns (run_id, batch), or None on stop."""
+        with self._cond:
+            while not self._stopping:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                wait = self._due_in()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                batch, self._pending = self._pending, []
+                self.in_flight = {"run_id": self._pending_run_id, "sources": sorted({t["source"] for t in batch}),
+                                  "started_at": datetime.now()}
+                return self._pending_run_id, batch
+            return None
+
+    def _worker(self):
+        while True:
+            taken = self._take_batch()
+            if taken is None:
+                return
+            run_id, batch = taken
+            t0 = time.perf_counter()
+            status, error = "SUCCESS", None
+            try:
+                self.run_fn(run_id, batch)
+            except Exception as e:  # A failed run must not kill the worker
+                status, error = "FAILED", str(e)
+            with self._cond:
+                self.last_run = {
+                    **self.in_flight,
+                    "finished_at": datetime.now(),
+                    "duration_s": round(time.perf_counter() - t0, 3),
+                    "triggers": len(batch),
+                    "status": status,
+                    "error": error,
+                }
+                self.in_flight = None
+                self.runs += 1
+                self.coalesced += len(batch) - 1
+                METRICS.inc("vibeos_pipeline_coalesced_triggers_total", value=len(batch) - 1)
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._worker, name="pipeline-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stops after the run in flight (pending triggers are dropped)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queue_depth": len(self._pending),
+                "in_flight": self.in_flight is not None,
+                "current_run": self.in_flight,
+                "last_run": self.last_run,
+                "runs": self.runs,
+                "coalesced_triggers": self.coalesced,
+                "rejected_triggers": self.rejected,
+                "debounce_s": self.debounce_s,
+            }
@@ -4,7 +4,9 @@ import uvicorn
 import logging
 import threading
 import time
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Header
+import json
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from datetime import datetime
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -18,6 +20,13 @@ sys.path.append(BASE_DIR)
 from core.loader.ingest import ingest_data
 from core.solver.engine import run_planner
 from core.solver.ghost import run_ghost_protocol
+from core.solver.template import get_compiled_template
+from core.loader.config_loader import CONFIG_CACHE, load_routine
+from core.db.connections import ConnectionManager
+from api.scheduler import PipelineScheduler
+from api.jobs import JobStore, TERMINAL
+from core.metrics import METRICS, stage, record_run
+from core.planner.reality import reality_report
 
 # --- LOGGING SETUP ---
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - [API] - %(message)s")
@@ -25,31 +34,90 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="VibeOS 3.0 Server", version="Watcher.Edition")
 
+# Long-lived DB connections (vibe_core.db + Fluid dev.db), shared by every stage of every run
+DB = ConnectionManager()
+# Run records (own connection, so the API answers while a run holds the pipeline connections)
+JOBS = JobStore(DB.vibe_path)
+
 # --- CORE LOGIC (The Intelligent Pipeline) ---
-def run_full_pipeline(source: str = "Manual"):
+def run_full_pipeline(source: str = "Manual", progress=None):
     """
     The Intelligent Pipeline:
     0. Ghost Protocol: Sync UI changes (Delete/Moves) back to DB.
     1. Ingest Data: Load new requirements from JSON.
     2. Run Planner: Optimize and Sync to Fluid Calendar.
+    progress(stage, **info): stage started / finished (+ planner days solved) for the job API.
+    Every stage is timed (core/metrics.py -> /metrics + the run's report).
+    Returns: {"ghost", "ingest", "planner"} summaries.
     """
+    progress = progress or (lambda stage_name, **info: None)
     logger.info(f"🚀 Pipeline Triggered by: {source}")
+    results = {}
     try:
-        # Step 0: Ghost (Sync Reality) 👻
-        logger.info("👻 Step 0: Running Ghost Protocol (Reality Check)...")
-        run_ghost_protocol()
+        # One unit of work: same connections for all stages, one run at a time
+        with DB.unit_of_work() as (vibe_conn, fluid_conn):
+            # Step 0: Ghost (Sync Reality) 👻
+            logger.info("👻 Step 0: Running Ghost Protocol (Reality Check)...")
+            progress("ghost", state="started")
+            with stage("ghost"):
+                results["ghost"] = run_ghost_protocol(vibe_conn, fluid_conn)
+            progress("ghost", state="finished", summary=results["ghost"])
+
+            # Step 1: Ingest (Load Inputs) 📥
+            logger.info("📥 Step 1: Ingesting Data...")
+            progress("ingest", state="started")
+            with stage("ingest"):
+                results["ingest"] = ingest_data(vibe_conn)
+            progress("ingest", state="finished", summary=results["ingest"])
+
+            # Step 2: Plan & Sync (Execute) 🧠
+            logger.info("🧠 Step 2: Running Planner & Sync Engine...")
+            progress("planner", state="started")
+            with stage("planner"):
+                results["planner"] = run_planner(vibe_conn=vibe_conn, fluid_conn=fluid_conn, progress=progress)
+            planned = results["planner"] or {}
+            progress("planner", state="finished", scheduled=len(planned.get("scheduled", [])), solver=planned.get("solver"))
 
-        # Step 1: Ingest (Load Inputs) 📥
-        logger.info("📥 Step 1: Ingesting Data...")
-        ingest_data()
-        
-        # Step 2: Plan & Sync (Execute) 🧠
-        logger.info("🧠 Step 2: Running Planner & Sync Engine...")
-        run_planner()
-        
         logger.info("✅ Pipeline Completed Successfully.")
+        return results
     except Exception as e:
         logger.error(f"❌ Pipeline Failed: {e}")
+        raise  # Scheduler records the run as FAILED
+
+def run_coalesced(run_id, triggers):
+    """
+    Scheduler run: every trigger queued during the debounce window, as ONE pipeline run (one job record).
+    The run's metrics report (stage timings, solves, DB queries) is stored with its result, even when it failed.
+    """
+    sources = sorted({t["source"] for t in triggers})
+    if len(triggers) > 1:
+        logger.info(f"🧺 Coalesced {len(triggers)} triggers into one run.")
+    JOBS.start(run_id)
+    t0 = time.perf_counter()
+    report = None
+    try:
+        with record_run(run_id) as report:
+            results = run_full_pipeline(source=", ".join(sources),
+                                        progress=lambda stage_name, **info: JOBS.progress(run_id, stage_name, **info))
+    except Exception as e:
+        JOBS.finish(run_id, "FAILED", time.perf_counter() - t0, result={"metrics": report}, error=str(e))
+        raise
+    JOBS.finish(run_id, "SUCCESS", time.perf_counter() - t0, result={**results, "metrics": report})
+
+# Single-flight + debounce + coalescing: watcher and /trigger only queue, never run directly
+SCHEDULER = PipelineScheduler(run_coalesced)
+
+def enqueue(source, request_id=None):
+    """Queues a trigger and records it on its run. Same request_id again = the earlier run, nothing queued."""
+    with JOBS.lock:  # Check + queue atomically (two retries of one request race otherwise)
+        if request_id:
+            run_id = JOBS.find_request(request_id)
+            if run_id:
+                return {"accepted": True, "duplicate": True, "run_id": run_id}
+        ticket = SCHEDULER.request(source=source)
+        if ticket["accepted"]:
+            JOBS.queue(ticket["run_id"], source, request_id)
+        return {**ticket, "duplicate": False}
 
 # --- 👀 THE WATCHER CLASS (Chowkidaar) ---
 class VibeFileHandler(FileSystemEventHandler):
@@ -57,12 +125,9 @@ class VibeFileHandler(FileSystemEventHandler):
         # Sirf JSON files pe react karo
         if not event.is_directory and event.src_path.endswith(".json"):
             logger.info(f"👀 New File Detected: {event.src_path}")
-            
-            # Thoda sa delay taaki file poori save ho jaye
-            time.sleep(1)
-            
-            # Pipeline Trigger karo
-            run_full_pipeline(source="Auto-Watcher")
+
+            # Pipeline queue karo (debounce = file poori save hone ka time, 20 files = 1 run)
+            enqueue(source="Auto-Watcher")
 
 def start_watcher():
     """Starts monitoring the inputs directory in background"""
@@ -87,9 +152,32 @@ def start_watcher():
 @app.on_event("startup")
 async def startup_event():
     # Server start hote hi Watcher thread bhi start kar do
+    # Config is cached process-wide; warm it once so the first run skips the parsing
+    get_compiled_template()
+    load_routine()
+    logger.info(f"🗂️ Config Cache Ready: {CONFIG_CACHE.stats()}")
+
+    # Open + migrate the DBs once for the server's lifetime
+    DB.vibe()
+    DB.fluid()
+    logger.info(f"🗄️ DB Connections Ready: {DB.stats()}")
+
+    JOBS.open()
+    stale = JOBS.recover()
+    if stale:
+        logger.info(f"🧾 Marked {stale} unfinished runs from the last server process as FAILED.")
+    SCHEDULER.start()
+
     logger.info("🟢 Starting Background Watcher Thread...")
     threading.Thread(target=start_watcher, daemon=True).start()
 
+@app.on_event("shutdown")
+def shutdown_event():
+    SCHEDULER.stop(timeout=60)
+    JOBS.close()
+    DB.close()
+    logger.info("🔴 DB Connections Closed.")
+
 # --- ROUTES ---
 
 @app.get("/")
@@ -101,23 +189,102 @@ def home():
         "timestamp": datetime.now()
     }
 
-@app.post("/trigger")
+@app.post("/trigger", status_code=202)
 def trigger_pipeline(
-    background_tasks: BackgroundTasks, 
-    x_source: str = Header(default="n8n", alias="X-Source")
+    x_source: str = Header(default="n8n", alias="X-Source"),
+    x_request_id: str = Header(default=None, alias="X-Request-ID"),
 ):
     """
-    Manual Trigger (for n8n or Testing)
+    Manual Trigger (for n8n or Testing). Queued: runs after the debounce window, merged with other triggers.
+    X-Request-ID makes retries idempotent: the same id returns the run it was first folded into.
     """
-    background_tasks.add_task(run_full_pipeline, source=x_source)
+    ticket = enqueue(source=x_source, request_id=x_request_id)
+    if not ticket["accepted"]:
+        raise HTTPException(status_code=429, detail=f"Pipeline queue full ({ticket['queue_depth']} triggers waiting). Retry later.")
+    run_id = ticket["run_id"]
     return {
         "status": "Accepted", 
-        "message": "VibeOS Pipeline started. Ghost -> Ingest -> Plan."
+        "message": "VibeOS Pipeline queued. Ghost -> Ingest -> Plan.",
+        **ticket,
+        "status_url": f"/runs/{run_id}",
+        "events_url": f"/runs/{run_id}/events",
+        "results_url": f"/runs/{run_id}/results",
     }
 
+@app.get("/runs")
+def list_runs(limit: int = 20):
+    return JOBS.recent(limit)
+
+@app.get("/runs/{run_id}")
+def run_status(run_id: str):
+    record = JOBS.get(run_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Unknown run id")
+    return record
+
+@app.get("/runs/{run_id}/events")
+def run_events(run_id: str):
+    """Server-Sent Events: queued / started, per-stage progress (planner: days solved), finished."""
+    if not JOBS.get(run_id):
+        raise HTTPException(status_code=404, detail="Unknown run id")
+
+    def stream():
+        seen = 0
+        while True:
+            events, done = JOBS.wait_events(run_id, seen)
+            for event in events:
+                yield f"event: {event['stage']}\ndata: {json.dumps(event, default=str)}\n\n"
+            seen += len(events)
+            if done:
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+@app.get("/runs/{run_id}/results")
+def run_results(run_id: str):
+    """Stage summaries + the schedule this run produced (planner.scheduled)."""
+    record = JOBS.get(run_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Unknown run id")
+    if record["status"] not in TERMINAL:
+        raise HTTPException(status_code=409, detail=f"Run is {record['status']}. Follow /runs/{run_id}/events.")
+    return {**record, "result": JOBS.result(run_id)}
+
+@app.get("/runs/{run_id}/metrics")
+def run_metrics(run_id: str):
+    """The run's JSON report: seconds per stage / planner step, every solve (build, solve, model size), DB queries."""
+    record = JOBS.get(run_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Unknown run id")
+    if record["status"] not in TERMINAL:
+        raise HTTPException(status_code=409, detail=f"Run is {record['status']}. Follow /runs/{run_id}/events.")
+    return (JOBS.result(run_id) or {}).get("metrics") or {}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint (stage / solver / DB histograms & counters + queue gauges)."""
+    pipeline = SCHEDULER.stats()
+    METRICS.set("vibeos_pipeline_queue_depth", value=pipeline["queue_depth"])
+    METRICS.set("vibeos_pipeline_in_flight", value=int(pipeline["in_flight"]))
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/analytics/reality")
+def reality_factors():
+    """Duration multipliers the planner applies (global / per category / per project) + samples behind them."""
+    with JOBS.lock:  # Job store's own connection: answers while a run holds the pipeline connections
+        return reality_report(JOBS.conn)
+
+@app.get("/pipeline/status")
+def pipeline_status():
+    """Queue depth, run in flight, last run duration."""
+    return SCHEDULER.stats()
+
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "config_cache": CONFIG_CACHE.stats(), "db": DB.stats(),
+            "pipeline": {k: v for k, v in SCHEDULER.stats().items() if k in ("queue_depth", "in_flight")}}
 
 if __name__ == "__main__":
     print("🌍 Starting VibeOS Server on Port 8000...")
@@ -0,0 +1,154 @@
+import sys
+import os
+import io
+import time
+import shutil
+import sqlite3
+import tempfile
+import contextlib
+from datetime import timedelta
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic import make_week_template, make_task_rows
+from core.db import migrations
+from core.solver import engine
+from core.solver.template import compile_week_template
+from core.solver.utils import from_utc_iso, to_utc_iso, to_iso_now
+
+FLUID_SCHEMA = """
+CREATE TABLE User (id TEXT PRIMARY KEY, email TEXT, name TEXT);
+CREATE TABLE CalendarFeed (id TEXT PRIMARY KEY, name TEXT, type TEXT, enabled BOOLEAN, userId TEXT, createdAt TEXT, updatedAt TEXT);
+CREATE TABLE CalendarEvent (id TEXT PRIMARY KEY, feedId TEXT, title TEXT, start TEXT, end TEXT, allDay BOOLEAN,
+                            createdAt TEXT DEFAULT CURRENT_TIMESTAMP, updatedAt TEXT);
+CREATE INDEX CalendarEvent_feedId_idx ON CalendarEvent(feedId);
+CREATE INDEX CalendarEvent_start_end_idx ON CalendarEvent(start, end);
+"""
+SIZES = [500, 2000]
+HISTORY_EVENTS = 20000  # Past events already in the VibeOS feed (a few months of use)
+
+# --- ROUND-TRIP COUNTER (every execute / executemany call from Python) ---
+CALLS = {"n": 0}
+
+class CountingCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):
+        CALLS["n"] += 1
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        CALLS["n"] += 1
+        return super().executemany(*args, **kwargs)
+
+class CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self.cursor().executemany(*args, **kwargs)
+
+_connect = sqlite3.connect
+def counting_connect(*args, **kwargs):
+    kwargs.setdefault("factory", CountingConnection)
+    return _connect(*args, **kwargs)
+
+def build_dbs(workdir, n_tasks):
+    vibe_path = os.path.join(workdir, "vibe_core.db")
+    fluid_path = os.path.join(workdir, "dev.db")
+    conn = migrations.connect(vibe_path)
+    conn.executemany("INSERT INTO tasks (id, project_id, name, status, category, priority, duration, energy_req, task_type, created_at) "
+                     "VALUES (?, 'bench', ?, 'PENDING', ?, ?, ?, ?, ?, ?)",
+                     [(t['id'], t['name'], t['category'], t['priority'], t['duration'], t['energy_req'], t['task_type'], t['created_at'])
+                      for t in make_task_rows(n_tasks)])
+    conn.commit()
+    conn.close()
+    conn = _connect(fluid_path)
+    conn.executescript(FLUID_SCHEMA)
+    conn.execute("INSERT INTO User (id, email, name) VALUES ('bench_user', 'bench@vibeos.com', 'Bench')")
+    conn.execute("INSERT INTO CalendarFeed (id, name, type, enabled, userId) VALUES ('bench_feed', 'VibeOS', 'LOCAL', 1, 'bench_user')")
+    conn.executemany("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, updatedAt) VALUES (?, 'bench_feed', ?, ?, ?, 0, ?)",
+                     [(f"history_{i}", f"Old Task {i}", f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00.000Z",
+                       f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:45:00.000Z", to_iso_now()) for i in range(HISTORY_EVENTS)])
+    conn.commit()
+    conn.close()
+    return vibe_path, fluid_path
+
+def run_batched(vibe_path, fluid_path):
+    engine.VIBE_DB_PATH, engine.FLUID_DB_PATH = vibe_path, fluid_path
+    engine.get_compiled_template = lambda: compile_week_template(make_week_template())
+    CALLS["n"] = 0
+    sqlite3.connect = counting_connect
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            engine.run_planner(full_replan=True)
+            elapsed = time.perf_counter() - t0
+    finally:
+        sqlite3.connect = _connect
+    return CALLS["n"], elapsed
+
+def replay_row_by_row(planned_fluid, vibe_path, fluid_path):
+    """
+    The old write pattern for the SAME plan: per fixed block a duplicate SELECT + INSERT,
+    per scheduled task an overlap SELECT + INSERT + UPDATE, one execute each.
+    """
+    src = _connect(planned_fluid)
+    events = src.execute("SELECT title, start, end FROM CalendarEvent WHERE id NOT LIKE 'history_%' ORDER BY rowid").fetchall()
+    src.close()
+    vibe = counting_connect(vibe_path)
+    task_ids = {name: t_id for t_id, name in vibe.execute("SELECT id, name FROM tasks")}
+    fluid = counting_connect(fluid_path)
+    fc, vc = fluid.cursor(), vibe.cursor()
+
+    CALLS["n"] = 0
+    t0 = time.perf_counter()
+    for i, (title, start, end) in enumerate(events):
+        if title in task_ids:
+            check_start = to_utc_iso(from_utc_iso(start) + timedelta(minutes=1))
+            check_end = to_utc_iso(from_utc_iso(end) - timedelta(minutes=1))
+            fc.execute("SELECT id FROM CalendarEvent WHERE feedId = ? AND ((start <= ? AND end >= ?) OR (start <= ? AND end >= ?))",
+                       ('bench_feed', check_start, check_start, check_end, check_end))
+            fc.fetchone()
+            fc.execute("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                       (f"replay_{i}", 'bench_feed', title, start, end, to_iso_now(), to_iso_now()))
+            vc.execute("UPDATE tasks SET status = 'SCHEDULED', scheduled_start = ?, calendar_event_id = ? WHERE id = ?",
+                       (start, f"replay_{i}", task_ids[title]))
+        else:
+            fc.execute("SELECT id FROM CalendarEvent WHERE title = ? AND start LIKE ?", (title, f"{start[:10]}%"))
+            fc.fetchone()
+            fc.execute("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                       (f"replay_{i}", 'bench_feed', title, start, end, to_iso_now(), to_iso_now()))
+    fluid.commit()
+    vibe.commit()
+    elapsed = time.perf_counter() - t0
+    fluid.close()
+    vibe.close()
+    return CALLS["n"], len(events), elapsed
+
+def main(sizes):
+    print(f"⏱️  Planner writes over a {engine.LOOKAHEAD_DAYS}-day horizon: row-by-row vs batched ({HISTORY_EVENTS} past events in feed)")
+    print("   (row-by-row = write phase only; planner = whole run_planner incl. solving)")
+    print(f"{'tasks':>6} | {'events':>6} | {'row-by-row calls':>16} | {'row-by-row (s)':>14} | {'planner calls':>13} | {'planner (s)':>11}")
+    print("-" * 84)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            base = os.path.join(workdir, "base")
+            os.makedirs(base)
+            vibe_path, fluid_path = build_dbs(base, n)
+            batched_dir = os.path.join(workdir, "batched")
+            legacy_dir = os.path.join(workdir, "legacy")
+            shutil.copytree(base, batched_dir)
+            shutil.copytree(base, legacy_dir)
+
+            calls, elapsed = run_batched(os.path.join(batched_dir, "vibe_core.db"), os.path.join(batched_dir, "dev.db"))
+            old_calls, n_events, old_elapsed = replay_row_by_row(os.path.join(batched_dir, "dev.db"),
+                                                                 os.path.join(legacy_dir, "vibe_core.db"), os.path.join(legacy_dir, "dev.db"))
+            # Planner wall time includes solving; the replay is the write phase alone.
+            print(f"{n:>6} | {n_events:>6} | {old_calls:>16} | {old_elapsed:>14.3f} | {calls:>13} | {elapsed:>11.3f}")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
@@ -0,0 +1,189 @@
+import sys
+import os
+import io
+import time
+import shutil
+import sqlite3
+import tempfile
+import contextlib
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.bench_db_writes import FLUID_SCHEMA
+from benchmarks.synthetic import make_task_rows
+from core.db import migrations
+from core.solver import ghost
+
+SIZES = [1000, 5000, 20000]
+MOVED_EVERY = 20    # 5% of events moved in the UI
+DELETED_EVERY = 50  # 2% deleted
+EVENT_MINUTES = 45
+
+def build_dbs(workdir, n):
+    vibe_path = os.path.join(workdir, "vibe_core.db")
+    fluid_path = os.path.join(workdir, "dev.db")
+    vibe = migrations.connect(vibe_path)
+    fluid = sqlite3.connect(fluid_path)
+    fluid.executescript(FLUID_SCHEMA)
+    fluid.execute("INSERT INTO CalendarFeed (id, name, type, enabled, userId) VALUES ('bench_feed', 'VibeOS', 'LOCAL', 1, 'bench_user')")
+    tasks, events = [], []
+    for i, t in enumerate(make_task_rows(n)):
+        start = f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00.000Z"
+        end = start.replace(":00:00.000Z", ":45:00.000Z")
+        tasks.append((t['id'], t['name'], start, f"event_{i}"))
+        if i % DELETED_EVERY == 0:
+            continue
+        if i % MOVED_EVERY == 0:
+            # Moved to New Year's Eve (the UI moves are near each other, like a real week of edits), same length
+            start, end = f"2025-12-31T{i % 24:02d}:10:00.000Z", f"2025-12-31T{i % 24:02d}:55:00.000Z"
+        events.append((f"event_{i}", start, end))
+    # Booked length = event length (45 min): no resizes here, the legacy loop can't see those (resize_one does)
+    vibe.executemany("INSERT INTO tasks (id, project_id, name, status, scheduled_start, calendar_event_id, duration) "
+                     f"VALUES (?, 'bench', ?, 'SCHEDULED', ?, ?, {EVENT_MINUTES})", tasks)
+    fluid.executemany("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, updatedAt) VALUES (?, 'bench_feed', 'x', ?, ?, 0, '2025-12-31T00:00:00.000Z')",
+                      events)
+    vibe.commit()
+    fluid.commit()
+    vibe.close()
+    fluid.close()
+    return vibe_path, fluid_path
+
+def legacy_ghost(vibe_path, fluid_path):
+    """The old loop: one SELECT per scheduled task, one UPDATE / INSERT per change, no time diff."""
+    vibe = sqlite3.connect(vibe_path)
+    fluid = sqlite3.connect(fluid_path)
+    v_cursor, f_cursor = vibe.cursor(), fluid.cursor()
+    v_cursor.execute("SELECT id, name, calendar_event_id, scheduled_start FROM tasks WHERE status = 'SCHEDULED' AND calendar_event_id IS NOT NULL")
+    for v_id, _, f_id, v_start in v_cursor.fetchall():
+        f_cursor.execute("SELECT start, end FROM CalendarEvent WHERE id = ?", (f_id,))
+        f_event = f_cursor.fetchone()
+        if not f_event:
+            v_cursor.execute("UPDATE tasks SET status = 'MISSED', is_soft_deleted = 1, calendar_event_id = NULL WHERE id = ?", (v_id,))
+        elif v_start != f_event[0]:
+            v_cursor.execute("UPDATE tasks SET scheduled_start = ? WHERE id = ?", (f_event[0], v_id))
+            v_cursor.execute("INSERT INTO history_log (task_id, action, planned_start, actual_start) VALUES (?, 'MOVED', ?, ?)",
+                             (v_id, v_start, f_event[0]))
+    vibe.commit()
+    vibe.close()
+    fluid.close()
+
+def legacy_lookup(v_cursor, f_cursor):
+    """Reconcile step only, old way: one SELECT per scheduled task."""
+    vibe_tasks = ghost.fetch_all_scheduled_tasks(v_cursor)
+    events = {}
+    for task in vibe_tasks:
+        f_cursor.execute("SELECT start, end FROM CalendarEvent WHERE id = ?", (task['calendar_event_id'],))
+        row = f_cursor.fetchone()
+        if row:
+            events[task['calendar_event_id']] = row
+    return ghost.diff_calendar(vibe_tasks, events)
+
+def set_based_lookup(v_cursor, f_cursor):
+    """Reconcile step only, as sync_calendar_changes does it: chunked IN (...) reads."""
+    vibe_tasks = ghost.fetch_all_scheduled_tasks(v_cursor)
+    return ghost.diff_calendar(vibe_tasks, ghost.fetch_events(f_cursor, [task['calendar_event_id'] for task in vibe_tasks]))
+
+def time_reconcile(lookup, vibe_path, fluid_path, repeat=5):
+    """Best of `repeat`, connections already open: no connect / migration check / change feed / writes."""
+    vibe, fluid = sqlite3.connect(vibe_path), sqlite3.connect(fluid_path)
+    v_cursor, f_cursor = vibe.cursor(), fluid.cursor()
+    v_cursor.row_factory = sqlite3.Row
+    best, changes = None, None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            changes = lookup(v_cursor, f_cursor)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+    vibe.close()
+    fluid.close()
+    return best, changes
+
+def set_based_ghost(vibe_path, fluid_path):
+    ghost.VIBE_DB_PATH, ghost.FLUID_DB_PATH = vibe_path, fluid_path
+    ghost.run_ghost_protocol()
+
+def move_one(fluid_path):
+    """One drag & drop in the UI after the last sync."""
+    conn = sqlite3.connect(fluid_path)
+    conn.execute("UPDATE CalendarEvent SET start = '2026-06-15T10:00:00.000Z', end = '2026-06-15T10:45:00.000Z', "
+                 "updatedAt = '2026-01-01T00:00:00.000Z' WHERE id = 'event_1'")
+    conn.commit()
+    conn.close()
+
+def resize_one(fluid_path, end, updated_at):
+    """event_2 (2026-03-03 02:00, 45 min) stretched in the UI after the last sync."""
+    conn = sqlite3.connect(fluid_path)
+    conn.execute("UPDATE CalendarEvent SET end = ?, updatedAt = ? WHERE id = 'event_2'", (end, updated_at))
+    conn.commit()
+    conn.close()
+
+def resize_samples(vibe_path):
+    conn = sqlite3.connect(vibe_path)
+    rows = conn.execute("SELECT h.planned_duration, h.actual_duration, t.actual_duration FROM history_log h "
+                        "JOIN tasks t ON t.id = h.task_id WHERE h.action = 'RESIZED'").fetchall()
+    conn.close()
+    return rows
+
+def snapshot(vibe_path):
+    conn = sqlite3.connect(vibe_path)
+    tasks = conn.execute("SELECT id, status, is_soft_deleted, scheduled_start, calendar_event_id FROM tasks ORDER BY id").fetchall()
+    history = conn.execute("SELECT task_id, action, planned_start, actual_start FROM history_log ORDER BY task_id").fetchall()
+    filled = conn.execute("SELECT COUNT(*) FROM history_log WHERE time_diff_minutes IS NOT NULL").fetchone()[0]
+    conn.close()
+    return (tasks, history), filled
+
+def timed(run, vibe_path, fluid_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        run(vibe_path, fluid_path)
+        return time.perf_counter() - t0
+
+def main(sizes):
+    print(f"⏱️  Ghost Protocol over N scheduled tasks ({100 // MOVED_EVERY}% moved, {100 // DELETED_EVERY}% deleted in the UI)")
+    print("   (incremental = next runs against the updatedAt watermark: nothing changed / one event moved)")
+    print("   (reconcile = event lookup + diff only; end-to-end adds connect, change feed scan and the write)")
+    print(f"{'tasks':>6} | {'reconcile old (s)':>17} | {'new (s)':>7} | {'speedup':>7} | {'end-to-end old (s)':>18} | {'new (s)':>7} | {'speedup':>7} | "
+          f"{'same result':>11} | {'time diffs':>10} | {'no change (s)':>13} | {'1 move (s)':>10}")
+    print("-" * 145)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            base = os.path.join(workdir, "base")
+            os.makedirs(base)
+            build_dbs(base, n)
+            shutil.copytree(base, os.path.join(workdir, "legacy"))
+            shutil.copytree(base, os.path.join(workdir, "new"))
+            legacy = [os.path.join(workdir, "legacy", f) for f in ("vibe_core.db", "dev.db")]
+            new = [os.path.join(workdir, "new", f) for f in ("vibe_core.db", "dev.db")]
+
+            r_old, old_changes = time_reconcile(legacy_lookup, *new)
+            r_new, new_changes = time_reconcile(set_based_lookup, *new)
+            assert old_changes == new_changes, "Chunked lookup changed the reconcile!"
+
+            t_old = timed(legacy_ghost, *legacy)
+            t_new = timed(set_based_ghost, *new)
+            old_result, _ = snapshot(legacy[0])
+            new_result, filled = snapshot(new[0])
+            same = old_result == new_result
+            assert same, "Set-based Ghost changed the result!"
+
+            t_idle = timed(set_based_ghost, *new)
+            move_one(new[1])
+            t_move = timed(set_based_ghost, *new)
+            moved = sqlite3.connect(new[0]).execute("SELECT COUNT(*) FROM history_log").fetchone()[0] - len(old_result[1])
+            assert moved == 1, "Incremental Ghost missed the move!"
+
+            # Resizes: the estimate is the sample base, one sample per task (a second resize only updates the task)
+            resize_one(new[1], "2026-03-03T03:30:00.000Z", "2026-01-02T00:00:00.000Z")
+            timed(set_based_ghost, *new)
+            assert resize_samples(new[0]) == [(EVENT_MINUTES, 90, 90)], "Incremental Ghost missed the resize!"
+            resize_one(new[1], "2026-03-03T04:00:00.000Z", "2026-01-03T00:00:00.000Z")
+            timed(set_based_ghost, *new)
+            assert resize_samples(new[0]) == [(EVENT_MINUTES, 90, 120)], "Second resize of a task added a sample!"
+            print(f"{n:>6} | {r_old:>17.3f} | {r_new:>7.3f} | {r_old / r_new:>6.1f}x | {t_old:>18.3f} | {t_new:>7.3f} | {t_old / t_new:>6.1f}x | "
+                  f"{str(same):>11} | {filled:>10} | {t_idle:>13.4f} | {t_move:>10.4f}")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
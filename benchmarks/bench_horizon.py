@@ -0,0 +1,55 @@
+import sys
+import os
+import io
+import time
+import contextlib
+from datetime import datetime, timedelta
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic import make_week_template, make_task_rows
+from core.solver.engine import plan_daily, plan_horizon, group_slots_by_day, LOOKAHEAD_DAYS
+from core.solver.solver import score_assignment
+from core.solver.utils import flatten_template_to_slots
+
+SIZES = [500, 1000, 2500, 5000]
+
+def common_objective(placed, tasks_by_id, horizon_slots):
+    """Scores both modes against the SAME horizon slot list, so the numbers are comparable."""
+    slot_pos = {slot['start']: (s_idx, slot) for s_idx, slot in enumerate(horizon_slots)}
+    total = 0
+    for item in placed:
+        s_idx, slot = slot_pos[item['start']]
+        total += score_assignment(tasks_by_id[item['task_id']], slot, s_idx)
+    return total
+
+def run_mode(plan_fn, tasks, day_slots):
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        placed, _ = plan_fn(list(tasks), day_slots, lambda item: True)
+        elapsed = time.perf_counter() - t0
+    return placed, elapsed
+
+def main(sizes):
+    template = make_week_template()
+    start_date = datetime(2026, 1, 5)  # Monday
+    with contextlib.redirect_stdout(io.StringIO()):
+        horizon_slots, _ = flatten_template_to_slots(template, start_date, days_ahead=LOOKAHEAD_DAYS)
+    days = [(start_date + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(LOOKAHEAD_DAYS)]
+    day_slots = group_slots_by_day(horizon_slots, days)
+
+    print(f"⏱️  Daily loop vs Horizon model ({LOOKAHEAD_DAYS} days, {len(horizon_slots)} free slots)")
+    print(f"{'tasks':>6} | {'mode':>7} | {'wall (s)':>8} | {'placed':>6} | {'objective':>10}")
+    print("-" * 52)
+    for n in sizes:
+        tasks = make_task_rows(n)
+        tasks_by_id = {t['id']: t for t in tasks}
+        for label, plan_fn in [("daily", plan_daily), ("horizon", plan_horizon)]:
+            placed, elapsed = run_mode(plan_fn, tasks, day_slots)
+            objective = common_objective(placed, tasks_by_id, horizon_slots)
+            print(f"{n:>6} | {label:>7} | {elapsed:>8.2f} | {len(placed):>6} | {objective:>10}")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
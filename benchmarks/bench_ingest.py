@@ -0,0 +1,107 @@
+import sys
+import os
+import io
+import json
+import glob
+import time
+import uuid
+import sqlite3
+import tempfile
+import contextlib
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic import make_input_files
+from core.db import migrations
+from core.loader import ingest
+
+SIZES = [10000, 50000, 100000]
+LEGACY_MAX = 10000  # Row-by-row path is quadratic; bigger sizes take minutes
+
+def make_db(path, unique_index=True):
+    if unique_index:
+        migrations.connect(path).close()
+        return
+    # Legacy layout: baseline tables only, no indexes
+    conn = sqlite3.connect(path)
+    with open(migrations.SCHEMA_PATH, "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+    conn.close()
+
+def legacy_ingest(db_path, files):
+    """The old path: SELECT per task for dedupe (no index) + one INSERT per task (reference only)."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        project_id = str(uuid.uuid4())
+        cursor.execute("INSERT INTO projects (id, name, category) VALUES (?, ?, ?)",
+                       (project_id, data["project_name"], data["default_category"]))
+        for task in data["tasks"]:
+            cursor.execute("SELECT id FROM tasks WHERE name = ? AND project_id = ?", (task["name"], project_id))
+            if cursor.fetchone():
+                continue
+            name, _, fields = ingest.normalize_task(task, data["default_category"], 1)
+            row = ingest.task_insert_row(name, fields, project_id)
+            cursor.execute(ingest.INSERT_TASK_SQL.replace("ON CONFLICT(project_id, name) DO NOTHING", ""), row)
+    conn.commit()
+    conn.close()
+
+def edit_one_file(path):
+    """Steady state: one input file gains a task and changes another one."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["tasks"][0]["duration"] = 15
+    data["tasks"].append({"name": "Late Addition", "duration": 30})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args)
+    return time.perf_counter() - t0
+
+def count_tasks(db_path):
+    conn = sqlite3.connect(db_path)
+    n = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    conn.close()
+    return n
+
+def main(sizes):
+    print("⏱️  Ingest: per-task SELECT + INSERT vs bulk INSERT ... ON CONFLICT (1000 tasks per file)")
+    print("   (unchanged = manifest skips every file, 1 edited = only that file is diffed)")
+    print(f"{'tasks':>7} | {'legacy (s)':>10} | {'bulk (s)':>8} | {'rows/s':>8} | {'unchanged (s)':>13} | {'1 edited (s)':>12} | {'speedup':>7}")
+    print("-" * 86)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            inputs_dir = os.path.join(tmp, "inputs")
+            os.makedirs(inputs_dir)
+            make_input_files(inputs_dir, n)
+            files = sorted(glob.glob(os.path.join(inputs_dir, "*.json")))
+
+            ingest.INPUTS_DIR = inputs_dir
+            ingest.DB_PATH = os.path.join(tmp, "bulk.db")
+            make_db(ingest.DB_PATH)
+            t_bulk = timed(ingest.ingest_data)
+            t_again = timed(ingest.ingest_data)
+            assert count_tasks(ingest.DB_PATH) == n, "Bulk ingest lost or duplicated tasks!"
+            edit_one_file(files[-1])
+            t_edit = timed(ingest.ingest_data)
+            assert count_tasks(ingest.DB_PATH) == n + 1, "Manifest diff missed the edited file!"
+
+            if n <= LEGACY_MAX:
+                legacy_db = os.path.join(tmp, "legacy.db")
+                make_db(legacy_db, unique_index=False)
+                t_legacy = timed(legacy_ingest, legacy_db, files)
+                legacy_col, speedup = f"{t_legacy:>10.2f}", f"{t_legacy / t_bulk:>6.1f}x"
+            else:
+                legacy_col, speedup = f"{'skipped':>10}", f"{'-':>7}"
+
+            print(f"{n:>7} | {legacy_col} | {t_bulk:>8.2f} | {n / t_bulk:>8.0f} | {t_again:>13.3f} | {t_edit:>12.3f} | {speedup}")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
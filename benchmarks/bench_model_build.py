@@ -0,0 +1,67 @@
+import sys
+import os
+import io
+import time
+import contextlib
+from datetime import datetime
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic import make_week_template, make_task_rows
+from core.solver.solver import SlotIndex, VibeOptimizer
+from core.solver.utils import flatten_template_to_slots
+
+SIZES = [1000, 5000, 20000]
+DAYS = 15
+
+def legacy_candidates(tasks, slots):
+    """The old O(tasks x slots) scan from VibeOptimizer.solve (reference only)."""
+    pairs = []
+    for t_idx, task in enumerate(tasks):
+        t_duration = task.get('duration', 60)
+        t_type = task.get('task_type', 'Flexible')
+        t_fixed_slot = task.get('fixed_slot')
+        t_cat = task.get('category', 'General')
+        for s_idx, slot in enumerate(slots):
+            s_start = slot['start']
+            s_cat = slot.get('category', 'General')
+            s_start_str = s_start.strftime("%H:%M")
+            is_weekend = s_start.weekday() >= 5
+            if slot.get('duration', 0) < t_duration: continue
+            if t_type == 'Fixed' and t_fixed_slot != s_start_str: continue
+            if t_type == 'Flexible' and s_cat != 'Free' and s_cat != t_cat: continue
+            if is_weekend and t_cat in ['Study', 'Learn']: continue
+            int(s_start.timestamp() / 60)
+            pairs.append((t_idx, s_idx))
+    return pairs
+
+def indexed_candidates(tasks, slots):
+    index = SlotIndex(slots)
+    return [(t_idx, s_idx) for t_idx, task in enumerate(tasks) for s_idx in index.candidates(task)]
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+def main(sizes):
+    with contextlib.redirect_stdout(io.StringIO()):
+        slots, _ = flatten_template_to_slots(make_week_template(), datetime(2026, 1, 5), days_ahead=DAYS)
+
+    print(f"⏱️  Candidate pruning: nested scan vs SlotIndex ({len(slots)} slots, {DAYS} days)")
+    print(f"{'tasks':>6} | {'pairs':>8} | {'scan (s)':>8} | {'index (s)':>9} | {'speedup':>7} | {'build_model (s)':>15}")
+    print("-" * 70)
+    for n in sizes:
+        tasks = make_task_rows(n, fixed_every=7)
+        legacy, t_scan = timed(legacy_candidates, tasks, slots)
+        indexed, t_index = timed(indexed_candidates, tasks, slots)
+        assert sorted(legacy) == sorted(indexed), "SlotIndex disagrees with the reference scan!"
+
+        optimizer = VibeOptimizer(tasks, slots)
+        _, t_build = timed(optimizer.build_model)
+        print(f"{n:>6} | {len(indexed):>8} | {t_scan:>8.3f} | {t_index:>9.3f} | {t_scan / max(t_index, 1e-9):>6.1f}x | {t_build:>15.3f}")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
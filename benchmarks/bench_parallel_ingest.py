@@ -0,0 +1,61 @@
+import sys
+import os
+import io
+import time
+import sqlite3
+import tempfile
+import contextlib
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic import make_input_files
+from core.db import migrations
+from core.loader import ingest
+
+N_TASKS = 100000
+TASKS_PER_FILE = 2500
+WORKER_COUNTS = [1, 2, 4]
+
+def snapshot(db_path):
+    """Everything ingest decides (ids are random, so compare by names)."""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT p.name, p.priority, p.category, t.name, t.status, t.category, t.priority, t.duration, t.energy_req, t.dependency
+        FROM tasks t JOIN projects p ON p.id = t.project_id ORDER BY p.name, t.name
+    """).fetchall()
+    order = [r[0] for r in conn.execute("SELECT name FROM projects ORDER BY rowid")]
+    conn.close()
+    return rows, order
+
+def run(tmp, workers):
+    ingest.DB_PATH = os.path.join(tmp, f"w{workers}.db")
+    migrations.connect(ingest.DB_PATH).close()
+
+    ingest.INGEST_WORKERS = workers
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingest.ingest_data()
+    return time.perf_counter() - t0, snapshot(ingest.DB_PATH)
+
+def main(worker_counts):
+    print(f"⏱️  Parallel parse + single writer: {N_TASKS} tasks in {N_TASKS // TASKS_PER_FILE} files ({os.cpu_count()} CPUs here)")
+    print(f"{'workers':>7} | {'ingest (s)':>10} | {'rows/s':>7} | {'same result':>11}")
+    print("-" * 45)
+    with tempfile.TemporaryDirectory() as tmp:
+        ingest.INPUTS_DIR = os.path.join(tmp, "inputs")
+        os.makedirs(ingest.INPUTS_DIR)
+        make_input_files(ingest.INPUTS_DIR, N_TASKS, tasks_per_file=TASKS_PER_FILE)
+
+        baseline = None
+        for workers in worker_counts:
+            elapsed, result = run(tmp, workers)
+            baseline = baseline or result
+            # Same rows AND projects created in the same (filename priority) order
+            same = result == baseline
+            assert same, "Parallel ingest changed the result!"
+            print(f"{workers:>7} | {elapsed:>10.2f} | {N_TASKS / elapsed:>7.0f} | {str(same):>11}")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or WORKER_COUNTS)
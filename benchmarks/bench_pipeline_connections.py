@@ -0,0 +1,86 @@
+import sys
+import os
+import io
+import time
+import sqlite3
+import tempfile
+import contextlib
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.bench_db_writes import FLUID_SCHEMA
+from benchmarks.synthetic import make_week_template, make_input_files
+from core.db.connections import ConnectionManager
+from core.loader import ingest
+from core.solver import engine, ghost
+from core.solver.template import compile_week_template
+
+N_TASKS = 2000
+RUNS = 10
+
+# --- CONNECTION COUNTER (every sqlite3.connect from the stages) ---
+OPENED = {"n": 0}
+_connect = sqlite3.connect
+def counting_connect(*args, **kwargs):
+    OPENED["n"] += 1
+    return _connect(*args, **kwargs)
+
+def setup(workdir):
+    vibe_path = os.path.join(workdir, "vibe_core.db")
+    fluid_path = os.path.join(workdir, "dev.db")
+    conn = _connect(fluid_path)
+    conn.executescript(FLUID_SCHEMA)
+    conn.close()
+
+    ingest.INPUTS_DIR = os.path.join(workdir, "inputs")
+    os.makedirs(ingest.INPUTS_DIR)
+    make_input_files(ingest.INPUTS_DIR, N_TASKS, tasks_per_file=250)
+    ingest.DB_PATH = ghost.VIBE_DB_PATH = engine.VIBE_DB_PATH = vibe_path
+    ghost.FLUID_DB_PATH = engine.FLUID_DB_PATH = fluid_path
+    template = compile_week_template(make_week_template())
+    engine.get_compiled_template = lambda: template
+    return vibe_path, fluid_path
+
+def per_stage_run():
+    """Old pipeline: every stage (and the Architect) opens + migrates its own connections."""
+    ghost.run_ghost_protocol()
+    ingest.ingest_data()
+    engine.run_planner()
+
+def timed(label, run, runs):
+    OPENED["n"] = 0
+    sqlite3.connect = counting_connect
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            for _ in range(runs):
+                run()
+            elapsed = time.perf_counter() - t0
+    finally:
+        sqlite3.connect = _connect
+    print(f"{label:>12} | {OPENED['n']:>11} | {elapsed / runs * 1000:>11.1f}")
+
+def main(runs):
+    print(f"⏱️  Steady-state pipeline (Ghost -> Ingest -> Plan, {N_TASKS} tasks already planned), {runs} runs")
+    print(f"{'connections':>12} | {'opened':>11} | {'ms per run':>11}")
+    print("-" * 40)
+    with tempfile.TemporaryDirectory() as workdir:
+        vibe_path, fluid_path = setup(workdir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            per_stage_run()  # First run ingests + plans; the timed runs find nothing new
+
+        timed("per stage", per_stage_run, runs)
+
+        db = ConnectionManager(vibe_path, fluid_path)
+        def shared_run():
+            with db.unit_of_work() as (vibe_conn, fluid_conn):
+                ghost.run_ghost_protocol(vibe_conn, fluid_conn)
+                ingest.ingest_data(vibe_conn)
+                engine.run_planner(vibe_conn=vibe_conn, fluid_conn=fluid_conn)
+        timed("shared", shared_run, runs)
+        db.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS)
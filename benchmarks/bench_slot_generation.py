@@ -0,0 +1,81 @@
+import sys
+import os
+import io
+import time
+import contextlib
+from datetime import datetime, timedelta
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic import make_week_template
+from core.solver.template import compile_week_template
+from core.solver.utils import flatten_template_to_slots
+
+DAY_COUNTS = [15, 60, 365]
+REPEATS = 20
+
+def legacy_flatten(week_template, start_date, days_ahead):
+    """The old per-day strptime + nested constant loop (reference only)."""
+    free_slots, constant_blocks = [], []
+    active_schedule = week_template.get("modes", {}).get(week_template.get("current_mode", "Normal"), {})
+    for d in range(days_ahead):
+        current = start_date + timedelta(days=d)
+        date_str = current.strftime("%Y-%m-%d")
+        day_config = active_schedule.get(current.strftime("%A"))
+        if isinstance(day_config, str):
+            day_config = active_schedule.get(day_config)
+        if not day_config or not isinstance(day_config, list):
+            continue
+        items = []
+        for s in day_config:
+            start_dt = datetime.strptime(f"{date_str} {s['start']}", "%Y-%m-%d %H:%M")
+            end_dt = datetime.strptime(f"{date_str} {s['end']}", "%Y-%m-%d %H:%M")
+            if end_dt < start_dt:
+                end_dt += timedelta(days=1)
+            category = s.get('category', 'General')
+            items.append({"start": start_dt, "end": end_dt, "duration": int((end_dt - start_dt).total_seconds() / 60),
+                          "category": category, "label": s.get('label', category),
+                          "energy_supply": s.get('energy_supply', 'Medium'), "notes": s.get('notes', "")})
+        seen, occupied = set(), []
+        for item in items:
+            if item["category"] == "Constant" and item['start'] not in seen:
+                constant_blocks.append(item)
+                occupied.append((item["start"], item["end"]))
+                seen.add(item['start'])
+        for item in items:
+            if item["category"] == "Constant" or item['start'] in seen: continue
+            if not any(item["start"] < o_end and item["end"] > o_start for o_start, o_end in occupied):
+                free_slots.append(item)
+                seen.add(item['start'])
+    free_slots.sort(key=lambda x: x['start'])
+    constant_blocks.sort(key=lambda x: x['start'])
+    return free_slots, constant_blocks
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn(*args)
+    return result, (time.perf_counter() - t0) / REPEATS
+
+def main(day_counts):
+    template = make_week_template()
+    start = datetime(2026, 1, 5)
+
+    t0 = time.perf_counter()
+    compiled = compile_week_template(template)
+    t_compile = time.perf_counter() - t0
+
+    print(f"⏱️  Slot generation: per-day parsing vs compiled template (compile once: {t_compile * 1000:.2f} ms)")
+    print(f"{'days':>5} | {'slots':>6} | {'legacy (ms)':>11} | {'compiled (ms)':>13} | {'speedup':>7}")
+    print("-" * 56)
+    for days in day_counts:
+        legacy, t_legacy = timed(legacy_flatten, template, start, days)
+        with contextlib.redirect_stdout(io.StringIO()):
+            fast, t_fast = timed(flatten_template_to_slots, compiled, start, days)
+        assert legacy == fast, "Compiled template disagrees with the reference parser!"
+        print(f"{days:>5} | {len(fast[0]):>6} | {t_legacy * 1000:>11.2f} | {t_fast * 1000:>13.2f} | {t_legacy / max(t_fast, 1e-9):>6.1f}x")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or DAY_COUNTS)
@@ -0,0 +1,40 @@
+import sys
+import os
+import io
+import time
+import contextlib
+from datetime import datetime
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic import make_week_template, make_task_rows
+from ortools.sat.python import cp_model
+from core.solver.solver import VibeOptimizer, SOLVER_MODES
+from core.solver.utils import flatten_template_to_slots
+
+# (days, tasks) instances: one day of the Daily loop up to a week-long Horizon model
+CASES = [(1, 20), (1, 60), (3, 150), (7, 300)]
+TIME_BUDGET_S = 20.0  # Big capacity (knapsack) models find good plans fast but prove optimality slowly
+
+def main(cases):
+    template = make_week_template()
+    print("⏱️  Solver modes: interval (1 task per slot) vs capacity (packed slots)")
+    print(f"{'days':>4} | {'tasks':>5} | {'mode':>8} | {'solve (s)':>9} | {'placed':>6} | {'util':>6} | {'objective':>10} | proven")
+    print("-" * 75)
+    for days, n in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            slots, _ = flatten_template_to_slots(template, datetime(2026, 1, 5), days_ahead=days)
+        tasks = make_task_rows(n)
+        for mode in SOLVER_MODES:
+            optimizer = VibeOptimizer(tasks, slots, mode=mode, time_limit=TIME_BUDGET_S)
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                schedule = optimizer.solve()
+                elapsed = time.perf_counter() - t0
+            print(f"{days:>4} | {n:>5} | {mode:>8} | {elapsed:>9.2f} | {len(schedule):>6} | {optimizer.utilization:>6.1%} | {optimizer.objective_value:>10.0f} | {'yes' if optimizer.status == cp_model.OPTIMAL else 'no'}")
+
+if __name__ == "__main__":
+    # Usage: bench_solver_modes.py [days:tasks ...]
+    main([tuple(int(v) for v in arg.split(":")) for arg in sys.argv[1:]] or CASES)
@@ -0,0 +1,56 @@
+import sys
+import os
+import io
+import time
+import sqlite3
+import tempfile
+import tracemalloc
+import contextlib
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic import make_input_files
+from core.db import migrations
+from core.loader import ingest
+
+SIZES = [20000, 100000]
+
+def run_ingest(tmp, label, stream_threshold):
+    """Fresh DB, one ingest run; returns (seconds, peak traced MB)."""
+    ingest.DB_PATH = os.path.join(tmp, f"{label}.db")
+    migrations.connect(ingest.DB_PATH).close()
+
+    ingest.STREAM_THRESHOLD_BYTES = stream_threshold
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingest.ingest_data()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    conn = sqlite3.connect(ingest.DB_PATH)
+    count = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    conn.close()
+    return elapsed, peak / 1e6, count
+
+def main(sizes):
+    print("⏱️  Single huge input file: json.load vs streaming (TaskStream + batches), tracemalloc on")
+    print(f"{'tasks':>7} | {'file MB':>7} | {'load (s)':>8} | {'load MB':>7} | {'stream (s)':>10} | {'stream MB':>9} | {'rows/s':>7}")
+    print("-" * 72)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            ingest.INPUTS_DIR = os.path.join(tmp, "inputs")
+            os.makedirs(ingest.INPUTS_DIR)
+            path = make_input_files(ingest.INPUTS_DIR, n, tasks_per_file=n)[0]
+            file_mb = os.path.getsize(path) / 1e6
+
+            t_load, mb_load, c_load = run_ingest(tmp, "load", float("inf"))
+            t_stream, mb_stream, c_stream = run_ingest(tmp, "stream", 0)
+            assert c_load == c_stream == n, "Streaming ingest lost tasks!"
+            print(f"{n:>7} | {file_mb:>7.1f} | {t_load:>8.2f} | {mb_load:>7.1f} | {t_stream:>10.2f} | {mb_stream:>9.1f} | {n / t_stream:>7.0f}")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
@@ -0,0 +1,258 @@
+import sys
+import os
+import io
+import json
+import time
+import sqlite3
+import argparse
+import platform
+import tempfile
+import contextlib
+import tracemalloc
+from datetime import datetime
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+import ortools
+from benchmarks.bench_db_writes import FLUID_SCHEMA
+from benchmarks.synthetic import make_backlog_files, make_dense_week_template
+from core.db import migrations
+from core.loader import ingest
+from core.planner.architect import task_deadline
+from core.planner.dependencies import fetch_tasks
+from core.solver import engine
+from core.solver.solver import VibeOptimizer
+from core.solver.greedy import GreedyScheduler
+from core.solver.template import compile_week_template
+from core.solver.utils import flatten_template_to_slots
+
+# Scenario = synthetic backlog (projects x tasks, Fixed tasks + depends_on chains) + dense week template.
+# solve_tasks: top-priority PENDING tasks in the standalone solve (one model over all `days` of slots)
+SCENARIOS = {
+    "small":  {"projects": 4,  "tasks_per_project": 30,  "days": 7,  "modes": 2, "zones": 10, "constants": 2, "solve_tasks": 60},
+    "medium": {"projects": 10, "tasks_per_project": 100, "days": 15, "modes": 4, "zones": 14, "constants": 4, "solve_tasks": 300},
+    "large":  {"projects": 20, "tasks_per_project": 250, "days": 15, "modes": 8, "zones": 18, "constants": 6, "solve_tasks": 1000},
+}
+DEFAULT_SCENARIOS = ["small", "medium"]
+STAGES = ["ingest", "flatten", "solve", "greedy", "run_planner"]
+REPEATS = 5
+SOLVE_TIME_LIMIT_S = 10.0
+START = datetime(2026, 1, 5)  # A Monday
+ROUTINE = [{"name": "Morning Routine", "start": "06:00", "end": "06:45"}]
+
+# --- REGRESSION CHECK ---
+BASELINES_FILE = os.path.join(BASE_DIR, "benchmarks", "baselines.json")
+LATENCY_TOLERANCE = 0.5    # p50 may be 50% over its baseline (timings move with the machine and load)
+MIN_LATENCY_DELTA_S = 0.02 # ... and differences below 20 ms never count (tiny stages are noise)
+MEMORY_TOLERANCE = 0.25    # Python heap peak (tracemalloc)
+QUALITY_TOLERANCE = 0.02   # Quality numbers (higher = better) may drop 2%
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def copy_dbs(src_dir, dst_dir):
+    """Consistent copies of vibe_core.db + dev.db (SQLite backup API, WAL included)."""
+    os.makedirs(dst_dir, exist_ok=True)
+    for name in ("vibe_core.db", "dev.db"):
+        src = sqlite3.connect(os.path.join(src_dir, name))
+        dst = sqlite3.connect(os.path.join(dst_dir, name))
+        src.backup(dst)
+        dst.close()
+        src.close()
+    return os.path.join(dst_dir, "vibe_core.db"), os.path.join(dst_dir, "dev.db")
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))]
+
+def measure(run, setup, repeats):
+    """`repeats` timed runs + one traced run (tracemalloc slows Python down, so it's kept out of the timings)."""
+    times = []
+    result = None
+    for _ in range(repeats):
+        args = setup()
+        with quiet():
+            t0 = time.perf_counter()
+            result = run(*args)
+            times.append(time.perf_counter() - t0)
+    args = setup()
+    tracemalloc.start()
+    try:
+        with quiet():
+            run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"p50_s": round(percentile(times, 50), 4), "p95_s": round(percentile(times, 95), 4),
+            "max_s": round(max(times), 4), "peak_mb": round(peak / 2 ** 20, 2)}, result
+
+class Scenario:
+    """Seed databases + inputs for one scenario; every timed run works on fresh copies of them."""
+    def __init__(self, name, spec, workdir):
+        self.name = name
+        self.spec = spec
+        self.workdir = workdir
+        self.runs = 0
+        self.cp_objective = 0  # Last CP-SAT objective of the solve stage (greedy quality is relative to it)
+        self.inputs_dir = os.path.join(workdir, "inputs")
+        os.makedirs(self.inputs_dir)
+        make_backlog_files(self.inputs_dir, spec["projects"], spec["tasks_per_project"])
+        self.template = make_dense_week_template(spec["modes"], spec["zones"], spec["constants"])
+        self.compiled = compile_week_template(self.template)
+
+        # Seed 1: empty (migrated) vibe_core.db + Fluid schema. Seed 2: same after one ingest.
+        self.empty_dir = os.path.join(workdir, "empty")
+        os.makedirs(self.empty_dir)
+        migrations.connect(os.path.join(self.empty_dir, "vibe_core.db")).close()
+        fluid = sqlite3.connect(os.path.join(self.empty_dir, "dev.db"))
+        fluid.executescript(FLUID_SCHEMA)
+        fluid.close()
+        self.ingested_dir = os.path.join(workdir, "ingested")
+        vibe_path, _ = copy_dbs(self.empty_dir, self.ingested_dir)
+        with quiet():
+            self.ingest(vibe_path)
+
+    def fresh(self, seed_dir):
+        self.runs += 1
+        return copy_dbs(seed_dir, os.path.join(self.workdir, f"run_{self.runs}"))
+
+    # --- STAGES ---
+    def ingest(self, vibe_path, fluid_path=None):
+        ingest.INPUTS_DIR, ingest.DB_PATH = self.inputs_dir, vibe_path
+        summary = ingest.ingest_data()
+        return {"tasks": summary["new"]}
+
+    def flatten(self):
+        slots, constants = flatten_template_to_slots(self.template, START, days_ahead=self.spec["days"])
+        return {"slots": len(slots)}
+
+    def pending_tasks(self):
+        conn = sqlite3.connect(os.path.join(self.ingested_dir, "vibe_core.db"))
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("SELECT * FROM tasks WHERE status = 'PENDING' ORDER BY priority DESC, created_at ASC").fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def solve(self, tasks, slots):
+        optimizer = VibeOptimizer(tasks, slots, time_limit=SOLVE_TIME_LIMIT_S)
+        schedule = optimizer.solve()
+        bound = optimizer.solver.BestObjectiveBound() if schedule else 0
+        self.cp_objective = optimizer.objective_value
+        # Objective quality: reached objective / proven upper bound (1.0 = optimal)
+        return {"placed": len(schedule),
+                "objective_ratio": round(optimizer.objective_value / bound, 4) if bound else 0.0}
+
+    def greedy(self, tasks, slots):
+        scheduler = GreedyScheduler(tasks, slots)
+        schedule = scheduler.solve()
+        # Same instance as the solve stage: greedy objective / CP-SAT objective
+        return {"placed": len(schedule),
+                "objective_ratio": round(scheduler.objective_value / self.cp_objective, 4) if self.cp_objective else 0.0}
+
+    def run_planner(self, vibe_path, fluid_path):
+        engine.VIBE_DB_PATH, engine.FLUID_DB_PATH = vibe_path, fluid_path
+        engine.get_compiled_template = lambda: self.compiled
+        engine.load_routine = lambda: ROUTINE
+        engine.LOOKAHEAD_DAYS = self.spec["days"]
+        summary = engine.run_planner(full_replan=True)
+        # on_time: placed tasks with a deadline that end by it (engine.DEADLINE_MODE)
+        conn = sqlite3.connect(vibe_path)
+        conn.row_factory = sqlite3.Row
+        tasks = fetch_tasks(conn, [item["task_id"] for item in summary["scheduled"]])
+        conn.close()
+        on_time = sum(1 for item in summary["scheduled"]
+                      if (due := task_deadline(tasks[item["task_id"]])) and datetime.fromisoformat(item["end"]) <= due)
+        return {"scheduled": len(summary["scheduled"]), "on_time": on_time}
+
+def run_scenario(name, spec, repeats):
+    with tempfile.TemporaryDirectory() as workdir:
+        with quiet():
+            scenario = Scenario(name, spec, workdir)
+            slots, _ = flatten_template_to_slots(scenario.template, START, days_ahead=spec["days"])
+        tasks = scenario.pending_tasks()[:spec["solve_tasks"]]
+        plans = {
+            "ingest": (scenario.ingest, lambda: scenario.fresh(scenario.empty_dir)),
+            "flatten": (scenario.flatten, lambda: ()),
+            "solve": (scenario.solve, lambda: (tasks, slots)),
+            "greedy": (scenario.greedy, lambda: (tasks, slots)),
+            "run_planner": (scenario.run_planner, lambda: scenario.fresh(scenario.ingested_dir)),
+        }
+        results = {}
+        for stage in STAGES:
+            run, setup = plans[stage]
+            timings, quality = measure(run, setup, repeats)
+            results[stage] = {**timings, "quality": quality}
+        return results
+
+def check(results, baselines):
+    """Regressions against the baselines: slower p50, bigger memory peak, worse quality numbers."""
+    problems = []
+    for scenario, stages in results.items():
+        for stage, now in stages.items():
+            base = baselines.get(scenario, {}).get(stage)
+            if not base:
+                continue
+            label = f"{scenario}/{stage}"
+            if now["p50_s"] > base["p50_s"] * (1 + LATENCY_TOLERANCE) and now["p50_s"] - base["p50_s"] > MIN_LATENCY_DELTA_S:
+                problems.append(f"{label}: p50 {now['p50_s']:.3f}s vs baseline {base['p50_s']:.3f}s")
+            if now["peak_mb"] > base["peak_mb"] * (1 + MEMORY_TOLERANCE) + 0.5:
+                problems.append(f"{label}: memory peak {now['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB")
+            for key, expected in base["quality"].items():
+                if now["quality"].get(key, 0) < expected * (1 - QUALITY_TOLERANCE):
+                    problems.append(f"{label}: {key} {now['quality'].get(key)} vs baseline {expected}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="VibeOS planner benchmark suite (ingest, flatten, solve, greedy, run_planner).")
+    parser.add_argument("scenarios", nargs="*", default=DEFAULT_SCENARIOS, help=f"any of {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--check", action="store_true", help="exit 1 if a result regressed against benchmarks/baselines.json")
+    parser.add_argument("--update-baselines", action="store_true", help="store these results as the new baselines")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    print(f"⏱️  VibeOS benchmark suite: {', '.join(args.scenarios)} ({args.repeats} runs per stage + 1 traced for memory)")
+    print(f"{'scenario':>8} | {'stage':>11} | {'p50 (s)':>8} | {'p95 (s)':>8} | {'max (s)':>8} | {'peak MB':>7} | quality")
+    print("-" * 90)
+    results = {}
+    for name in args.scenarios:
+        results[name] = run_scenario(name, SCENARIOS[name], args.repeats)
+        for stage, r in results[name].items():
+            quality = ", ".join(f"{k}={v}" for k, v in r["quality"].items())
+            print(f"{name:>8} | {stage:>11} | {r['p50_s']:>8.3f} | {r['p95_s']:>8.3f} | {r['max_s']:>8.3f} | {r['peak_mb']:>7.1f} | {quality}")
+
+    if args.json:
+        report = {"generated_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                  "ortools": ortools.__version__, "cpus": os.cpu_count(), "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report: {args.json}")
+
+    baselines = {}
+    if os.path.exists(BASELINES_FILE):
+        with open(BASELINES_FILE, encoding="utf-8") as f:
+            baselines = json.load(f)
+    if args.update_baselines:
+        baselines.update(results)
+        with open(BASELINES_FILE, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"📌 Baselines updated: {BASELINES_FILE}")
+    elif args.check:
+        problems = check(results, baselines)
+        for problem in problems:
+            print(f"   ❌ Regression: {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ No regressions against the baselines.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+import json
+import random
+import uuid
+
+# Synthetic data for benchmarks (same shapes as ingest.py rows / week_template.json)
+CATEGORIES = ["Study", "Code", "Learn", "General"]
+ENERGY_LEVELS = ["High", "Medium", "Low"]
+DURATIONS = [30, 45, 60, 90, 120]
+
+def make_week_template():
+    """A realistic 'Normal' mode: Constant blocks + category zones + Free wildcards."""
+    weekday = [
+        {"start": "07:00", "end": "08:00", "category": "Constant", "label": "Gym"},
+        {"start": "08:00", "end": "10:00", "category": "Study", "energy_supply": "High"},
+        {"start": "10:00", "end": "12:00", "category": "Learn", "energy_supply": "High"},
+        {"start": "12:00", "end": "13:00", "category": "Constant", "label": "Lunch"},
+        {"start": "13:00", "end": "15:00", "category": "Code", "energy_supply": "Medium"},
+        {"start": "15:00", "end": "16:00", "category": "Free", "energy_supply": "Low"},
+        {"start": "16:00", "end": "18:00", "category": "Code", "energy_supply": "High"},
+        {"start": "18:00", "end": "19:30", "category": "Study", "energy_supply": "Medium"},
+        {"start": "19:30", "end": "20:00", "category": "Constant", "label": "Dinner"},
+        {"start": "20:00", "end": "21:00", "category": "General", "energy_supply": "Low"},
+        {"start": "21:00", "end": "22:30", "category": "Free", "energy_supply": "Low"},
+    ]
+    weekend = [
+        {"start": "09:00", "end": "12:00", "category": "Code", "energy_supply": "High"},
+        {"start": "12:00", "end": "13:00", "category": "Constant", "label": "Lunch"},
+        {"start": "13:00", "end": "16:00", "category": "Free", "energy_supply": "Medium"},
+        {"start": "17:00", "end": "19:00", "category": "General", "energy_supply": "Low"},
+    ]
+    return {
+        "current_mode": "Normal",
+        "modes": {
+            "Normal": {
+                "Monday": weekday, "Tuesday": "Monday", "Wednesday": "Monday",
+                "Thursday": "Monday", "Friday": "Monday",
+                "Saturday": weekend, "Sunday": "Saturday",
+            }
+        },
+    }
+
+FIXED_STARTS = ["08:00", "10:00", "13:00", "16:00", "20:00"]
+
+def make_task_rows(n_tasks, n_subjects=40, fixed_every=0, seed=42):
+    """
+    Task dicts as VibeArchitect returns them (PENDING rows, sorted by priority DESC).
+    Names are "<Subject> Lecture <k>" so the Drip Feed pacing key works.
+    fixed_every=k makes every k-th task a 'Fixed' task pinned to a template start time.
+    """
+    rng = random.Random(seed)
+    subjects = [(f"Subject{i:03d}", CATEGORIES[i % len(CATEGORIES)], rng.randint(1, 10)) for i in range(n_subjects)]
+    tasks = []
+    for k in range(n_tasks):
+        subject, category, priority = subjects[k % n_subjects]
+        tasks.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"{subject} Lecture {k // n_subjects + 1}",
+            "status": "PENDING",
+            "category": category,
+            "priority": priority,
+            "duration": rng.choice(DURATIONS),
+            "energy_req": rng.choice(ENERGY_LEVELS),
+            "task_type": "Fixed" if fixed_every and k % fixed_every == 0 else "Flexible",
+            "fixed_slot": rng.choice(FIXED_STARTS) if fixed_every and k % fixed_every == 0 else None,
+            "created_at": f"2026-01-01 00:{k // 60 % 60:02d}:{k % 60:02d}",
+        })
+    tasks.sort(key=lambda t: -t["priority"])
+    return tasks
+
+def make_input_files(inputs_dir, n_tasks, tasks_per_file=1000, seed=42):
+    """
+    Writes data/inputs-style JSON files ("<n>_<project>.json") holding n_tasks in total.
+    Every 10th task depends on the previous one (BLOCKED on ingest). Returns the file paths.
+    """
+    rng = random.Random(seed)
+    paths = []
+    for f_idx in range((n_tasks + tasks_per_file - 1) // tasks_per_file):
+        project = f"Project{f_idx:04d}"
+        count = min(tasks_per_file, n_tasks - f_idx * tasks_per_file)
+        tasks = []
+        for k in range(count):
+            task = {
+                "name": f"{project} Lecture {k + 1}",
+                "duration": rng.choice(DURATIONS),
+                "energy": rng.choice(ENERGY_LEVELS),
+            }
+            if k and k % 10 == 0:
+                task["depends_on"] = f"{project} Lecture {k}"
+            tasks.append(task)
+        path = os.path.join(inputs_dir, f"{f_idx % 9 + 1}_{project.lower()}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"project_name": project, "default_category": CATEGORIES[f_idx % len(CATEGORIES)], "tasks": tasks}, f)
+        paths.append(path)
+    return paths
+
+# --- BENCHMARK SUITE GENERATORS (full input schema, stress-size templates) ---
+MODE_NAMES = ["Normal", "Exam", "Holiday", "Sprint", "Travel", "Recovery", "Deadline", "Weekend"]
+ZONE_CATEGORIES = CATEGORIES + ["Free"]
+
+def make_backlog_files(inputs_dir, n_projects, tasks_per_project, chain_every=10, chain_len=3, fixed_every=15, seed=42):
+    """
+    data/inputs-style files using everything ingest supports: default_category + per-task category
+    overrides, file-prefix and per-task priorities, energy levels, Fixed tasks with a fixed_slot,
+    deadline_offset_days, notes, and depends_on chains (a chain of chain_len tasks every chain_every
+    tasks, each link waits for the previous one -> BLOCKED on ingest). Returns the file paths.
+    """
+    rng = random.Random(seed)
+    paths = []
+    for p_idx in range(n_projects):
+        project = f"Project{p_idx:04d}"
+        tasks = []
+        for k in range(tasks_per_project):
+            name = f"{project} Lecture {k + 1}"
+            task = {"name": name, "duration": rng.choice(DURATIONS), "energy": rng.choice(ENERGY_LEVELS)}
+            if rng.random() < 0.2:
+                task["category"] = rng.choice(CATEGORIES)
+            if rng.random() < 0.1:
+                task["priority"] = rng.randint(1, 10)
+            if fixed_every and k % fixed_every == fixed_every - 1:
+                task["type"] = "Fixed"
+                task["fixed_slot"] = rng.choice(FIXED_STARTS)
+            if rng.random() < 0.3:
+                task["deadline_offset_days"] = rng.randint(1, 30)
+            if chain_every and 0 < k % chain_every < chain_len:
+                task["depends_on"] = f"{project} Lecture {k}"
+            if rng.random() < 0.1:
+                task["notes"] = f"Revise chapter {k % 12 + 1}"
+            tasks.append(task)
+        path = os.path.join(inputs_dir, f"{p_idx % 9 + 1}_{project.lower()}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "project_name": project,
+                "default_category": CATEGORIES[p_idx % len(CATEGORIES)],
+                "color": f"#{rng.randrange(0x1000000):06X}",
+                "tags": ["bench", CATEGORIES[p_idx % len(CATEGORIES)].lower()],
+                "reality_factor": round(rng.uniform(1.0, 1.5), 2),
+                "tasks": tasks,
+            }, f)
+        paths.append(path)
+    return paths
+
+def _make_day(rng, n_zones, n_constants):
+    """One day: n_zones back-to-back zones from 06:00, plus Constants dropped on top (masking them)."""
+    blocks = []
+    minute = 6 * 60
+    for _ in range(n_zones):
+        length = rng.choice([30, 45, 60, 90, 120])
+        if minute + length > 23 * 60 + 30:
+            break
+        blocks.append({"start": f"{minute // 60:02d}:{minute % 60:02d}",
+                       "end": f"{(minute + length) // 60:02d}:{(minute + length) % 60:02d}",
+                       "category": rng.choice(ZONE_CATEGORIES), "energy_supply": rng.choice(ENERGY_LEVELS)})
+        minute += length
+    for c in range(n_constants):
+        start = rng.randrange(7 * 60, 22 * 60, 15)
+        end = start + rng.choice([15, 30, 60])
+        blocks.append({"start": f"{start // 60:02d}:{start % 60:02d}", "end": f"{end // 60:02d}:{end % 60:02d}",
+                       "category": "Constant", "label": f"Constant {c + 1}"})
+    # Sleep crosses midnight
+    blocks.append({"start": "23:30", "end": "06:00", "category": "Constant", "label": "Sleep"})
+    return blocks
+
+def make_dense_week_template(n_modes=4, zones_per_day=14, constants_per_day=4, seed=7):
+    """
+    Stress-size Week Template: n_modes modes, every weekday with its own zones (Free wildcards
+    included) and Constant blocks overlapping them, some days as references ("Tuesday": "Monday").
+    The first mode is current_mode (the one flattened); the others still go through validation.
+    """
+    rng = random.Random(seed)
+    modes = {}
+    for m_idx in range(n_modes):
+        schedule = {}
+        for d_idx, day in enumerate(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]):
+            if d_idx and rng.random() < 0.3:
+                schedule[day] = "Monday"  # Reference
+            else:
+                schedule[day] = _make_day(rng, zones_per_day, constants_per_day)
+        modes[MODE_NAMES[m_idx % len(MODE_NAMES)] + ("" if m_idx < len(MODE_NAMES) else str(m_idx))] = schedule
+    return {"current_mode": next(iter(modes)), "modes": modes}
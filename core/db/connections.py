@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from core.db import migrations
+from core.metrics import connection_factory
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+VIBE_DB_PATH = os.path.join(BASE_DIR, "data", "db", "vibe_core.db")
+FLUID_DB_PATH = os.path.join(BASE_DIR, "gui", "fluid-calendar", "prisma", "dev.db")
+
+class ConnectionManager:
+    """
+    Long-lived connections to vibe_core.db and the Fluid dev.db, owned by the API server.
+    Each DB is opened once (pragmas + migrations run once, not per trigger) and every pipeline
+    stage reuses it. sqlite3 connections must not be used by two threads at once, so all access
+    goes through unit_of_work(): one lock held for the whole run (watcher + /trigger serialize).
+    Both are TimedConnections: statement counts + latency per DB go to core/metrics.py (/metrics).
+    """
+    def __init__(self, vibe_path=VIBE_DB_PATH, fluid_path=FLUID_DB_PATH):
+        self.vibe_path = vibe_path
+        self.fluid_path = fluid_path
+        self._lock = threading.RLock()
+        self._vibe = None
+        self._fluid = None
+        self.runs = 0
+        self.failed_runs = 0
+        self.schema_version = None
+
+    def vibe(self):
+        """vibe_core.db, migrated on first use. Rows are sqlite3.Row (every stage reads them by name or index)."""
+        with self._lock:
+            if self._vibe is None:
+                conn = migrations.connect(self.vibe_path, check_same_thread=False, factory=connection_factory("vibe"))
+                self.schema_version = migrations.get_version(conn)
+                conn.row_factory = sqlite3.Row
+                self._vibe = conn
+            return self._vibe
+
+    def fluid(self):
+        """Fluid dev.db, or None while the GUI hasn't created it yet (checked again next run)."""
+        with self._lock:
+            if self._fluid is None and os.path.exists(self.fluid_path):
+                conn = sqlite3.connect(self.fluid_path, check_same_thread=False, factory=connection_factory("fluid"))
+                migrations.apply_pragmas(conn)  # WAL: the calendar UI can read while the planner writes
+                self._fluid = conn
+            return self._fluid
+
+    @contextmanager
+    def unit_of_work(self):
+        """
+        One pipeline run: exclusive use of both connections. Stages commit their own steps;
+        whatever is still open at the end is committed on success and rolled back on failure.
+        Yields (vibe_conn, fluid_conn) -- fluid_conn may be None.
+        """
+        with self._lock:
+            vibe_conn, fluid_conn = self.vibe(), self.fluid()
+            self.runs += 1
+            try:
+                yield vibe_conn, fluid_conn
+            except BaseException:
+                self.failed_runs += 1
+                for conn in (vibe_conn, fluid_conn):
+                    if conn is not None and conn.in_transaction:
+                        conn.rollback()
+                raise
+            for conn in (vibe_conn, fluid_conn):
+                if conn is not None and conn.in_transaction:
+                    conn.commit()
+
+    def close(self):
+        with self._lock:
+            for conn in (self._vibe, self._fluid):
+                if conn is not None:
+                    conn.close()
+            self._vibe = self._fluid = None
+
+    def stats(self):
+        return {
+            "vibe_open": self._vibe is not None,
+            "fluid_open": self._fluid is not None,
+            "schema_version": self.schema_version,
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+        }
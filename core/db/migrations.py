@@ -0,0 +1,293 @@
+import os
+import sqlite3
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCHEMA_PATH = os.path.join(BASE_DIR, "core", "db", "schema.sql")
+
+class MigrationError(Exception):
+    pass
+
+# --- PRAGMAS (every connection) ---
+def apply_pragmas(conn):
+    """WAL (readers don't block the writer) + tuned settings for a small local DB."""
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")   # Safe with WAL, far fewer fsyncs
+    conn.execute("PRAGMA busy_timeout = 5000")    # Wait for a concurrent writer instead of failing
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -16000")    # 16 MB page cache
+
+# --- MIGRATIONS ---
+def _baseline(conn):
+    """v1: schema.sql, plus columns that DBs created by the old ensure_schema() are missing."""
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        schema_sql = f.read()
+
+    # Expected columns = a scratch DB built from schema.sql
+    reference = sqlite3.connect(":memory:")
+    reference.executescript(schema_sql)
+    expected = {
+        table: reference.execute(f"PRAGMA table_info({table})").fetchall()
+        for (table,) in reference.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+    }
+    reference.close()
+
+    for table, columns in expected.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if not existing:
+            continue  # Created by the script below
+        for _, name, col_type, _, default, _ in columns:
+            if name in existing:
+                continue
+            # ADD COLUMN only takes constant defaults and no NOT NULL without one
+            clause = f" DEFAULT {default}" if default is not None and default.upper() != "CURRENT_TIMESTAMP" else ""
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}{clause}")
+
+    # executescript() would COMMIT our transaction: run the statements one by one
+    for statement in schema_sql.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+HOT_PATH_INDEXES = """
+-- Architect backlog fetch: WHERE status = 'PENDING' AND is_soft_deleted = 0 ORDER BY priority DESC, created_at
+CREATE INDEX IF NOT EXISTS idx_tasks_pending ON tasks(priority DESC, created_at)
+    WHERE status = 'PENDING' AND is_soft_deleted = 0;
+
+-- Ghost Protocol (status = 'SCHEDULED' AND calendar_event_id IS NOT NULL) + planner pacing (scheduled_start range)
+CREATE INDEX IF NOT EXISTS idx_tasks_scheduled ON tasks(scheduled_start, calendar_event_id, name, category, id, status)
+    WHERE status = 'SCHEDULED';
+
+-- Ingest project lookup
+CREATE INDEX IF NOT EXISTS idx_projects_name ON projects(name, id);
+
+-- History per task (analytics)
+CREATE INDEX IF NOT EXISTS idx_history_task ON history_log(task_id);
+"""
+
+def _hot_path_indexes(conn):
+    """v2: covering / partial indexes for the hot queries."""
+    for statement in HOT_PATH_INDEXES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+def _ingest_dedupe_key(conn):
+    """v3: UNIQUE (project_id, name) -- ingest's INSERT ... ON CONFLICT needs it. Fails if duplicates exist."""
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_project_name ON tasks(project_id, name)")
+
+def _ghost_event_index(conn):
+    """v4: scheduled task by calendar event (incremental Ghost Protocol looks up only changed events)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_event ON tasks(calendar_event_id, id, name, scheduled_start, status) "
+                 "WHERE status = 'SCHEDULED'")
+
+PIPELINE_RUNS = """
+-- API job records: one row per (coalesced) pipeline run
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    run_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'QUEUED',  -- QUEUED / RUNNING / SUCCESS / FAILED
+    stage TEXT,                             -- Last stage reported (ghost / ingest / planner)
+    sources TEXT,                           -- JSON list of trigger sources
+    triggers INTEGER DEFAULT 0,
+    queued_at TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    duration_s REAL,
+    error TEXT,
+    result TEXT                             -- JSON: per-stage summaries + scheduled items
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_queued ON pipeline_runs(queued_at);
+"""
+
+def _pipeline_runs(conn):
+    """v5: API job records + the run each idempotent request id was folded into."""
+    for statement in PIPELINE_RUNS.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(processed_requests)")}
+    if "run_id" not in columns:
+        conn.execute("ALTER TABLE processed_requests ADD COLUMN run_id TEXT")
+
+TASK_EDGES = """
+-- Dependency DAG: task_id waits for depends_on_id (tasks.dependency resolved by name inside the project)
+CREATE TABLE IF NOT EXISTS task_edges (
+    task_id TEXT NOT NULL,
+    depends_on_id TEXT NOT NULL,
+    PRIMARY KEY (task_id, depends_on_id)
+) WITHOUT ROWID;
+
+-- Successors of a task (unblocking once it is planned / dropped, planner DAG walk)
+CREATE INDEX IF NOT EXISTS idx_task_edges_depends_on ON task_edges(depends_on_id, task_id);
+
+-- A project's BLOCKED tasks (ingest re-links and unblocks per changed file)
+CREATE INDEX IF NOT EXISTS idx_tasks_blocked ON tasks(project_id, id) WHERE status = 'BLOCKED'
+"""
+
+def _task_edges(conn):
+    """
+    v6: dependency edges, backfilled from tasks.dependency. Tasks BLOCKED before this existed were
+    never unblocked: the ones whose predecessors are all planned (or dropped) become PENDING here,
+    same rule as core/planner/dependencies.py.
+    """
+    for statement in TASK_EDGES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    conn.execute("""
+        INSERT OR IGNORE INTO task_edges (task_id, depends_on_id)
+        SELECT t.id, p.id FROM tasks t
+        JOIN tasks p ON p.project_id = t.project_id AND p.name = t.dependency AND p.id != t.id
+        WHERE t.dependency IS NOT NULL AND t.dependency != ''
+    """)
+    conn.execute("""
+        UPDATE tasks SET status = 'PENDING'
+        WHERE status = 'BLOCKED' AND NOT EXISTS (
+            SELECT 1 FROM task_edges e JOIN tasks p ON p.id = e.depends_on_id
+            WHERE e.task_id = tasks.id AND p.status IN ('PENDING', 'BLOCKED') AND p.is_soft_deleted = 0
+        )
+    """)
+
+REALITY_STATS = """
+-- Reality factor aggregates: decayed sums of estimated vs actual minutes (core/planner/reality.py)
+CREATE TABLE IF NOT EXISTS duration_stats (
+    scope TEXT NOT NULL,                -- 'global' / 'category' / 'project'
+    key TEXT NOT NULL,                  -- '' / category name / project id
+    samples REAL NOT NULL DEFAULT 0,    -- Decayed sample count
+    planned_sum REAL NOT NULL DEFAULT 0,
+    actual_sum REAL NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+
+-- Ghost Protocol now also compares durations (resized events): keep its lookup covering
+DROP INDEX IF EXISTS idx_tasks_event;
+CREATE INDEX IF NOT EXISTS idx_tasks_event ON tasks(calendar_event_id, id, name, scheduled_start, duration, planned_duration, actual_duration, status)
+    WHERE status = 'SCHEDULED'
+"""
+
+REALITY_COLUMNS = [
+    ("history_log", "planned_duration", "INTEGER"),  # Estimate (tasks.duration) when the sample was taken
+    ("history_log", "actual_duration", "INTEGER"),   # Minutes it really took (resized event / reported)
+    ("tasks", "planned_duration", "INTEGER"),        # Minutes the planner booked (calibrated duration)
+]
+
+def _reality_stats(conn):
+    """
+    v7: duration samples in history_log, the minutes booked per task and the duration_stats aggregates.
+    actual_duration values set before this existed become COMPLETED samples.
+    """
+    for table, column, col_type in REALITY_COLUMNS:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+    for statement in REALITY_STATS.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    conn.execute("""
+        INSERT INTO history_log (task_id, action, planned_duration, actual_duration)
+        SELECT id, 'COMPLETED', duration, actual_duration FROM tasks WHERE actual_duration > 0 AND duration > 0
+    """)
+
+# (version, description, apply(conn)) -- append only, never edit a released step
+MIGRATIONS = [
+    (1, "Baseline schema (schema.sql) + missing columns", _baseline),
+    (2, "Hot-path indexes (pending batch, scheduled tasks, project lookup)", _hot_path_indexes),
+    (3, "Ingest dedupe key UNIQUE (project_id, name)", _ingest_dedupe_key),
+    (4, "Scheduled task by calendar event (incremental Ghost Protocol)", _ghost_event_index),
+    (5, "Pipeline run records (API jobs) + processed_requests.run_id", _pipeline_runs),
+    (6, "Task dependency edges (DAG) + blocked-task index", _task_edges),
+    (7, "Reality factor aggregates + duration samples", _reality_stats),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, verbose=False):
+    """Brings the DB to LATEST_VERSION. Each step runs in its own transaction. Returns the version."""
+    version = get_version(conn)
+    for step, description, apply in MIGRATIONS:
+        if step <= version:
+            continue
+        try:
+            conn.execute("BEGIN")
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {step}")
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            raise MigrationError(f"migration {step} ({description}) failed: {e}") from e
+        version = step
+        if verbose:
+            print(f"   🧱 Migration {step}: {description}")
+    return version
+
+def connect(db_path, migrate_schema=True, check_same_thread=True, factory=sqlite3.Connection):
+    """
+    vibe_core.db connection with pragmas applied and the schema up to date.
+    A failed step is reported and the connection stays usable at the last good version
+    (callers that need a specific step check get_version()).
+    check_same_thread=False is for connections shared across threads behind a lock (core/db/connections.py).
+    factory: sqlite3.Connection subclass (core/metrics.TimedConnection for the pipeline's query metrics).
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread, factory=factory)
+    apply_pragmas(conn)
+    if migrate_schema:
+        try:
+            migrate(conn)
+        except MigrationError as e:
+            print(f"   ⚠️ Schema migration failed: {e}")
+    return conn
+
+# --- QUERY PLAN CHECKS (hot queries must hit their index) ---
+HOT_QUERIES = [
+    ("architect pending batch",
+     "SELECT * FROM tasks WHERE status = 'PENDING' AND is_soft_deleted = 0 ORDER BY priority DESC, created_at ASC",
+     (), "idx_tasks_pending"),
+    ("ghost scheduled tasks",
+     "SELECT id, name, calendar_event_id, scheduled_start, duration, planned_duration, actual_duration FROM tasks "
+     "WHERE status = 'SCHEDULED' AND calendar_event_id IS NOT NULL",
+     (), "COVERING INDEX idx_tasks_event"),
+    ("ghost changed events",
+     "SELECT id, name, calendar_event_id, scheduled_start, duration, planned_duration, actual_duration FROM tasks "
+     "WHERE status = 'SCHEDULED' AND calendar_event_id IN (?, ?)",
+     ("a", "b"), "COVERING INDEX idx_tasks_event"),
+    ("reality samples since watermark",
+     "SELECT h.planned_duration, h.actual_duration, t.project_id, t.category FROM history_log h "
+     "LEFT JOIN tasks t ON t.id = h.task_id WHERE h.id > ? AND h.id <= ? ORDER BY h.id",
+     (0, 10), "SEARCH h USING INTEGER PRIMARY KEY"),
+    ("planner released placements",
+     "SELECT * FROM tasks WHERE status = 'SCHEDULED' AND calendar_event_id IN (?, ?)",
+     ("a", "b"), "INDEX idx_tasks_event"),
+    ("planner moved by hand",
+     "SELECT DISTINCT task_id FROM history_log WHERE action = 'MOVED' AND task_id IN (?, ?)",
+     ("a", "b"), "INDEX idx_history_task"),
+    ("planner pacing window",
+     "SELECT name, category, scheduled_start FROM tasks WHERE status = 'SCHEDULED' AND scheduled_start >= ? AND scheduled_start < ?",
+     ("2026-01-01", "2026-01-16"), "COVERING INDEX idx_tasks_scheduled"),
+    ("ingest task key",
+     "SELECT id FROM tasks WHERE project_id = ? AND name = ?",
+     ("p", "n"), "idx_tasks_project_name"),
+    ("ingest project lookup",
+     "SELECT id FROM projects WHERE name = ?",
+     ("n",), "COVERING INDEX idx_projects_name"),
+    ("dependency successors",
+     "SELECT task_id, depends_on_id FROM task_edges WHERE depends_on_id IN (?, ?)",
+     ("a", "b"), "COVERING INDEX idx_task_edges_depends_on"),
+    ("dependency predecessors",
+     "SELECT task_id, depends_on_id FROM task_edges WHERE task_id IN (?, ?)",
+     ("a", "b"), "PRIMARY KEY"),
+    ("ingest blocked tasks",
+     "SELECT id FROM tasks WHERE project_id = ? AND status = 'BLOCKED'",
+     ("p",), "INDEX idx_tasks_blocked"),
+]
+
+def query_plan(conn, sql, params=()):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def check_query_plans(conn):
+    """[(name, ok, plan)] -- ok means the plan uses the expected index and needs no temp sort."""
+    results = []
+    for name, sql, params, expected in HOT_QUERIES:
+        plan = query_plan(conn, sql, params)
+        ok = any(expected in step for step in plan) and not any("TEMP B-TREE" in step for step in plan)
+        results.append((name, ok, " | ".join(plan)))
+    return results
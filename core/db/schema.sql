@@ -1,3 +1,7 @@
+-- VibeOS Baseline Schema (vibe_core.db)
+-- Applied by core/db/migrations.py as migration 1. Don't run it by hand:
+-- indexes and every later change live in migrations.py (PRAGMA user_version).
+
 -- 1. PROJECTS (Container)
 CREATE TABLE IF NOT EXISTS projects (
     id TEXT PRIMARY KEY,
@@ -66,7 +70,34 @@ CREATE TABLE IF NOT EXISTS history_log (
     timestamp TEXT DEFAULT CURRENT_TIMESTAMP
 );
 
--- 5. SYSTEM CONFIG
+-- 5. PLAN FINGERPRINTS (Incremental Re-planning) 🔍
+CREATE TABLE IF NOT EXISTS plan_fingerprints (
+    day TEXT PRIMARY KEY,               -- YYYY-MM-DD (local)
+    fingerprint TEXT NOT NULL,          -- Hash of slots + events + eligible tasks
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 6. INGEST MANIFEST (Skip unchanged input files) 📒
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    file_name TEXT PRIMARY KEY,         -- data/inputs/<file_name>
+    mtime_ns INTEGER,
+    size INTEGER,
+    content_hash TEXT,                  -- sha256 of the raw file
+    project_id TEXT,
+    task_count INTEGER,
+    ingested_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS ingest_manifest_tasks (
+    file_name TEXT,
+    name TEXT,
+    task_id TEXT,
+    fingerprint TEXT,                   -- Hash of the input task + inherited project defaults
+    content_hash TEXT,                  -- File version that last contained this task
+    PRIMARY KEY (file_name, name)
+);
+
+-- 7. SYSTEM CONFIG
 CREATE TABLE IF NOT EXISTS system_config (
     key TEXT PRIMARY KEY,
     value TEXT
@@ -1,25 +1,121 @@
 import os
 import json
+import threading
 
 # --- PATH SETUP ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_DIR = os.path.join(BASE_DIR, "data", "config")
 # CORRECT PATH: data/config/week_template.json
-TEMPLATE_FILE = os.path.join(BASE_DIR, "data", "config", "week_template.json")
+TEMPLATE_FILE = os.path.join(CONFIG_DIR, "week_template.json")
+ROUTINE_FILE = os.path.join(CONFIG_DIR, "routine.json")
+
+class ConfigCache:
+    """
+    Process-wide cache for data/config files.
+    Entries are keyed on (path, loader) and stay valid while the file's (mtime, size) is unchanged,
+    so a burst of pipeline runs reads + parses + validates each file only once.
+    Cached values are shared: callers must treat them as read-only.
+    """
+    def __init__(self):
+        self._entries = {}   # (path, loader) -> (stat_key, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _stat_key(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, path, loader, default=None):
+        """
+        loader(data) validates/transforms the parsed JSON (raise ValueError if invalid).
+        Missing or broken files give `default`; that result is cached too until the file changes.
+        """
+        key = self._stat_key(path)
+        with self._lock:
+            entry = self._entries.get((path, loader))
+            if entry and entry[0] == key:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+            value = default
+            if key is None:
+                print(f"⚠️  Warning: Config not found at {path}")
+            else:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        value = loader(json.load(f))
+                except Exception as e:
+                    print(f"❌ Error loading {os.path.basename(path)}: {e}")
+            self._entries[(path, loader)] = (key, value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+CONFIG_CACHE = ConfigCache()
+
+# --- SCHEMA VALIDATION (runs once per file version) ---
+def _check_block(block, where, required):
+    if not isinstance(block, dict):
+        raise ValueError(f"{where}: block must be an object")
+    for field in required:
+        if not isinstance(block.get(field), str):
+            raise ValueError(f"{where}: block is missing '{field}'")
+
+def validate_week_template(data):
+    """Week Template shape: {"current_mode": str, "modes": {mode: {Day: [blocks] | "OtherDay"}}}"""
+    if not isinstance(data, dict):
+        raise ValueError("week template must be an object")
+    modes = data.get("modes", {})
+    if not isinstance(modes, dict):
+        raise ValueError("'modes' must be an object")
+
+    for mode_name, schedule in modes.items():
+        if not isinstance(schedule, dict):
+            raise ValueError(f"mode '{mode_name}' must be an object")
+        for day_name, day_config in schedule.items():
+            if isinstance(day_config, str):
+                if not isinstance(schedule.get(day_config), list):
+                    raise ValueError(f"{mode_name}.{day_name} references '{day_config}' which has no blocks")
+            elif isinstance(day_config, list):
+                for block in day_config:
+                    _check_block(block, f"{mode_name}.{day_name}", ("start", "end"))
+            else:
+                raise ValueError(f"{mode_name}.{day_name} must be a list of blocks or a day name")
+
+    mode_name = data.get("current_mode", "Normal")
+    if modes and mode_name not in modes:
+        print(f"⚠️  Warning: current_mode '{mode_name}' not found in Week Template")
+    return data
+
+def validate_routine(data):
+    """routine.json shape: {"routine_blocks": [{"name", "start", "end"}]} -> list of blocks"""
+    if not isinstance(data, dict):
+        raise ValueError("routine must be an object")
+    blocks = data.get("routine_blocks", [])
+    if not isinstance(blocks, list):
+        raise ValueError("'routine_blocks' must be a list")
+    for block in blocks:
+        _check_block(block, "routine_blocks", ("name", "start", "end"))
+    return blocks
 
 def load_week_template():
     """
     Reads the Master Architecture from JSON.
+    Cached until week_template.json changes (read-only: do not mutate the result).
     """
-    if not os.path.exists(TEMPLATE_FILE):
-        print(f"⚠️  Warning: Week Template not found at {TEMPLATE_FILE}")
-        return {}
-    
-    try:
-        with open(TEMPLATE_FILE, "r") as f:
-            data = json.load(f)
-            # Debug Print to confirm loading
-            # print(f"   📄 Loaded Template. Modes found: {list(data.get('modes', {}).keys())}")
-            return data
-    except Exception as e:
-        print(f"❌ Error loading Week Template: {e}")
-        return {}
\ No newline at end of file
+    return CONFIG_CACHE.get(TEMPLATE_FILE, validate_week_template, default={})
+
+def load_routine():
+    """Routine blocks from routine.json (Legacy). Cached until the file changes."""
+    return CONFIG_CACHE.get(ROUTINE_FILE, validate_routine, default=[])
@@ -1,17 +1,67 @@
+import atexit
 import json
-import sqlite3
 import os
 import glob
+import multiprocessing
+import sys
+import threading
+import time
 import uuid
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-# --- CONFIG ---
+# --- PATH SETUP ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from core.db import migrations
+from core.metrics import stage
+from core.loader.manifest import IngestManifest, content_hash, file_hash, task_fingerprint
+from core.loader.json_stream import TaskStream
+from core.planner.dependencies import link_project_dependencies
+
+# --- CONFIG ---
 INPUTS_DIR = os.path.join(BASE_DIR, "data", "inputs")
 DB_PATH = os.path.join(BASE_DIR, "data", "db", "vibe_core.db")
 
+# Streaming Ingest (Huge syllabus dumps)
+STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024  # Files bigger than this are parsed task-by-task
+INGEST_BATCH_SIZE = 5000                   # Rows per executemany (bounded memory)
+INGEST_WORKERS = 1                         # Parse processes (opt-in: 1 = parse in the writer, 0 = all cores)
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024       # Less changed JSON than this is parsed in-process (pool overhead > gain)
+METADATA_KEYS = {"project_name", "default_category", "category", "priority", "color", "tags", "reality_factor"}
+
 def get_db_connection():
-    return sqlite3.connect(DB_PATH)
+    """Pragmas + schema migrations (core/db/migrations.py) are applied on connect."""
+    return migrations.connect(DB_PATH)
+
+# --- PARSE POOL (started once, reused by every ingest run) ---
+# 'spawn', never fork: the API server ingests from its scheduler thread, and a forked child would
+# inherit that process' locks / open sqlite handles mid-use.
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def get_parse_pool(workers):
+    """The shared spawn-context ProcessPoolExecutor (re-created only when INGEST_WORKERS changes)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+def shutdown_parse_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+atexit.register(shutdown_parse_pool)
 
 def get_file_priority(filename):
     """
@@ -30,43 +80,186 @@ def get_file_priority(filename):
         pass
     return None # Return None if no prefix found
 
-def ensure_schema(cursor):
-    """Ensures tables exist with all required columns"""
-    # Projects Table
-    cursor.execute('''CREATE TABLE IF NOT EXISTS projects (
-        id TEXT PRIMARY KEY,
-        name TEXT,
-        category TEXT,
-        priority INTEGER,
-        color TEXT,
-        tags TEXT,
-        reality_factor REAL DEFAULT 1.0
-    )''')
-    
-    # Tasks Table (Updated with all flexible fields)
-    cursor.execute('''CREATE TABLE IF NOT EXISTS tasks (
-        id TEXT PRIMARY KEY, 
-        project_id TEXT, 
-        name TEXT, 
-        status TEXT DEFAULT 'PENDING',
-        category TEXT, 
-        priority INTEGER, 
-        duration INTEGER, 
-        actual_duration INTEGER,
-        energy_req TEXT,
-        task_type TEXT, 
-        fixed_slot TEXT, 
-        dependency TEXT, 
-        deadline_offset INTEGER,
-        notes TEXT,
-        scheduled_start TEXT, 
-        calendar_event_id TEXT, 
-        idempotency_key TEXT,
-        is_soft_deleted INTEGER DEFAULT 0, 
-        created_at TEXT
-    )''')
-
-def ingest_data():
+def iter_batches(items, size):
+    """Lists of at most `size` items from any iterable (lists or a streaming TaskStream)."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def read_metadata(data, file_path):
+    """Project-level fields of an input file (header keys + numeric filename priority)."""
+    file_prio = get_file_priority(file_path)
+    # 🔥 SMART CATEGORY: Use 'default_category' (New) or fallback to 'category' (Old)
+    p_category = data.get("default_category", data.get("category", "General"))
+    return {
+        "p_name": data.get("project_name", "General Project"),
+        "p_category": p_category,
+        "p_priority": file_prio if file_prio else data.get("priority", 1),
+        "p_tag": data.get("project_tag", "General"), # Just for logs/reference
+        "color": data.get("color", "#FFFFFF"),
+        "tags": ",".join(data.get("tags", [])),
+        "p_reality": data.get("reality_factor", 1.0),
+    }
+
+def normalize_task(task, p_category, p_priority):
+    """
+    One input task -> (name, fingerprint, fields) with the project defaults applied.
+    fields = (category, priority, duration, energy, type, fixed_slot, dependency, deadline_offset, notes, status)
+    """
+    dependency = task.get("depends_on", None)
+    fields = (
+        task.get("category", p_category),  # Task category inherits from Project Default if not specified
+        task.get("priority", p_priority),
+        task.get("duration", 60), task.get("energy", "Medium"),
+        task.get("type", "Flexible"), task.get("fixed_slot", None), dependency,
+        task.get("deadline_offset_days", 0), task.get("notes", ""),
+        'BLOCKED' if dependency else 'PENDING'
+    )
+    return task.get("name"), task_fingerprint(task, p_category, p_priority), fields
+
+def task_insert_row(name, fields, project_id):
+    """Normalized task -> INSERT_TASK_SQL params (fresh id + idempotency_key)."""
+    return (str(uuid.uuid4()), project_id, name, fields[9], str(uuid.uuid4()), *fields[:9])
+
+def task_update_row(name, fields, project_id):
+    """Normalized task -> UPDATE_TASK_SQL params (attributes only; ids, schedule and history stay)."""
+    return (*fields, project_id, name)
+
+def parse_input_file(file_path, known_digest=None):
+    """
+    Parse + normalize one input file (runs in a worker process, touches no DB).
+    Returns {"digest", "meta", "tasks": [(name, fingerprint, fields)]},
+    {"digest", "unchanged": True} when the content hash matches, or {"error"}.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        digest = content_hash(raw)
+        if digest == known_digest:
+            return {"digest": digest, "unchanged": True}
+
+        data = json.loads(raw.decode('utf-8'))
+        meta = read_metadata(data, file_path)
+        tasks = [normalize_task(t, meta["p_category"], meta["p_priority"]) for t in data.get("tasks", [])]
+        return {"digest": digest, "meta": meta, "tasks": tasks}
+    except Exception as e:
+        return {"error": str(e)}
+
+def open_stream(file_path):
+    """Streaming counterpart of parse_input_file for huge files: (meta, lazy normalized tasks, stream)."""
+    stream = TaskStream(file_path)
+    if stream.is_array:
+        stream.close()
+        raise ValueError("expected an object with 'tasks', got a list")
+    meta = read_metadata(stream.header, file_path)
+    tasks = (normalize_task(t, meta["p_category"], meta["p_priority"]) for t in stream)
+    return meta, tasks, stream
+
+# Only tasks still waiting to be planned pick up edits (SCHEDULED / DONE rows are left alone)
+UPDATE_TASK_SQL = '''
+    UPDATE tasks SET
+        category = ?, priority = ?, duration = ?, energy_req = ?,
+        task_type = ?, fixed_slot = ?, dependency = ?, deadline_offset = ?, notes = ?,
+        status = ?
+    WHERE project_id = ? AND name = ? AND status IN ('PENDING', 'BLOCKED')
+'''
+
+# 🛡️ THE MEGA INSERT (Matches New Schema). Existing (project, name) pairs are skipped by the UNIQUE index.
+INSERT_TASK_SQL = '''
+    INSERT INTO tasks (
+        id, project_id, name, status, 
+        is_soft_deleted, idempotency_key, 
+        category, priority, 
+        duration, actual_duration, energy_req, 
+        task_type, fixed_slot, dependency, 
+        deadline_offset, notes, created_at
+    )
+    VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, NULL, ?, ?, ?, ?, ?, ?, datetime('now'))
+    ON CONFLICT(project_id, name) DO NOTHING
+'''
+
+def write_file(conn, manifest, file_name, st, digest, meta, tasks, stream=None):
+    """
+    The single writer: one input file -> DB in ONE transaction (a broken file rolls back alone).
+    tasks: normalized (name, fingerprint, fields), a list or a lazy stream.
+    Returns (new tasks, updated tasks, tasks seen).
+    """
+    cursor = conn.cursor()
+    new_count = updated_count = rows_seen = 0
+
+    with conn:
+        # --- 1. PROCESS PROJECT ---
+        p_name, p_category, p_priority = meta["p_name"], meta["p_category"], meta["p_priority"]
+        cursor.execute("SELECT id FROM projects WHERE name = ?", (p_name,))
+        row = cursor.fetchone()
+        
+        if row:
+            project_id = row[0]
+            # Update Priority if file changed
+            cursor.execute("UPDATE projects SET priority = ? WHERE id = ?", (p_priority, project_id))
+        else:
+            project_id = str(uuid.uuid4())
+            cursor.execute(
+                '''INSERT INTO projects 
+                (id, name, category, priority, color, tags, reality_factor) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                (project_id, p_name, p_category, p_priority, meta["color"], meta["tags"], meta["p_reality"])
+            )
+            print(f"   🆕 Project: {p_name} (Cat: {p_category})")
+
+        # --- 2. DIFF AGAINST LAST INGEST + UPSERT IN BOUNDED BATCHES ---
+        for batch in iter_batches(tasks, INGEST_BATCH_SIZE):
+            rows_seen += len(batch)
+            previous = manifest.previous_fingerprints(file_name, [name for name, _, _ in batch])
+            seen, new_rows, changed_rows = [], [], []
+            batch_names = set()
+            for t_name, fp, fields in batch:
+                prev_fp, prev_digest = previous.get(t_name, (None, None))
+                # Same name twice in one file: first one wins (UNIQUE index)
+                if t_name in batch_names or prev_digest == digest:
+                    continue
+                batch_names.add(t_name)
+                seen.append((t_name, fp))
+                if prev_fp is None:
+                    new_rows.append(task_insert_row(t_name, fields, project_id))
+                elif prev_fp != fp:
+                    changed_rows.append(task_update_row(t_name, fields, project_id))
+
+            # Bulk: dedupe against the DB happens in the UNIQUE index
+            before = conn.total_changes
+            cursor.executemany(INSERT_TASK_SQL, new_rows)
+            new_count += conn.total_changes - before
+
+            before = conn.total_changes
+            cursor.executemany(UPDATE_TASK_SQL, changed_rows)
+            updated_count += conn.total_changes - before
+
+            manifest.remember_fingerprints(file_name, digest, seen)
+
+        # Streaming reads metadata up front: keys after "tasks" would have changed every row
+        if stream and METADATA_KEYS & stream.trailing.keys():
+            raise ValueError(f"metadata {sorted(METADATA_KEYS & stream.trailing.keys())} comes after 'tasks'; "
+                             "move it before the tasks array")
+
+        # --- 3. DEPENDENCIES (depends_on names -> task_edges, unblock what has nothing to wait for) ---
+        if new_count or updated_count:
+            link_project_dependencies(conn, project_id)
+
+        # --- 4. REMEMBER (project/task ids + hash) ---
+        manifest.record(file_name, st, digest, project_id)
+
+    return new_count, updated_count, rows_seen
+
+def ingest_data(conn=None):
+    """
+    conn: shared vibe_core.db connection (API server), left open. Without it the stage opens its own.
+    Returns: {"files", "skipped", "new", "updated", "parsed"} (None if there was nothing to ingest).
+    """
     print("📥 Starting VibeOS Ingestion (Pro Mode)...")
     
     if not os.path.exists(INPUTS_DIR):
@@ -81,113 +274,106 @@ def ingest_data():
     # Sort files by numeric prefix (1_ first, 2_ second)
     files.sort(key=lambda f: int(os.path.basename(f).split('_')[0]) if os.path.basename(f)[0].isdigit() else 999)
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 🔥 Auto-Create Tables if missing
-    ensure_schema(cursor)
+    # 🔥 Auto-Create / Migrate Tables (single schema source: core/db/migrations.py)
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    if migrations.get_version(conn) < migrations.LATEST_VERSION:
+        # e.g. duplicate (project, task name) rows block the UNIQUE dedupe key
+        print("   ❌ Database schema is not up to date. Fix the migration error above before ingesting.")
+        if own_conn:
+            conn.close()
+        return
 
+    manifest = IngestManifest(conn)
+    t_start = time.perf_counter()
+    rows_seen = 0
     new_tasks_count = 0
+    updated_count = 0
+    skipped_count = 0
 
-    for file_path in files:
-        try:
-            with open(file_path, "r", encoding='utf-8') as f:
-                data = json.load(f)
-                
-            # --- 0. EXTRACT METADATA ---
-            file_prio = get_file_priority(file_path)
-            
-            p_name = data.get("project_name", "General Project")
-            
-            # 🔥 SMART CATEGORY: Use 'default_category' (New) or fallback to 'category' (Old)
-            p_category = data.get("default_category", data.get("category", "General"))
-            
-            p_priority = file_prio if file_prio else data.get("priority", 1)
-            p_tag = data.get("project_tag", "General") # Just for logs/reference
-            
-            color = data.get("color", "#FFFFFF")
-            tags = ",".join(data.get("tags", []))
-            p_reality = data.get("reality_factor", 1.0) 
-
-            # --- 1. PROCESS PROJECT ---
-            cursor.execute("SELECT id FROM projects WHERE name = ?", (p_name,))
-            row = cursor.fetchone()
-            
-            if row:
-                project_id = row[0]
-                # Update Priority if file changed
-                cursor.execute("UPDATE projects SET priority = ? WHERE id = ?", (p_priority, project_id))
+    # --- 0. MANIFEST CHECK (Unchanged file = no read / no parse) ---
+    pending = []
+    with stage("ingest.manifest"):
+        for file_path in files:
+            st = os.stat(file_path)
+            if manifest.stat_unchanged(os.path.basename(file_path), st):
+                skipped_count += 1
             else:
-                project_id = str(uuid.uuid4())
-                cursor.execute(
-                    '''INSERT INTO projects 
-                    (id, name, category, priority, color, tags, reality_factor) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                    (project_id, p_name, p_category, p_priority, color, tags, p_reality)
-                )
-                print(f"   🆕 Project: {p_name} (Cat: {p_category})")
-
-            # --- 2. PROCESS TASKS ---
-            tasks = data.get("tasks", [])
-            for task in tasks:
-                t_name = task.get("name")
-                
-                # Deduplication Check (Same name in same project = Skip)
-                cursor.execute("SELECT id FROM tasks WHERE name = ? AND project_id = ?", (t_name, project_id))
-                if cursor.fetchone():
-                    continue 
-
-                # Prepare Fields
-                task_id = str(uuid.uuid4())
-                idempotency_key = str(uuid.uuid4())
-                
-                duration = task.get("duration", 60)
-                energy = task.get("energy", "Medium")
-                t_type = task.get("type", "Flexible")
-                fixed_slot = task.get("fixed_slot", None)
-                dependency = task.get("depends_on", None)
-                offset = task.get("deadline_offset_days", 0)
-                notes = task.get("notes", "")
-                
-                # Task category inherits from Project Default if not specified
-                t_category = task.get("category", p_category)
-                t_priority = task.get("priority", p_priority)
-
-                initial_status = 'BLOCKED' if dependency else 'PENDING'
-
-                # 🛡️ THE MEGA INSERT (Matches New Schema)
-                cursor.execute('''
-                    INSERT INTO tasks (
-                        id, project_id, name, status, 
-                        is_soft_deleted, idempotency_key, 
-                        category, priority, 
-                        duration, actual_duration, energy_req, 
-                        task_type, fixed_slot, dependency, 
-                        deadline_offset, notes, created_at
-                    )
-                    VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, NULL, ?, ?, ?, ?, ?, ?, datetime('now'))
-                ''', (
-                    task_id, project_id, t_name, initial_status,
-                    idempotency_key,
-                    t_category, t_priority,
-                    duration, energy,
-                    t_type, fixed_slot, dependency,
-                    offset, notes
-                ))
-                
-                new_tasks_count += 1
-                # print(f"   ➕ Task: {t_name}")
-
-        except Exception as e:
-            print(f"   ❌ Error in {os.path.basename(file_path)}: {e}")
-
-    conn.commit()
-    conn.close()
+                pending.append((file_path, st))
+
+    # --- 1. PARSE IN PARALLEL (Process pool), huge files stream in the writer instead ---
+    def known_digest(file_path):
+        entry = manifest.entries.get(os.path.basename(file_path))
+        return entry["content_hash"] if entry else None
+
+    # Pool only when asked for (INGEST_WORKERS != 1) AND there is enough JSON to pay for the IPC
+    small = [(path, st) for path, st in pending if st.st_size < STREAM_THRESHOLD_BYTES]
+    workers = INGEST_WORKERS or os.cpu_count() or 1  # Pool size stays fixed across runs (no re-spawn per run)
+    if len(small) < 2 or sum(st.st_size for _, st in small) < PARALLEL_MIN_BYTES:
+        workers = 1
+    executor = get_parse_pool(workers) if workers > 1 else None
+    jobs = {}
+    try:
+        for path, _ in (small if executor else []):
+            jobs[path] = executor.submit(parse_input_file, path, known_digest(path))
+    except BrokenProcessPool:
+        shutdown_parse_pool()  # Next run starts a fresh pool; this one parses what's left in-process
+
+    # --- 2. SINGLE WRITER (Commits in filename priority order) ---
+    with stage("ingest.parse_and_upsert"):  # Parse (pool results / streams) + dedupe upserts
+        for file_path, st in pending:
+            file_name = os.path.basename(file_path)
+            try:
+                stream = None
+                if st.st_size >= STREAM_THRESHOLD_BYTES:
+                    # Big files (syllabus dumps) are hashed + parsed in chunks: memory stays flat
+                    digest = file_hash(file_path)
+                    parsed = {"digest": digest, "unchanged": manifest.hash_unchanged(file_name, digest)}
+                    if not parsed["unchanged"]:
+                        parsed["meta"], parsed["tasks"], stream = open_stream(file_path)
+                elif file_path in jobs:
+                    try:
+                        parsed = jobs[file_path].result()
+                    except BrokenProcessPool:
+                        # A worker died (OOM kill etc.): drop the pool, parse this one here
+                        shutdown_parse_pool()
+                        parsed = parse_input_file(file_path, known_digest(file_path))
+                else:
+                    parsed = parse_input_file(file_path, known_digest(file_path))
+
+                if "error" in parsed:
+                    raise ValueError(parsed["error"])
+                if parsed.get("unchanged"):
+                    with conn:
+                        manifest.touch(file_name, st)
+                    skipped_count += 1
+                    continue
+
+                new, updated, seen = write_file(conn, manifest, file_name, st, parsed["digest"],
+                                                parsed["meta"], parsed["tasks"], stream)
+                new_tasks_count += new
+                updated_count += updated
+                rows_seen += seen
+
+            except Exception as e:
+                print(f"   ❌ Error in {file_name}: {e}")
+
+    manifest.forget_missing({os.path.basename(f) for f in files})
+    if own_conn:
+        conn.close()
     
+    print(f"   📒 Manifest: {skipped_count}/{len(files)} files unchanged (skipped), {updated_count} tasks updated.")
+    if rows_seen:
+        elapsed = time.perf_counter() - t_start
+        mode = f"{workers} parse workers" if executor else "1 process"
+        print(f"   ⚡ Parsed {rows_seen} tasks in {elapsed:.2f}s ({rows_seen / max(elapsed, 1e-9):.0f} rows/s, {mode})")
+
     if new_tasks_count > 0:
         print(f"✅ Ingestion Done. {new_tasks_count} new tasks loaded.")
     else:
         print("💤 System up to date.")
+    return {"files": len(files), "skipped": skipped_count, "new": new_tasks_count, "updated": updated_count, "parsed": rows_seen}
 
 if __name__ == "__main__":
-    ingest_data()
\ No newline at end of file
+    ingest_data()
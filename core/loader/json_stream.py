@@ -0,0 +1,155 @@
+import json
+
+CHUNK_SIZE = 1 << 16  # 64 KB reads
+WHITESPACE = " \t\n\r"
+NUMBER_START = "-0123456789"
+NUMBER_CHARS = "+-.eE0123456789"
+LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+
+class JSONStreamError(ValueError):
+    pass
+
+class TaskStream:
+    """
+    Incremental reader for input files shaped like {"project_name": ..., "tasks": [ {...}, ... ]}
+    (or a top-level list of items). Only one item is decoded at a time, so memory stays
+    flat no matter how big the file is. Uses json.JSONDecoder.raw_decode on a rolling buffer.
+
+    stream = TaskStream(path)
+    stream.header   -> keys that appear BEFORE the items array (read on open)
+    for item in stream: ...
+    stream.trailing -> keys that appear AFTER the items array (known once iteration ends)
+    """
+    def __init__(self, path, array_key="tasks"):
+        self.array_key = array_key
+        self.header = {}
+        self.trailing = {}
+        self.chars_read = 0
+        self._decoder = json.JSONDecoder()
+        self._f = open(path, "r", encoding="utf-8")
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._has_items = False
+        self._done = False
+        self.is_array = False         # Top-level list instead of {"...": ..., "tasks": [...]}
+        self._open_document()
+
+    # --- Buffer helpers ---
+    def _fill(self):
+        """Reads the next chunk; returns False at EOF."""
+        if self._eof:
+            return False
+        chunk = self._f.read(CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self.chars_read += len(chunk)
+        self._buf = self._buf[self._pos:] + chunk  # Drop consumed text
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character ('' at EOF)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars):
+        ch = self._peek()
+        if ch not in chars:
+            raise JSONStreamError(f"expected one of {chars!r} at char ~{self.chars_read}, got {ch!r}")
+        self._pos += 1
+        return ch
+
+    def _value(self):
+        """Decodes one complete JSON value, reading more input while it is cut off."""
+        ch = self._peek()
+        if ch and ch in NUMBER_START:
+            # A number cut off by the chunk boundary still decodes ("1." -> 1): read until it ends
+            while self._number_end() == len(self._buf) and self._fill():
+                pass
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # Only a value cut off by the end of the buffer is worth more input. A broken item in
+                # the middle fails right here, without pulling the rest of the file into _buf.
+                if not self._cut_off(e) or not self._fill():
+                    raise JSONStreamError(f"invalid JSON at char ~{self.chars_read - len(self._buf) + e.pos}: {e.msg}")
+                continue
+            self._pos = end
+            return value
+
+    def _cut_off(self, e):
+        """
+        True if the decode error is just the buffer ending mid-value: nothing but whitespace after
+        e.pos, a string (or its \\u escape) still open, or the tail starts a literal / number ("tr", "1.", "-").
+        """
+        if e.msg.startswith("Unterminated string"):
+            return True
+        if e.msg.startswith("Invalid \\uXXXX escape"):
+            return len(self._buf) - e.pos <= 5  # "\u12" / "\u2713" + end of buffer: the decoder needs what follows
+        tail = self._buf[e.pos:].strip(WHITESPACE)
+        return not tail or any(literal.startswith(tail) for literal in LITERALS) or all(c in NUMBER_CHARS for c in tail)
+
+    def _number_end(self):
+        j = self._pos
+        while j < len(self._buf) and self._buf[j] in NUMBER_CHARS:
+            j += 1
+        return j
+
+    # --- Document structure ---
+    def _open_document(self):
+        ch = self._expect("{[")
+        if ch == "[":
+            self._has_items = self.is_array = True
+            return
+        while self._peek() != "}":
+            key = self._value()
+            self._expect(":")
+            if key == self.array_key and self._peek() == "[":
+                self._expect("[")
+                self._has_items = True
+                return
+            self.header[key] = self._value()
+            if self._peek() == ",":
+                self._expect(",")
+        self._expect("}")
+        self._done = True
+
+    def _read_trailing(self):
+        while self._peek() == ",":
+            self._expect(",")
+            key = self._value()
+            self._expect(":")
+            self.trailing[key] = self._value()
+        if self._peek() == "}":
+            self._expect("}")
+
+    def __iter__(self):
+        if not self._has_items or self._done:
+            return
+        if self._peek() == "]":
+            self._expect("]")
+        else:
+            while True:
+                yield self._value()
+                if self._expect(",]") == "]":
+                    break
+        self._read_trailing()
+        self._done = True
+        self.close()
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,99 @@
+import hashlib
+import json
+
+def content_hash(raw_bytes):
+    return hashlib.sha256(raw_bytes).hexdigest()
+
+def file_hash(path, chunk_size=1 << 20):
+    """content_hash() of a file without loading it whole."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def task_fingerprint(task, p_category, p_priority):
+    """Hash of one input task + the project defaults it inherits (what normalize_task depends on)."""
+    payload = json.dumps([task, p_category, p_priority], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+FINGERPRINT_CHUNK = 500  # Names per IN (...) lookup (stays under SQLite's variable limit)
+
+class IngestManifest:
+    """
+    What ingest already loaded, per input file:
+    (mtime, size) -> skip without reading, content hash -> skip without parsing,
+    per-task fingerprints -> diff-based upsert of only the tasks that changed.
+    Fingerprints live in their own table and are looked up per batch, so huge files never
+    need an in-memory map of all their tasks. Tables: ingest_manifest + ingest_manifest_tasks (schema.sql).
+    """
+    def __init__(self, vibe_conn):
+        self.conn = vibe_conn
+        self.entries = {
+            row[0]: {"mtime_ns": row[1], "size": row[2], "content_hash": row[3], "project_id": row[4]}
+            for row in self.conn.execute("SELECT file_name, mtime_ns, size, content_hash, project_id FROM ingest_manifest")
+        }
+
+    def stat_unchanged(self, file_name, st):
+        entry = self.entries.get(file_name)
+        return bool(entry) and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size
+
+    def hash_unchanged(self, file_name, digest):
+        entry = self.entries.get(file_name)
+        return bool(entry) and entry["content_hash"] == digest
+
+    def previous_fingerprints(self, file_name, names):
+        """{task name: (fingerprint, content_hash of the version that wrote it)} for one batch of names."""
+        found = {}
+        names = [n for n in names if n is not None]
+        for i in range(0, len(names), FINGERPRINT_CHUNK):
+            chunk = names[i:i + FINGERPRINT_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for name, fp, digest in self.conn.execute(
+                f"SELECT name, fingerprint, content_hash FROM ingest_manifest_tasks WHERE file_name = ? AND name IN ({placeholders})",
+                [file_name, *chunk]
+            ):
+                found[name] = (fp, digest)
+        return found
+
+    def remember_fingerprints(self, file_name, digest, rows):
+        """rows: [(name, fingerprint)] seen in this file version (first occurrence of a name wins)."""
+        self.conn.executemany("""
+            INSERT INTO ingest_manifest_tasks (file_name, name, fingerprint, content_hash) VALUES (?, ?, ?, ?)
+            ON CONFLICT(file_name, name) DO UPDATE SET fingerprint = excluded.fingerprint, content_hash = excluded.content_hash
+            WHERE ingest_manifest_tasks.content_hash IS NOT excluded.content_hash
+        """, [(file_name, name, fp, digest) for name, fp in rows if name is not None])
+
+    def touch(self, file_name, st):
+        """Same content, new mtime (e.g. file re-saved): remember the stat so the next run skips the read."""
+        self.conn.execute("UPDATE ingest_manifest SET mtime_ns = ?, size = ? WHERE file_name = ?",
+                          (st.st_mtime_ns, st.st_size, file_name))
+
+    def record(self, file_name, st, digest, project_id):
+        """Closes a file version: drops names no longer in the file, resolves task ids, stores the stat + hash."""
+        self.conn.execute("DELETE FROM ingest_manifest_tasks WHERE file_name = ? AND content_hash IS NOT ?", (file_name, digest))
+        self.conn.execute("""
+            UPDATE ingest_manifest_tasks
+            SET task_id = (SELECT id FROM tasks WHERE tasks.project_id = ? AND tasks.name = ingest_manifest_tasks.name)
+            WHERE file_name = ? AND task_id IS NULL
+        """, (project_id, file_name))
+        task_count = self.conn.execute("SELECT COUNT(*) FROM ingest_manifest_tasks WHERE file_name = ?", (file_name,)).fetchone()[0]
+        self.conn.execute("""
+            INSERT INTO ingest_manifest (file_name, mtime_ns, size, content_hash, project_id, task_count, ingested_at)
+            VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(file_name) DO UPDATE SET
+                mtime_ns = excluded.mtime_ns, size = excluded.size, content_hash = excluded.content_hash,
+                project_id = excluded.project_id, task_count = excluded.task_count, ingested_at = excluded.ingested_at
+        """, (file_name, st.st_mtime_ns, st.st_size, digest, project_id, task_count))
+        # Audit trail: every ingested file version is a processed request
+        self.conn.execute("INSERT OR IGNORE INTO processed_requests (request_id, status) VALUES (?, 'SUCCESS')",
+                          (f"ingest:{file_name}:{digest}",))
+
+    def forget_missing(self, present_names):
+        """Files removed from data/inputs drop out of the manifest (their tasks stay)."""
+        gone = [(name,) for name in self.entries if name not in present_names]
+        if gone:
+            with self.conn:
+                self.conn.executemany("DELETE FROM ingest_manifest WHERE file_name = ?", gone)
+                self.conn.executemany("DELETE FROM ingest_manifest_tasks WHERE file_name = ?", gone)
+        return len(gone)
@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# --- CONFIG ---
+TIME_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Seconds (stages, model build, solve)
+SIZE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)                           # Model variables / constraints
+
+class MetricsRegistry:
+    """
+    Process-wide counters & histograms, rendered in the Prometheus text format (/metrics).
+    No client library: a handful of metrics, one lock, plain dicts keyed by (name, labels).
+    While a run is being recorded (record_run), the same observations also land in its JSON report.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}        # name -> (type, help)
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> {"buckets", "counts", "sum", "count"}
+        self._gauges = {}      # (name, labels) -> value
+        self.report = None     # Per-run report while a pipeline run is recorded
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            key = (name, tuple(labels))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, labels=(), value=0):
+        with self._lock:
+            self._gauges[(name, tuple(labels))] = value
+
+    def observe(self, name, value, labels=(), buckets=TIME_BUCKETS):
+        with self._lock:
+            hist = self._histograms.setdefault((name, tuple(labels)),
+                                               {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(hist["buckets"]):
+                if value <= bound:
+                    hist["counts"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            series = {}  # name -> [(labels, lines)]; buckets stay in ascending "le" order
+            for (name, labels), value in list(self._counters.items()) + list(self._gauges.items()):
+                series.setdefault(name, []).append((labels, [f"{name}{_labels(labels)} {_num(value)}"]))
+            for (name, labels), hist in self._histograms.items():
+                lines = [f"{name}_bucket{_labels(labels + (('le', _num(bound)),))} {count}"
+                         for bound, count in zip(hist["buckets"], hist["counts"])]
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {hist['count']}")
+                lines.append(f"{name}_sum{_labels(labels)} {_num(hist['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {hist['count']}")
+                series.setdefault(name, []).append((labels, lines))
+        out = []
+        for name in sorted(series):
+            if name in self._help:
+                kind, help_text = self._help[name]
+                out.append(f"# HELP {name} {help_text}")
+                out.append(f"# TYPE {name} {kind}")
+            for _, lines in sorted(series[name], key=lambda item: item[0]):
+                out.extend(lines)
+        return "\n".join(out) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._gauges.clear()
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+def _num(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+METRICS = MetricsRegistry()
+METRICS.describe("vibeos_stage_duration_seconds", "histogram", "Wall time of a pipeline stage / planner step.")
+METRICS.describe("vibeos_pipeline_runs_total", "counter", "Pipeline runs by final status.")
+METRICS.describe("vibeos_pipeline_queue_depth", "gauge", "Triggers waiting for the next run.")
+METRICS.describe("vibeos_pipeline_in_flight", "gauge", "1 while a pipeline run is going.")
+METRICS.describe("vibeos_pipeline_coalesced_triggers_total", "counter", "Triggers folded into another trigger's run.")
+METRICS.describe("vibeos_pipeline_rejected_triggers_total", "counter", "Triggers refused because the queue was full (HTTP 429).")
+METRICS.describe("vibeos_solver_solves_total", "counter", "Planner solves by engine (cp-sat / greedy) and solver status.")
+METRICS.describe("vibeos_solver_build_seconds", "histogram", "Time spent building one CP-SAT model.")
+METRICS.describe("vibeos_solver_solve_seconds", "histogram", "CpSolver.Solve / greedy pass wall time, by engine.")
+METRICS.describe("vibeos_solver_variables", "histogram", "Variables per CP-SAT model.")
+METRICS.describe("vibeos_solver_constraints", "histogram", "Constraints per CP-SAT model.")
+METRICS.describe("vibeos_db_queries_total", "counter", "SQL statements executed on the pipeline connections.")
+METRICS.describe("vibeos_db_query_seconds_total", "counter", "Time spent in execute() on the pipeline connections (fetches not included).")
+
+# --- RECORDING HELPERS (called from core/) ---
+@contextmanager
+def stage(name):
+    """Times a pipeline stage or planner step: `with stage("planner.flatten"): ...`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        METRICS.observe("vibeos_stage_duration_seconds", elapsed, (("stage", name),))
+        report = METRICS.report
+        if report is not None:
+            report["stages"][name] = round(report["stages"].get(name, 0.0) + elapsed, 4)
+
+def record_solve(stats):
+    """One VibeOptimizer / GreedyScheduler solve(): build / solve time, model size (CP-SAT only), status."""
+    engine = stats.get("engine", "cp-sat")
+    METRICS.inc("vibeos_solver_solves_total", (("engine", engine), ("status", stats["status"])))
+    METRICS.observe("vibeos_solver_solve_seconds", stats["wall_time"], (("engine", engine),))
+    if engine == "cp-sat":
+        METRICS.observe("vibeos_solver_build_seconds", stats["build_time"])
+        METRICS.observe("vibeos_solver_variables", stats["variables"], buckets=SIZE_BUCKETS)
+        METRICS.observe("vibeos_solver_constraints", stats["constraints"], buckets=SIZE_BUCKETS)
+    report = METRICS.report
+    if report is not None:
+        report["solver"].append({k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()})
+
+def record_query(db, sql, elapsed):
+    verb = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "OTHER"
+    if verb not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+        verb = "OTHER"
+    labels = (("db", db), ("statement", verb))
+    METRICS.inc("vibeos_db_queries_total", labels)
+    METRICS.inc("vibeos_db_query_seconds_total", labels, elapsed)
+    report = METRICS.report
+    if report is not None:
+        totals = report["db"].setdefault(db, {"queries": 0, "seconds": 0.0})
+        totals["queries"] += 1
+        totals["seconds"] += elapsed
+
+@contextmanager
+def record_run(run_id):
+    """
+    Collects one pipeline run's JSON report (stages, solves, DB totals) next to the process-wide metrics.
+    Runs are single flight (api/scheduler.py), so one report at a time is enough.
+    """
+    report = {"run_id": run_id, "stages": {}, "solver": [], "db": {}}
+    METRICS.report = report
+    started = time.perf_counter()
+    status = "FAILED"
+    try:
+        yield report
+        status = "SUCCESS"
+    finally:
+        METRICS.report = None
+        METRICS.inc("vibeos_pipeline_runs_total", (("status", status),))
+        report["total_s"] = round(time.perf_counter() - started, 4)
+        for totals in report["db"].values():
+            totals["seconds"] = round(totals["seconds"], 4)
+
+# --- TIMED SQLITE CONNECTIONS ---
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports every statement to record_query (db label comes from its connection)."""
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_query(self.connection.metrics_db, sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_query(self.connection.metrics_db, sql, time.perf_counter() - started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            record_query(self.connection.metrics_db, "script", time.perf_counter() - started)
+
+class TimedConnection(sqlite3.Connection):
+    """
+    sqlite3.connect(..., factory=TimedConnection): every cursor is a TimedCursor.
+    conn.execute() shortcuts are routed through cursor() too (the C shortcut would bypass it).
+    """
+    metrics_db = "sqlite"
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+_FACTORIES = {}
+
+def connection_factory(db):
+    """TimedConnection subclass labelled `db` ("vibe" / "fluid"), so queries during connect + migrate are labelled too."""
+    if db not in _FACTORIES:
+        _FACTORIES[db] = type(f"TimedConnection_{db}", (TimedConnection,), {"metrics_db": db})
+    return _FACTORIES[db]
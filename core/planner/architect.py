@@ -1,23 +1,75 @@
 import sqlite3
 import os
+from datetime import datetime, timedelta
+
+from core.db import migrations
+from core.solver.utils import from_utc_iso
+
+URGENT_SLACK_DAYS = 3  # Tasks due with less slack than this jump the priority queue (earliest deadline first)
+
+def get_subject_key(task):
+    """
+    Pacing key for a task: "Category_Subject" (e.g., "Learn_Japanese", "Code_VibeOS").
+    Smart Subject Detection: First word of name is usually the subject.
+    """
+    cat = task.get('category', 'General')
+    name = task.get('name', '')
+    subject = name.split()[0] if ' ' in name else 'Gen'
+    return f"{cat}_{subject}"
+
+def task_deadline(task):
+    """
+    Due time (naive IST) from deadline_offset: end of the day `deadline_offset` days after the task
+    was ingested (created_at). 0 / NULL = no deadline.
+    """
+    offset = task.get('deadline_offset')
+    created = task.get('created_at')
+    if not offset or not created:
+        return None
+    try:
+        created = from_utc_iso(created)
+    except (TypeError, ValueError):
+        return None
+    return datetime(created.year, created.month, created.day) + timedelta(days=offset + 1)
+
+def rank_by_deadline(tasks, now, urgent_slack=timedelta(days=URGENT_SLACK_DAYS)):
+    """
+    EDF pre-ranking: tasks whose slack (deadline - now - duration) is below `urgent_slack` go first,
+    earliest deadline first (overdue ones lead). Everything else keeps its order (priority, age).
+    """
+    urgent, rest = [], []
+    for task in tasks:
+        due = task_deadline(task)
+        if due and due - now - timedelta(minutes=task.get('duration') or 60) < urgent_slack:
+            urgent.append((due, task))
+        else:
+            rest.append(task)
+    urgent.sort(key=lambda item: item[0])  # Stable: same deadline keeps the priority order
+    return [task for _, task in urgent] + rest
 
 class VibeArchitect:
-    def __init__(self, db_path):
+    def __init__(self, db_path, conn=None):
         self.db_path = db_path
+        self.conn = conn  # Shared connection (planner's), reused instead of opening a new one
 
     def get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
+        if self.conn is not None:
+            return self.conn
+        conn = migrations.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
 
-    def get_balanced_batch(self, limit_per_subject=1):
+    def get_balanced_batch(self, limit_per_subject=1, now=None):
         """
         Selects tasks for a single day based on 'Drip Feed' logic.
         Ensures we don't burnout on one subject (e.g. 1 Japanese, 1 C++ per day).
+        now: ranks tasks close to their deadline first (rank_by_deadline), so they make it
+        into the subject's quota -- and the solver's model. None = plain priority order.
         Returns: (daily_batch, remaining_backlog)
         """
         conn = self.get_db_connection()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
 
         print("   🏗️  Architect: Analyzing Backlog for Balanced Pacing...")
 
@@ -29,11 +81,19 @@ class VibeArchitect:
             ORDER BY priority DESC, created_at ASC
         """)
         all_tasks = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        if conn is not self.conn:
+            conn.close()
         
         if not all_tasks:
             return [], []
 
+        # 1b. DEADLINES ⏰: due-soon tasks first (EDF)
+        if now is not None:
+            all_tasks = rank_by_deadline(all_tasks, now)
+            overdue = sum(1 for task in all_tasks if (task_deadline(task) or now) < now)
+            if overdue:
+                print(f"   ⏰ Architect: {overdue} tasks are past their deadline.")
+
         # 2. FILTER FOR BALANCE (The Smart Selector)
         daily_batch = []
         remaining = []
@@ -43,16 +103,9 @@ class VibeArchitect:
         used_keys = {} 
 
         for task in all_tasks:
-            cat = task.get('category', 'General')
-            name = task.get('name', '')
-            
-            # Smart Subject Detection: First word of name is usually the subject
-            # e.g. "Japanese Lecture 1" -> "Japanese"
-            # e.g. "C++ Lecture 2" -> "C++"
-            subject = name.split()[0] if ' ' in name else 'Gen'
-            
             # Unique Key for pacing
-            key = f"{cat}_{subject}"
+            # e.g. "Japanese Lecture 1" -> "Study_Japanese"
+            key = get_subject_key(task)
 
             # Check limit
             current_count = used_keys.get(key, 0)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+
+from core.planner.architect import get_subject_key
+from core.solver.solver import SlotIndex
+
+def _slot_key(slot):
+    return (slot['start'].isoformat(), slot['end'].isoformat(), slot.get('category'), slot.get('energy_supply'), slot.get('label'))
+
+def landing_days(pool, windows_by_day, used_by_day=None, limit_per_subject=1):
+    """
+    {day: [tasks]}: the ONE day each pending task would land on -- the first day (in order) with a free
+    window it passes the solver's hard filters for and room left in its subject's daily quota
+    (Drip Feed, in pool order). A new task only changes its own day's fingerprint, not every day it fits.
+    used_by_day: {YYYY-MM-DD: {subject_key: count}} already on the calendar.
+    Tasks with the same filter signature share one lookup per day.
+    """
+    indexes = {day: SlotIndex(windows) for day, windows in windows_by_day.items() if windows}
+    used = {day: dict((used_by_day or {}).get(day, {})) for day in indexes}
+    verdicts = {}
+    landing = {day: [] for day in windows_by_day}
+    for task in pool:
+        sig = (task.get('task_type', 'Flexible'), task.get('fixed_slot'), task.get('category', 'General'), task.get('duration', 60))
+        key = get_subject_key(task)
+        for day, index in indexes.items():
+            if used[day].get(key, 0) >= limit_per_subject:
+                continue
+            if (day, sig) not in verdicts:
+                verdicts[(day, sig)] = index.has_candidate(task)
+            if verdicts[(day, sig)]:
+                landing[day].append(task)
+                used[day][key] = used[day].get(key, 0) + 1
+                break
+    return landing
+
+def day_fingerprint(free_slots, constant_blocks, events, landing):
+    """
+    Hash of everything a day's plan depends on:
+    template slots, constant blocks, existing calendar events (what is booked there) and the pending
+    tasks that would land there (landing_days).
+    """
+    payload = {
+        "slots": sorted(_slot_key(s) for s in free_slots),
+        "constants": sorted(_slot_key(b) for b in constant_blocks),
+        "events": sorted((str(e_id), str(start), str(end)) for e_id, start, end in events),
+        "tasks": sorted((t['id'], t.get('priority'), t.get('duration'), t.get('deadline_offset')) for t in landing),
+    }
+    return hashlib.sha1(json.dumps(payload, default=str).encode("utf-8")).hexdigest()
+
+class ChangeTracker:
+    """
+    Remembers the per-day fingerprints of the last plan (vibe_core.db -> plan_fingerprints).
+    Days whose fingerprint is unchanged keep their placements and skip the solver.
+    """
+    def __init__(self, vibe_conn):
+        self.conn = vibe_conn
+
+    def load(self):
+        rows = self.conn.execute("SELECT day, fingerprint FROM plan_fingerprints").fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def dirty_days(self, fingerprints):
+        """Days (YYYY-MM-DD) whose inputs changed since the last stored plan."""
+        stored = self.load()
+        return [day for day, fp in fingerprints.items() if stored.get(day) != fp]
+
+    def save(self, fingerprints):
+        """Replaces the stored state with the current horizon (old days drop out)."""
+        self.conn.execute("DELETE FROM plan_fingerprints")
+        self.conn.executemany(
+            "INSERT INTO plan_fingerprints (day, fingerprint, updated_at) VALUES (?, ?, datetime('now'))",
+            sorted(fingerprints.items())
+        )
@@ -0,0 +1,200 @@
+import heapq
+from datetime import timedelta
+
+from core.solver.utils import from_utc_iso
+
+ID_CHUNK = 500  # Ids per IN (...) query (SQLite's variable limit)
+
+# A predecessor still blocks its dependents while it waits to be planned.
+# Planned (SCHEDULED) ones release them after their end, dropped ones (MISSED / soft-deleted) release them.
+BLOCKING_STATUSES = ("PENDING", "BLOCKED")
+
+def _chunks(ids, size=ID_CHUNK):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+def _is_blocking(row):
+    return row['status'] in BLOCKING_STATUSES and not row['is_soft_deleted']
+
+def fetch_edges(conn, ids, column):
+    """[(task_id, depends_on_id)] with `column` ("task_id" = predecessors, "depends_on_id" = successors) in ids."""
+    edges = []
+    for chunk in _chunks(ids):
+        marks = ",".join("?" * len(chunk))
+        edges.extend(tuple(row) for row in conn.execute(
+            f"SELECT task_id, depends_on_id FROM task_edges WHERE {column} IN ({marks})", chunk))
+    return edges
+
+def fetch_tasks(conn, ids):
+    """{id: task dict} for the given ids."""
+    found = {}
+    for chunk in _chunks(ids):
+        marks = ",".join("?" * len(chunk))
+        cursor = conn.execute(f"SELECT * FROM tasks WHERE id IN ({marks})", chunk)
+        columns = [c[0] for c in cursor.description]
+        for row in cursor.fetchall():
+            task = dict(zip(columns, row))
+            found[task['id']] = task
+    return found
+
+# --- UNBLOCKING (incremental: only tasks next to what just changed) ---
+def unblock_ready(conn, candidate_ids):
+    """BLOCKED candidates with no predecessor still waiting -> PENDING. Returns their ids (caller commits)."""
+    ready = []
+    for chunk in _chunks(set(candidate_ids)):
+        marks = ",".join("?" * len(chunk))
+        ready.extend(row[0] for row in conn.execute(f"""
+            SELECT t.id FROM tasks t
+            WHERE t.id IN ({marks}) AND t.status = 'BLOCKED' AND NOT EXISTS (
+                SELECT 1 FROM task_edges e JOIN tasks p ON p.id = e.depends_on_id
+                WHERE e.task_id = t.id AND p.status IN ('PENDING', 'BLOCKED') AND p.is_soft_deleted = 0
+            )
+        """, chunk))
+    conn.executemany("UPDATE tasks SET status = 'PENDING' WHERE id = ?", [(t_id,) for t_id in ready])
+    return ready
+
+def unblock_successors(conn, changed_ids):
+    """After tasks were planned (SCHEDULED) or dropped (MISSED): their BLOCKED dependents that are free now."""
+    if not changed_ids:
+        return []
+    return unblock_ready(conn, {task_id for task_id, _ in fetch_edges(conn, changed_ids, "depends_on_id")})
+
+def link_project_dependencies(conn, project_id):
+    """
+    Ingest, per changed file: rebuilds the edges of the project's waiting tasks from tasks.dependency
+    (a task name in the same project), then unblocks the ones with nothing left to wait for.
+    A name that matches no task can't block forever: that task is planned without it.
+    Returns (edges, unblocked ids). Runs inside the caller's transaction.
+    """
+    conn.execute("""
+        DELETE FROM task_edges WHERE task_id IN (
+            SELECT id FROM tasks WHERE project_id = ? AND status IN ('PENDING', 'BLOCKED'))
+    """, (project_id,))
+    edges = conn.execute("""
+        INSERT OR IGNORE INTO task_edges (task_id, depends_on_id)
+        SELECT t.id, p.id FROM tasks t
+        JOIN tasks p ON p.project_id = t.project_id AND p.name = t.dependency AND p.id != t.id
+        WHERE t.project_id = ? AND t.status IN ('PENDING', 'BLOCKED') AND t.dependency IS NOT NULL
+    """, (project_id,)).rowcount
+    missing = conn.execute("""
+        SELECT name, dependency FROM tasks t
+        WHERE project_id = ? AND status = 'BLOCKED' AND NOT EXISTS (SELECT 1 FROM task_edges e WHERE e.task_id = t.id)
+    """, (project_id,)).fetchall()
+    for name, dependency in missing[:5]:
+        print(f"   ⚠️ '{name}' depends on '{dependency}', which isn't a task of this project. Planning it without the dependency.")
+    blocked = [row[0] for row in conn.execute("SELECT id FROM tasks WHERE project_id = ? AND status = 'BLOCKED'", (project_id,))]
+    return edges, unblock_ready(conn, blocked)
+
+# --- PLANNING GRAPH ---
+class DependencyGraph:
+    """
+    Precedence DAG for ONE planner run, built once from task_edges:
+    - tasks: the PENDING pool + BLOCKED dependents that can be planned in the same solve (each of their
+      predecessors is in the graph or already planned). Found by walking successors through the
+      depends_on index, up to max_depth links -- the BLOCKED backlog is never scanned.
+    - not_before (on the task dicts): end of the latest predecessor that is already SCHEDULED (minutes it was booked for).
+    - topo_index: position in a topological order that keeps the pool's order (Architect: priority, age)
+      wherever the edges allow; a joined dependent ranks right after its latest predecessor.
+      Tasks waiting on something outside the graph, or on a cycle, are held back.
+    """
+    def __init__(self, conn, pool, max_depth):
+        self.preds = {}  # task_id -> {predecessor ids inside the graph}
+        self.succs = {}  # task_id -> {successor ids inside the graph}
+        self.held_back = []
+        self.cyclic = []
+
+        members = {task['id']: task for task in pool}
+        rank = {task['id']: (i,) for i, task in enumerate(pool)}  # Tuples: (5, 0) sorts between (5,) and (6,)
+        outside = {}  # predecessor id -> row, for predecessors that aren't members
+        pred_edges = fetch_edges(conn, members, "task_id")
+        frontier = list(members)
+        for _ in range(max_depth):
+            successors = {t_id for t_id, _ in fetch_edges(conn, frontier, "depends_on_id")} - members.keys()
+            rows = [row for row in fetch_tasks(conn, successors).values()
+                    if row['status'] == 'BLOCKED' and not row['is_soft_deleted']]
+            edges = fetch_edges(conn, [row['id'] for row in rows], "task_id")
+            self._load_outside(conn, outside, {p for _, p in edges} - members.keys())
+            waits = {}
+            for t_id, p_id in edges:
+                waits.setdefault(t_id, set()).add(p_id)
+            # Joins when every predecessor is a member or no longer blocking
+            joining = [row for row in rows
+                       if all(p in members or not _is_blocking(outside[p]) for p in waits.get(row['id'], ()))]
+            if not joining:
+                break
+            for j, row in enumerate(joining):
+                inside = [rank[p] for p in waits.get(row['id'], ()) if p in members]
+                rank[row['id']] = max(inside) + (j,) if inside else (len(pool), j)
+            members.update((row['id'], row) for row in joining)
+            frontier = [row['id'] for row in joining]
+            pred_edges.extend((t_id, p_id) for t_id, p_id in edges if t_id in members)
+
+        # Release times + members waiting on a blocking task outside the graph
+        self._load_outside(conn, outside, {p for _, p in pred_edges} - members.keys())
+        blocked_out = set()
+        for t_id, p_id in pred_edges:
+            if p_id in members:
+                self.preds.setdefault(t_id, set()).add(p_id)
+                self.succs.setdefault(p_id, set()).add(t_id)
+                continue
+            pred = outside[p_id]
+            if _is_blocking(pred):
+                blocked_out.add(t_id)
+            elif pred['status'] == 'SCHEDULED' and pred['scheduled_start']:
+                end = from_utc_iso(pred['scheduled_start']) + timedelta(minutes=pred.get('planned_duration') or pred['duration'] or 60)
+                task = members[t_id]
+                task['not_before'] = max(task.get('not_before') or end, end)
+
+        self.joined = len(members) - len(pool)  # BLOCKED dependents planned with their predecessors
+        self.tasks = self._topological(members, rank, blocked_out)
+        self.topo_index = {task['id']: i for i, task in enumerate(self.tasks)}
+
+    @staticmethod
+    def _load_outside(conn, outside, ids):
+        missing = [p_id for p_id in ids if p_id not in outside]
+        found = fetch_tasks(conn, missing)
+        for p_id in missing:
+            # A deleted predecessor row doesn't block
+            outside[p_id] = found.get(p_id, {"status": "DELETED", "is_soft_deleted": 1, "scheduled_start": None})
+
+    def _topological(self, members, rank, blocked_out):
+        """Kahn's algorithm; among ready tasks the best ranked goes first."""
+        indegree = {t_id: len(self.preds.get(t_id, ())) for t_id in members}
+        heap = [(rank[t_id], t_id) for t_id, n in indegree.items() if n == 0]
+        heapq.heapify(heap)
+        order, dropped = [], set(blocked_out)
+        while heap:
+            _, t_id = heapq.heappop(heap)
+            if t_id in dropped:
+                # Held back: its dependents can't go before it either
+                self.held_back.append(t_id)
+            else:
+                order.append(members[t_id])
+            for s_id in self.succs.get(t_id, ()):
+                if t_id in dropped:
+                    dropped.add(s_id)
+                indegree[s_id] -= 1
+                if indegree[s_id] == 0:
+                    heapq.heappush(heap, (rank[s_id], s_id))
+        placed = {task['id'] for task in order} | set(self.held_back)
+        self.cyclic = [t_id for t_id in members if t_id not in placed]
+        if self.cyclic:
+            print(f"   ⚠️ Dependency cycle: {len(self.cyclic)} tasks wait on each other and can't be planned.")
+        return order
+
+    def precedences(self, task_ids):
+        """[(predecessor id, dependent id)] with both ends in task_ids (one solver model)."""
+        ids = set(task_ids)
+        return [(p_id, t_id) for t_id in ids for p_id in self.preds.get(t_id, ()) if p_id in ids]
+
+    def is_ready(self, task, placed_end):
+        """Daily mode: every predecessor in the graph is placed (placed_end: {task_id: end})."""
+        return all(p_id in placed_end for p_id in self.preds.get(task['id'], ()))
+
+    def release(self, task, placed_end):
+        """Earliest start: after already SCHEDULED predecessors and the ones placed earlier in this run."""
+        ends = [placed_end[p_id] for p_id in self.preds.get(task['id'], ()) if p_id in placed_end]
+        if task.get('not_before'):
+            ends.append(task['not_before'])
+        return max(ends) if ends else None
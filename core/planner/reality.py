@@ -0,0 +1,146 @@
+import json
+
+# --- CONFIG ---
+WATERMARK_KEY = "reality_watermark"  # system_config row: last history_log id folded into duration_stats
+SAMPLE_ACTIONS = ("RESIZED", "COMPLETED")  # history_log rows that carry planned_duration + actual_duration
+DECAY = 0.95          # Rolling aggregates: every new sample of a scope scales its older ones (recent habits count more)
+PRIOR_WEIGHT = 5.0    # Samples' worth of trust in the configured factor (a handful of samples can't swing it far)
+MIN_FACTOR, MAX_FACTOR = 0.5, 3.0
+ROUND_TO_MIN = 5      # Calibrated durations snap to 5 minutes, so tiny factor drifts don't re-plan every day
+
+def _clamp(value):
+    return max(MIN_FACTOR, min(MAX_FACTOR, value))
+
+def shrink(stats, prior):
+    """
+    Learned multiplier for one scope: actual / estimated minutes (decayed sums), pulled towards
+    `prior` while the scope has few samples. stats = (samples, planned_sum, actual_sum) or None.
+    """
+    if not stats or stats[0] <= 0 or stats[1] <= 0:
+        return _clamp(prior)
+    samples, planned_sum, actual_sum = stats
+    return _clamp((samples * actual_sum / planned_sum + PRIOR_WEIGHT * prior) / (samples + PRIOR_WEIGHT))
+
+def calibrate(duration, factor):
+    """Estimate (minutes) x factor, rounded to ROUND_TO_MIN."""
+    if not duration or factor == 1.0:
+        return duration
+    return max(ROUND_TO_MIN, int(round(duration * factor / ROUND_TO_MIN)) * ROUND_TO_MIN)
+
+def load_watermark(conn):
+    row = conn.execute("SELECT value FROM system_config WHERE key = ?", (WATERMARK_KEY,)).fetchone()
+    try:
+        return int(json.loads(row[0])) if row else 0
+    except (TypeError, ValueError):
+        return 0
+
+# --- INCREMENTAL AGGREGATES ---
+def update_duration_stats(conn):
+    """
+    Folds the history_log rows written since the watermark into duration_stats:
+    decayed sums per ('global', ''), ('category', name) and ('project', id). Only the new rows are
+    read (history_log id range), never the whole history. Runs inside the caller's transaction.
+    Returns the number of samples folded in.
+    """
+    watermark = load_watermark(conn)
+    last_id = conn.execute("SELECT MAX(id) FROM history_log").fetchone()[0] or 0
+    if last_id <= watermark:
+        return 0
+
+    marks = ",".join("?" * len(SAMPLE_ACTIONS))
+    rows = conn.execute(f"""
+        SELECT h.planned_duration, h.actual_duration, t.project_id, t.category
+        FROM history_log h LEFT JOIN tasks t ON t.id = h.task_id
+        WHERE h.id > ? AND h.id <= ? AND h.action IN ({marks})
+          AND h.planned_duration > 0 AND h.actual_duration > 0
+        ORDER BY h.id
+    """, (watermark, last_id, *SAMPLE_ACTIONS)).fetchall()
+
+    # One row per scope (a few dozen projects / categories): read the whole table
+    stats = {(scope, key): [samples, planned, actual]
+             for scope, key, samples, planned, actual in conn.execute("SELECT scope, key, samples, planned_sum, actual_sum FROM duration_stats")}
+    touched = set()
+    for planned, actual, project_id, category in rows:
+        actual = planned * _clamp(actual / planned)  # A 5-minute resize of a 2-hour task is noise, not a habit
+        scopes = [("global", "")]
+        if category:
+            scopes.append(("category", category))
+        if project_id:
+            scopes.append(("project", project_id))
+        for scope in scopes:
+            entry = stats.setdefault(scope, [0.0, 0.0, 0.0])
+            entry[0] = entry[0] * DECAY + 1
+            entry[1] = entry[1] * DECAY + planned
+            entry[2] = entry[2] * DECAY + actual
+            touched.add(scope)
+
+    conn.executemany("""
+        INSERT INTO duration_stats (scope, key, samples, planned_sum, actual_sum, updated_at) VALUES (?, ?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(scope, key) DO UPDATE SET samples = excluded.samples, planned_sum = excluded.planned_sum,
+            actual_sum = excluded.actual_sum, updated_at = excluded.updated_at
+    """, [(scope, key, *stats[(scope, key)]) for scope, key in sorted(touched)])
+    conn.execute("INSERT INTO system_config (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                 (WATERMARK_KEY, json.dumps(last_id)))
+    return len(rows)
+
+# --- MULTIPLIERS ---
+class RealityFactors:
+    """
+    Duration multipliers, loaded once per planner run:
+    - global: learned from every sample, prior = system_config.global_reality_factor
+    - category: learned per category, prior = the global multiplier
+    - task: learned from its project's samples, prior = projects.reality_factor when it was set
+      (anything but 1.0), else the task's category multiplier
+    """
+    def __init__(self, conn):
+        row = conn.execute("SELECT value FROM system_config WHERE key = 'global_reality_factor'").fetchone()
+        try:
+            self.configured = float(row[0]) if row else 1.0
+        except (TypeError, ValueError):
+            self.configured = 1.0
+        self.stats = {(scope, key): (samples, planned, actual)
+                      for scope, key, samples, planned, actual in conn.execute("SELECT scope, key, samples, planned_sum, actual_sum FROM duration_stats")}
+        self.project_rows = {p_id: (name, factor) for p_id, name, factor in conn.execute("SELECT id, name, reality_factor FROM projects")}
+        self.global_factor = shrink(self.stats.get(("global", "")), self.configured)
+        self._cache = {}
+
+    def category_factor(self, category):
+        return shrink(self.stats.get(("category", category)), self.global_factor)
+
+    def project_prior(self, project_id, category=None):
+        configured = self.project_rows.get(project_id, (None, None))[1]
+        if configured and configured != 1.0:
+            return configured
+        return self.category_factor(category) if category is not None else self.global_factor
+
+    def factor(self, task):
+        key = (task.get('project_id'), task.get('category'))
+        if key not in self._cache:
+            self._cache[key] = shrink(self.stats.get(("project", key[0])), self.project_prior(*key))
+        return self._cache[key]
+
+    def apply(self, tasks):
+        """task['duration'] -> calibrated minutes, the raw estimate kept in task['estimate']. Returns tasks changed."""
+        changed = 0
+        for task in tasks:
+            estimate = task.get('duration') or 60
+            task['estimate'] = estimate
+            task['duration'] = calibrate(estimate, self.factor(task))
+            changed += task['duration'] != estimate
+        return changed
+
+    def report(self):
+        """JSON-friendly multipliers (API /analytics/reality)."""
+        def scope(key, prior):
+            samples = self.stats.get(key, (0, 0, 0))[0]
+            return {"factor": round(shrink(self.stats.get(key), prior), 3), "samples": round(samples, 2)}
+        return {
+            "global": {**scope(("global", ""), self.configured), "configured": self.configured},
+            "categories": {key: scope((s, key), self.global_factor) for s, key in sorted(self.stats) if s == "category"},
+            "projects": [{"id": p_id, "name": name, "configured": configured, **scope(("project", p_id), self.project_prior(p_id))}
+                         for p_id, (name, configured) in sorted(self.project_rows.items(), key=lambda item: item[1][0] or "")],
+        }
+
+def reality_report(conn):
+    """Current multipliers + how far the aggregates have read history_log."""
+    return {**RealityFactors(conn).report(), "watermark": load_watermark(conn)}
@@ -0,0 +1,77 @@
+import json
+import sqlite3
+
+WATERMARK_KEY = "ghost_watermark"  # system_config row
+WATERMARK_FIELDS = {"max_rowid", "anchor_id", "feed_count", "updated_num", "updated_text"}
+VIBEOS_FEEDS = "SELECT id FROM CalendarFeed WHERE name = 'VibeOS'"
+
+class CalendarChangeFeed:
+    """
+    What changed in Fluid's VibeOS feed since the last Ghost sync, without rescanning every task.
+    The watermark (JSON in system_config) remembers, at the last sync:
+      - max_rowid + anchor_id: CalendarEvent's highest rowid and its id. While that row still exists
+        every later INSERT gets a higher rowid, so "rowid <= max_rowid" = rows that existed back then.
+      - feed_count: VibeOS events (all have rowid <= max_rowid). Fewer of those left now = something was deleted.
+      - updated_num / updated_text: MAX(updatedAt) per storage type (Prisma may write epoch ms,
+        VibeOS writes ISO text, and SQLite orders every number before every string).
+    Same state as the watermark = nothing changed. Deletions (or a missing / stale watermark) fall back to a full reconcile.
+    """
+    def __init__(self, vibe_conn, f_cursor):
+        self.conn = vibe_conn
+        self.f_cursor = f_cursor
+        self.surviving = 0
+
+    def load(self):
+        row = self.conn.execute("SELECT value FROM system_config WHERE key = ?", (WATERMARK_KEY,)).fetchone()
+        try:
+            watermark = json.loads(row[0]) if row else None
+        except ValueError:
+            return None
+        return watermark if isinstance(watermark, dict) and WATERMARK_FIELDS <= watermark.keys() else None
+
+    def save(self, state):
+        self.conn.execute("INSERT INTO system_config (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                          (WATERMARK_KEY, json.dumps(state)))
+
+    def snapshot(self, watermark=None):
+        """
+        Current feed state, in ONE scan of the feed (no index on Fluid's updatedAt, and we don't add
+        indexes to Prisma's DB). Same scan counts the rows that survived since `watermark`.
+        Taken BEFORE reading changes, so edits made meanwhile show up next run. None if unsupported.
+        """
+        since_rowid = watermark["max_rowid"] if watermark else 0
+        try:
+            self.f_cursor.execute("SELECT rowid, id FROM CalendarEvent ORDER BY rowid DESC LIMIT 1")
+            top = self.f_cursor.fetchone()
+            max_rowid, anchor_id = top if top else (0, None)
+            self.f_cursor.execute(f"""
+                SELECT COUNT(*), COALESCE(SUM(rowid <= ?), 0),
+                       MAX(CASE WHEN typeof(updatedAt) IN ('integer', 'real') THEN updatedAt END),
+                       MAX(CASE WHEN typeof(updatedAt) = 'text' THEN updatedAt END)
+                FROM CalendarEvent WHERE feedId IN ({VIBEOS_FEEDS})
+            """, (since_rowid,))
+            feed_count, self.surviving, updated_num, updated_text = self.f_cursor.fetchone()
+        except sqlite3.OperationalError:
+            return None  # Older Fluid schema (no updatedAt / CalendarFeed): full reconcile every run
+        return {"max_rowid": max_rowid, "anchor_id": anchor_id, "feed_count": feed_count,
+                "updated_num": updated_num, "updated_text": updated_text}
+
+    def deletions_possible(self, watermark):
+        """True if any VibeOS event that existed at the watermark is gone (or rowids can't be trusted). Needs snapshot(watermark) first."""
+        self.f_cursor.execute("SELECT id FROM CalendarEvent WHERE rowid = ?", (watermark["max_rowid"],))
+        anchor = self.f_cursor.fetchone()
+        if watermark["anchor_id"] is not None and (not anchor or anchor[0] != watermark["anchor_id"]):
+            return True  # Top row deleted: new rows may reuse old rowids
+        return self.surviving < watermark["feed_count"]
+
+    def changed_events(self, watermark):
+        """{event id: (start, end)} for VibeOS events created or updated since the watermark."""
+        self.f_cursor.execute(f"""
+            SELECT id, start, end FROM CalendarEvent
+            WHERE feedId IN ({VIBEOS_FEEDS}) AND (
+                rowid > ?
+                OR (typeof(updatedAt) IN ('integer', 'real') AND updatedAt > COALESCE(?, -9223372036854775808))
+                OR (typeof(updatedAt) = 'text' AND updatedAt > COALESCE(?, ''))
+            )
+        """, (watermark["max_rowid"], watermark["updated_num"], watermark["updated_text"]))
+        return {e_id: (start, end) for e_id, start, end in self.f_cursor.fetchall()}
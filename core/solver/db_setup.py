@@ -1,60 +1,22 @@
-import sqlite3
 import os
+import sys
 
-# Database Path
-DB_PATH = os.path.join("data", "vibeos.db")
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
 
-def init_db():
-    # Ensure data directory exists
-    os.makedirs("data", exist_ok=True)
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # 1. TASKS TABLE (Input Queue)
-    # Isme wo tasks rahenge jo abhi schedule nahi huye
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            duration INTEGER NOT NULL,
-            category TEXT DEFAULT 'Any',
-            priority INTEGER DEFAULT 3,
-            deadline DATE,
-            status TEXT DEFAULT 'PENDING', -- PENDING, SCHEDULED, DONE
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+from core.db import migrations
 
-    # 2. SCHEDULE TABLE (Output Plan)
-    # Jo Python Engine calculate karke dega, wo yahan save hoga
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS schedule (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_id INTEGER,
-            day_date DATE,
-            start_time TEXT,
-            end_time TEXT,
-            category TEXT,
-            FOREIGN KEY(task_id) REFERENCES tasks(id)
-        )
-    ''')
-    
-    # 3. HISTORY TABLE (For Reality Factor)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_name TEXT,
-            category TEXT,
-            planned_duration INTEGER,
-            actual_duration INTEGER,
-            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+# Database Path (the old data/vibeos.db layout is retired; everything lives in vibe_core.db)
+DB_PATH = os.path.join(BASE_DIR, "data", "db", "vibe_core.db")
 
-    conn.commit()
+def init_db():
+    # Schema has ONE source now: core/db/migrations.py (schema.sql baseline + versioned steps)
+    conn = migrations.connect(DB_PATH, migrate_schema=False)
+    version = migrations.migrate(conn, verbose=True)
     conn.close()
-    print(f"✅ Database initialized at: {DB_PATH}")
+    print(f"✅ Database initialized at: {DB_PATH} (schema v{version})")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
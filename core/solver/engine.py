@@ -2,68 +2,462 @@ import sys
 import os
 import sqlite3
 import uuid
-import json
 from datetime import datetime, timedelta, timezone
 
 # --- CONFIG ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(BASE_DIR)
 
+from core.db import migrations
+from core.metrics import stage
 from core.solver.solver import VibeOptimizer
-from core.solver.utils import flatten_template_to_slots, to_utc_iso, to_iso_now
-from core.loader.config_loader import load_week_template
-from core.planner.architect import VibeArchitect
+from core.solver.greedy import GreedyScheduler
+from core.solver.utils import flatten_template_to_slots, to_utc_iso, to_iso_now, from_utc_iso, subtract_busy
+from core.solver.intervals import IntervalIndex
+from core.solver.template import get_compiled_template
+from core.loader.config_loader import load_routine
+from core.planner.architect import VibeArchitect, get_subject_key, task_deadline
+from core.planner.change_tracker import ChangeTracker, day_fingerprint, landing_days
+from core.planner.dependencies import DependencyGraph, fetch_edges, unblock_successors
+from core.planner.reality import RealityFactors, update_duration_stats
 
 # Paths
 VIBE_DB_PATH = os.path.join(BASE_DIR, "data", "db", "vibe_core.db")
 FLUID_DB_PATH = os.path.join(BASE_DIR, "gui", "fluid-calendar", "prisma", "dev.db")
-ROUTINE_FILE = os.path.join(BASE_DIR, "data", "config", "routine.json")
+
+# Planner Settings
+LOOKAHEAD_DAYS = 15
+SUBJECT_LIMIT_PER_DAY = 1   # Drip Feed: 1 task per subject per day
+PLANNER_MODE = "daily"      # "daily" = one model per day, "horizon" = one model for the whole lookahead
+SOLVER_MODE = "interval"    # "interval" = 1 task per slot, "capacity" = pack short tasks back-to-back in a slot
+SOLVER_TIME_BUDGET_S = 30.0 # Total CP-SAT time per planning run (Daily mode splits it across days)
+SOLVER_WORKERS = 0          # Parallel search workers (0 = all cores)
+DEADLINE_MODE = "tardiness" # "hard" = finish by the deadline or not at all, "tardiness" = late costs per hour x priority, "off"
+SCHEDULER = "auto"          # "auto" = greedy fast path, CP-SAT when the batch is big or the greedy plan is far from its bound; "greedy"; "cp-sat"
+FAST_PATH_MAX_TASKS = 40    # "auto": bigger batches go straight to CP-SAT
+FAST_PATH_MAX_GAP = 0.02    # "auto": greedy plans more than 2% under their upper bound are re-solved by CP-SAT
+SCHEDULERS = ("auto", "greedy", "cp-sat")
 
 def get_fluid_db():
     if not os.path.exists(FLUID_DB_PATH):
         raise FileNotFoundError(f"Fluid DB not found at: {FLUID_DB_PATH}")
     return sqlite3.connect(FLUID_DB_PATH)
 
-def sync_routine_blocks(fluid_cursor, feed_id, current_date):
+class PlanWriter:
+    """
+    In-memory view of the VibeOS feed for the planning horizon + queued writes.
+    Existing events are loaded with ONE query into an IntervalIndex (busy time);
+    duplicate and overlap checks happen in memory;
+    flush() applies everything with executemany, one transaction per database.
     """
-    Legacy Support: Syncs routine.json if needed.
+    def __init__(self, fluid_cursor, feed_id, days):
+        self.feed_id = feed_id
+        self.days = days
+        self.events = []       # (id, title, start_iso, end_iso, start_local, end_local)
+        self.busy = IntervalIndex()
+        self.block_keys = set()
+        self.event_rows = []   # Queued CalendarEvent INSERTs
+        self.event_moves = []  # Queued CalendarEvent UPDATEs (released planner events placed somewhere else)
+        self.task_rows = []    # Queued tasks UPDATEs
+        self.released = {}     # task_id -> event, planner events handed back to the solver (deleted unless re-placed)
+
+        first = datetime.strptime(days[0], "%Y-%m-%d")
+        last = datetime.strptime(days[-1], "%Y-%m-%d") + timedelta(days=1)
+        fluid_cursor.execute("SELECT id, title, start, end FROM CalendarEvent WHERE feedId = ? AND start < ? AND end > ?",
+                             (feed_id, to_utc_iso(last), to_utc_iso(first)))
+        for e_id, title, start, end in fluid_cursor.fetchall():
+            self._remember(e_id, title, start, end)
+
+    def _remember(self, e_id, title, start_iso, end_iso):
+        start, end = from_utc_iso(start_iso), from_utc_iso(end_iso)
+        self.events.append((e_id, title, start_iso, end_iso, start, end))
+        self.busy.add(start, end)
+        self.block_keys.add((title, start.strftime("%Y-%m-%d")))
+
+    def _queue_event(self, title, start, end):
+        event_id = str(uuid.uuid4())
+        start_iso, end_iso = to_utc_iso(start), to_utc_iso(end)
+        self.event_rows.append((event_id, self.feed_id, title, start_iso, end_iso, to_iso_now(), to_iso_now()))
+        self._remember(event_id, title, start_iso, end_iso)
+        return event_id, start_iso
+
+    def add_block(self, title, start, end):
+        """Fixed block (Routine / Constant). Duplicate check by Title + Day."""
+        if (title, start.strftime("%Y-%m-%d")) in self.block_keys:
+            return False
+        self._queue_event(title, start, end)
+        return True
+
+    def release(self, task_events):
+        """
+        task_events: {task_id: event_id} of planner events to re-plan. They leave the busy index now;
+        flush() deletes the ones add_task doesn't place again.
+        """
+        event_task = {e_id: task_id for task_id, e_id in task_events.items()}
+        self.released.update((event_task[event[0]], event) for event in self.events if event[0] in event_task)
+        self.events = [event for event in self.events if event[0] not in event_task]
+        self.busy = IntervalIndex((start, end) for *_, start, end in self.events)
+
+    def add_task(self, item):
+        """Scheduled task -> CalendarEvent + tasks UPDATE. False if it collides with an existing event."""
+        if self.busy.overlaps(item['start'], item['end']):
+            return False
+        old = self.released.pop(item['task_id'], None)
+        if old is None:
+            event_id, start_iso = self._queue_event(item['name'], item['start'], item['end'])
+        else:
+            # Released planner event: the same row moves (and nothing is written if it stays put)
+            event_id, start_iso, end_iso = old[0], to_utc_iso(item['start']), to_utc_iso(item['end'])
+            self._remember(event_id, old[1], start_iso, end_iso)
+            item['event_id'] = event_id
+            if (old[4], old[5]) == (item['start'], item['end']):
+                return True
+            self.event_moves.append((start_iso, end_iso, to_iso_now(), event_id))
+        self.task_rows.append((start_iso, event_id, int((item['end'] - item['start']).total_seconds() / 60), item['task_id']))
+        item['event_id'] = event_id
+        return True
+
+    def events_by_day(self):
+        """{YYYY-MM-DD: [(id, start_iso, end_iso)]} of events overlapping each local day"""
+        by_day = {day: [] for day in self.days}
+        for e_id, _, start_iso, end_iso, start, end in self.events:
+            day = datetime(start.year, start.month, start.day)
+            while day < end:
+                key = day.strftime("%Y-%m-%d")
+                if key in by_day:
+                    by_day[key].append((e_id, start_iso, end_iso))
+                day += timedelta(days=1)
+        return by_day
+
+    def flush(self, fluid_conn, vibe_conn):
+        with fluid_conn:
+            fluid_conn.executemany("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                                   self.event_rows)
+            fluid_conn.executemany("UPDATE CalendarEvent SET start = ?, end = ?, updatedAt = ? WHERE id = ?", self.event_moves)
+            fluid_conn.executemany("DELETE FROM CalendarEvent WHERE id = ?", [(event[0],) for event in self.released.values()])
+        with vibe_conn:
+            vibe_conn.executemany("UPDATE tasks SET status = 'SCHEDULED', scheduled_start = ?, calendar_event_id = ?, planned_duration = ? WHERE id = ?",
+                                  self.task_rows)
+            # Released and not placed again (a better plan for its day didn't need it): back to the backlog
+            vibe_conn.executemany("UPDATE tasks SET status = 'PENDING', scheduled_start = NULL, calendar_event_id = NULL WHERE id = ?",
+                                  [(task_id,) for task_id in self.released])
+
+def sync_routine_blocks(writer, current_date, routine):
+    """
+    Legacy Support: Syncs routine.json blocks (loaded once per run via load_routine).
     Note: Now 'Constant' blocks from Week Template effectively replace this.
     But we keep it safely with a duplicate check.
     """
-    if not os.path.exists(ROUTINE_FILE): return
-    try:
-        with open(ROUTINE_FILE, "r", encoding="utf-8") as f:
-            routine = json.load(f).get("routine_blocks", [])
-    except Exception as e:
-        return
-
     day_str = current_date.strftime("%Y-%m-%d")
     for block in routine:
-        title = block['name']
         start_dt = datetime.strptime(f"{day_str} {block['start']}", "%Y-%m-%d %H:%M")
         end_dt = datetime.strptime(f"{day_str} {block['end']}", "%Y-%m-%d %H:%M")
         if end_dt < start_dt: end_dt += timedelta(days=1)
+        writer.add_block(block['name'], start_dt, end_dt)
+
+def sync_constant_blocks(writer, constant_blocks):
+    """Queues CONSTANT blocks (Gym, Lunch...) for the Calendar. Duplicate check by Title + Day."""
+    for block in constant_blocks:
+        writer.add_block(block['label'], block['start'], block['end'])
+
+def pick_daily_batch(pool, limit_per_subject=SUBJECT_LIMIT_PER_DAY, used_keys=None, ready=None):
+    """
+    Drip Feed for ONE day: max `limit_per_subject` tasks per subject.
+    used_keys: {subject_key: count} already on the calendar that day.
+    ready(task): False keeps the task for a later day (its predecessor isn't placed yet).
+    Returns: (day_batch, next_day_pool)
+    """
+    day_batch = []
+    used_keys = dict(used_keys or {})
+    next_day_pool = []
+    
+    for task in pool:
+        key = get_subject_key(task)
         
-        # Check Duplicate (Strict)
-        fluid_cursor.execute("SELECT id FROM CalendarEvent WHERE title = ? AND start LIKE ?", (title, f"{day_str}%"))
-        if not fluid_cursor.fetchone():
-            fluid_cursor.execute("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, 0, ?, ?)", 
-            (str(uuid.uuid4()), feed_id, title, to_utc_iso(start_dt), to_utc_iso(end_dt), to_iso_now(), to_iso_now()))
-
-def run_planner():
-    print("\n🏗️  Starting VibeOS Smart Planner (15-Day Lookahead + 3-Block System)...")
+        if ready is not None and not ready(task):
+            next_day_pool.append(task)
+        elif used_keys.get(key, 0) < limit_per_subject:
+            day_batch.append(task)
+            used_keys[key] = used_keys.get(key, 0) + 1
+        else:
+            next_day_pool.append(task)
+    return day_batch, next_day_pool
+
+def cap_pool_for_horizon(pool, days, limit_per_subject=SUBJECT_LIMIT_PER_DAY):
+    """
+    A subject can get at most `days * limit` tasks over the horizon,
+    so the rest of its queue never needs to enter the model.
+    """
+    capped = []
+    used_keys = {}
+    for task in pool:
+        key = get_subject_key(task)
+        if used_keys.get(key, 0) < days * limit_per_subject:
+            capped.append(task)
+            used_keys[key] = used_keys.get(key, 0) + 1
+    return capped
+
+def group_slots_by_day(slots, days):
+    """{YYYY-MM-DD: [slots]} for every day in `days` (days without slots get an empty list)"""
+    by_day = {day: [] for day in days}
+    for slot in slots:
+        day = slot['start'].strftime("%Y-%m-%d")
+        if day in by_day:
+            by_day[day].append(slot)
+    return by_day
+
+def solve_batch(tasks, slots, scheduler=SCHEDULER, **options):
+    """
+    One batch through the configured scheduler. options = VibeOptimizer / GreedyScheduler arguments.
+    "auto": GreedyScheduler first (no model build, milliseconds) for up to FAST_PATH_MAX_TASKS tasks.
+    If its plan is within FAST_PATH_MAX_GAP of the greedy upper bound, it is kept; otherwise CP-SAT
+    re-solves the batch (it can move tasks around to fit one more in) and the greedy plan is its fallback.
+    Returns: (schedule, stats of every solve that ran) -- both engines report "objective".
+    """
+    if scheduler not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler: {scheduler}")
+    stats = []
+    greedy_schedule = None
+    if scheduler == "greedy" or (scheduler == "auto" and len(tasks) <= FAST_PATH_MAX_TASKS):
+        greedy = GreedyScheduler(tasks, slots, **options)
+        greedy_schedule = greedy.solve()
+        stats.append(greedy.stats)
+        if scheduler == "greedy" or greedy.stats['gap'] <= FAST_PATH_MAX_GAP:
+            return greedy_schedule, stats
+        print(f"   ↗️ Greedy plan is {greedy.stats['gap']:.2%} under its bound ({greedy.unplaced} tasks left out). Escalating to CP-SAT...")
+
+    optimizer = VibeOptimizer(tasks, slots, **options)
+    schedule = optimizer.solve()
+    stats.append(optimizer.stats)
+    if greedy_schedule is not None and optimizer.objective_value < stats[0]['objective']:
+        # CP-SAT timed out before matching the heuristic (or found nothing): keep the greedy plan
+        print(f"   ↩️ Keeping the greedy plan (Score: {stats[0]['objective']} vs {optimizer.objective_value}).")
+        return greedy_schedule, stats
+    return schedule, stats
+
+def plan_daily(pool, day_slots, commit_item, solver_mode=SOLVER_MODE, time_budget=SOLVER_TIME_BUDGET_S, pacing_used=None, progress=None,
+               graph=None, deadline_mode=DEADLINE_MODE, scheduler=SCHEDULER):
+    """
+    Daily Mode: Builds & solves one batch per day (greedy, day by day).
+    day_slots: {YYYY-MM-DD: free slots} of the days to plan, in date order.
+    commit_item(item) -> True if placed, False if rejected (task retries next day).
+    pacing_used: {YYYY-MM-DD: {subject_key: count}} already on the calendar.
+    progress(stage, **info): called once per planned day.
+    graph: DependencyGraph -- a dependent waits for a later day than its predecessor's, and starts after it ends.
+    deadline_mode: VibeOptimizer deadline mode ("hard" / "tardiness" / "off").
+    scheduler: "auto" / "greedy" / "cp-sat" (see solve_batch).
+    Returns: (placed schedule items, solver stats per solve)
+    """
+    placed = []
+    solver_stats = []
+    pacing_used = pacing_used or {}
+    placed_end = {}  # task_id -> end, for dependents
+    for day_no, (day, free_slots) in enumerate(day_slots.items(), 1):
+        if not pool: break
+        if not free_slots:
+            continue
+
+        if deadline_mode == "hard":
+            # Past their deadline before this day starts: they'd only eat their subject's quota
+            day_start = datetime.strptime(day, "%Y-%m-%d")
+            pool = [t for t in pool if not (task_deadline(t) and task_deadline(t) <= day_start)]
+
+        # Get Balanced Batch for TODAY ⚖️ (re-solved placements wait for their own day and go first there)
+        pool.sort(key=lambda task: task.get('released_day') != day)
+        def ready(task):
+            if task.get('released_day', day) > day:
+                return False
+            return graph.is_ready(task, placed_end) if graph else True
+        day_batch, next_day_pool = pick_daily_batch(pool, used_keys=pacing_used.get(day), ready=ready)
+        if not day_batch:
+            continue
+        if graph:
+            for task in day_batch:
+                task['not_before'] = graph.release(task, placed_end)
+
+        # Run Optimizer for FREE slots 🧠
+        schedule, batch_stats = solve_batch(day_batch, free_slots, scheduler, mode=solver_mode,
+                                            time_limit=time_budget / len(day_slots) if time_budget else None, num_workers=SOLVER_WORKERS,
+                                            deadline_mode=deadline_mode)
+        solver_stats.extend(batch_stats)
+
+        if schedule:
+            print(f"📅 Scheduling {free_slots[0]['start'].strftime('%a, %d %b')}:")
+            scheduled_ids = set()
+            for item in schedule:
+                if commit_item(item):
+                    scheduled_ids.add(item['task_id'])
+                    placed_end[item['task_id']] = item['end']
+                    placed.append(item)
+            
+            # Update backlog: keep leftovers for tomorrow
+            failed_to_fit = [t for t in day_batch if t['id'] not in scheduled_ids]
+            pool = failed_to_fit + next_day_pool
+        else:
+            pool = day_batch + next_day_pool
+        if progress:
+            progress("planner", state="day_solved", day=day, days_solved=day_no, days_total=len(day_slots),
+                     placed=len(scheduled_ids) if schedule else 0, solver_status=batch_stats[-1]['status'])
+    return placed, solver_stats
+
+def plan_horizon(pool, day_slots, commit_item, solver_mode=SOLVER_MODE, time_budget=SOLVER_TIME_BUDGET_S, pacing_used=None, progress=None,
+                 graph=None, deadline_mode=DEADLINE_MODE, scheduler=SCHEDULER):
+    """
+    Horizon Mode: ONE solve over all slots of the lookahead.
+    Pacing (1 per subject per day) is a constraint inside the model,
+    so a high-priority task can move to its best day instead of the first free one.
+    Rejected items simply stay PENDING for the next run.
+    progress(stage, **info): called once, after the single solve.
+    graph: DependencyGraph -- whole chains go into the same model with precedence constraints.
+    deadline_mode: VibeOptimizer deadline mode ("hard" / "tardiness" / "off").
+    scheduler: "auto" / "greedy" / "cp-sat" (see solve_batch).
+    """
+    free_slots = [slot for slots in day_slots.values() for slot in slots]
+    if not free_slots:
+        return [], []
+
+    candidates = cap_pool_for_horizon(pool, len(day_slots))
+    used = {(key, datetime.strptime(day, "%Y-%m-%d").date()): count
+            for day, keys in (pacing_used or {}).items() for key, count in keys.items()}
+    precedences = graph.precedences(t['id'] for t in candidates) if graph else None
+    schedule, solver_stats = solve_batch(candidates, free_slots, scheduler, pacing_limit=SUBJECT_LIMIT_PER_DAY, mode=solver_mode,
+                                         time_limit=time_budget, num_workers=SOLVER_WORKERS, pacing_used=used, precedences=precedences,
+                                         deadline_mode=deadline_mode)
+
+    placed = []
+    current_day = None
+    for item in sorted(schedule, key=lambda x: x['start']):
+        if item['start'].date() != current_day:
+            current_day = item['start'].date()
+            print(f"📅 Scheduling {item['start'].strftime('%a, %d %b')}:")
+        if commit_item(item):
+            placed.append(item)
+    if progress:
+        progress("planner", state="day_solved", day=max(day_slots), days_solved=len(day_slots), days_total=len(day_slots),
+                 placed=len(placed), solver_status=solver_stats[-1]['status'])
+    return placed, solver_stats
+
+def load_pacing_used(v_cursor, days):
+    """{YYYY-MM-DD: {subject_key: count}} for tasks already SCHEDULED inside the horizon"""
+    first = datetime.strptime(days[0], "%Y-%m-%d")
+    last = datetime.strptime(days[-1], "%Y-%m-%d") + timedelta(days=1)
+    v_cursor.execute("SELECT name, category, scheduled_start FROM tasks WHERE status = 'SCHEDULED' AND scheduled_start >= ? AND scheduled_start < ?",
+                     (to_utc_iso(first), to_utc_iso(last)))
+    used = {}
+    for row in v_cursor.fetchall():
+        day = from_utc_iso(row['scheduled_start']).strftime("%Y-%m-%d")
+        keys = used.setdefault(day, {})
+        key = get_subject_key(dict(row))
+        keys[key] = keys.get(key, 0) + 1
+    return used
+
+EVENT_CHUNK = 500  # Event ids per IN (...) lookup
+
+def release_placements(vibe_conn, writer, days, started_before):
+    """
+    Re-planned days are solved again WITH what the planner already booked there: SCHEDULED tasks whose
+    calendar event (calendar_event_id, VibeOS feed) starts on one of `days` leave the busy time and go
+    back into the pool, the event's start as scheduled_start -- VibeOptimizer hints that slot, so the
+    solve starts from the previous plan. Stay where they are: events that already started, tasks the
+    user moved by hand (MOVED history) and tasks with dependency edges (their neighbours are timed on them).
+    Returns: released task dicts (duration = the minutes they were booked for, released_day = YYYY-MM-DD)
+    """
+    day_set = set(days)
+    events = {event[0]: event for event in writer.events
+              if event[4].strftime("%Y-%m-%d") in day_set and event[4] >= started_before}
+    event_ids = list(events)
+    rows = []
+    for i in range(0, len(event_ids), EVENT_CHUNK):
+        chunk = event_ids[i:i + EVENT_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        cursor = vibe_conn.execute(f"SELECT * FROM tasks WHERE status = 'SCHEDULED' AND calendar_event_id IN ({marks})", chunk)
+        columns = [c[0] for c in cursor.description]
+        rows.extend(dict(zip(columns, row)) for row in cursor.fetchall())
+    if not rows:
+        return []
+
+    ids = [task['id'] for task in rows]
+    pinned = {t_id for edge in fetch_edges(vibe_conn, ids, "task_id") + fetch_edges(vibe_conn, ids, "depends_on_id") for t_id in edge}
+    for i in range(0, len(ids), EVENT_CHUNK):
+        chunk = ids[i:i + EVENT_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        pinned.update(row[0] for row in vibe_conn.execute(
+            f"SELECT DISTINCT task_id FROM history_log WHERE action = 'MOVED' AND task_id IN ({marks})", chunk))
+
+    released = []
+    for task in rows:
+        if task['id'] in pinned:
+            continue
+        task['scheduled_start'] = events[task['calendar_event_id']][2]  # Where the event is now
+        task['released_day'] = events[task['calendar_event_id']][4].strftime("%Y-%m-%d")
+        task['duration'] = task.get('planned_duration') or task['duration']
+        released.append(task)
+    writer.release({task['id']: task['calendar_event_id'] for task in released})
+    return released
+
+def snapshot_days(days, free_by_day, constants_by_day, events_by_day, busy, pool, pacing_used):
+    """
+    Per-day state for incremental re-planning.
+    busy: IntervalIndex of existing events. pacing_used: {YYYY-MM-DD: {subject_key: count}} on the calendar.
+    Returns: ({day: fingerprint}, {day: free windows (slots minus existing events)})
+    """
+    windows_by_day = {day: subtract_busy(free_by_day[day], busy) for day in days}
+    landing = landing_days(pool, windows_by_day, pacing_used, SUBJECT_LIMIT_PER_DAY)
+    fingerprints = {day: day_fingerprint(free_by_day[day], constants_by_day[day], events_by_day[day], landing[day])
+                    for day in days}
+    return fingerprints, windows_by_day
+
+def run_planner(mode=None, solver_mode=None, full_replan=False, vibe_conn=None, fluid_conn=None, progress=None):
+    """
+    full_replan: Ignore the change tracker and re-plan every day of the lookahead.
+    vibe_conn / fluid_conn: shared connections (API server's ConnectionManager), left open for the caller.
+    Without them the planner opens and closes its own.
+    progress(stage, **info): per-day progress callback (API job events).
+    Returns: plan summary + the scheduled items (None if the DBs can't be opened).
+    """
+    mode = mode or PLANNER_MODE
+    solver_mode = solver_mode or SOLVER_MODE
+    print(f"\n🏗️  Starting VibeOS Smart Planner ({LOOKAHEAD_DAYS}-Day Lookahead + 3-Block System, Mode: {mode}/{solver_mode})...")
     
     # 1. SETUP CONNECTIONS
+    own_vibe, own_fluid = vibe_conn is None, fluid_conn is None
     try:
-        fluid_conn = get_fluid_db()
-        fluid_cursor = fluid_conn.cursor()
-        vibe_conn = sqlite3.connect(VIBE_DB_PATH)
-        vibe_conn.row_factory = sqlite3.Row
-        v_cursor = vibe_conn.cursor()
+        if own_fluid:
+            fluid_conn = get_fluid_db()
+        if own_vibe:
+            vibe_conn = migrations.connect(VIBE_DB_PATH)
+            vibe_conn.row_factory = sqlite3.Row
     except Exception as e:
         print(f"❌ DB Connection Error: {e}")
+        if own_fluid and fluid_conn is not None:
+            fluid_conn.close()
         return
 
+    try:
+        return plan_and_sync(vibe_conn, fluid_conn, mode, solver_mode, full_replan, progress)
+    finally:
+        if own_fluid:
+            fluid_conn.close()
+        if own_vibe:
+            vibe_conn.close()
+
+def plan_summary(placed, solver_stats, days_planned):
+    """JSON-friendly result of one planner run (API /runs/{id}/results)."""
+    return {
+        "scheduled": [{"task_id": item['task_id'], "name": item['name'], "event_id": item.get('event_id'),
+                       "start": item['start'].isoformat(), "end": item['end'].isoformat()} for item in placed],
+        "days_planned": days_planned,
+        "solver": {"solves": len(solver_stats), "wall_time": round(sum(st['wall_time'] for st in solver_stats), 3),
+                   "greedy": sum(1 for st in solver_stats if st.get('engine') == 'greedy'),
+                   "not_optimal": sum(1 for st in solver_stats if st.get('engine') != 'greedy' and st['status'] != 'OPTIMAL'),
+                   "late": sum(st.get('late', 0) for st in solver_stats)},
+    }
+
+def plan_and_sync(vibe_conn, fluid_conn, mode, solver_mode, full_replan, progress=None):
+    fluid_cursor = fluid_conn.cursor()
+    v_cursor = vibe_conn.cursor()
+    v_cursor.row_factory = sqlite3.Row
+
     # 2. GET USER & FEED
     fluid_cursor.execute("SELECT id FROM User LIMIT 1")
     user_row = fluid_cursor.fetchone()
@@ -82,123 +476,134 @@ def run_planner():
         fluid_cursor.execute("INSERT INTO CalendarFeed (id, name, type, enabled, userId, createdAt, updatedAt) VALUES (?, 'VibeOS', 'LOCAL', 1, ?, ?, ?)", (feed_id, user_id, to_iso_now(), to_iso_now()))
 
     # 3. INITIALIZE LOGIC
-    template = load_week_template()
-    architect = VibeArchitect(VIBE_DB_PATH)
+    template = get_compiled_template()  # Compiled once, reused until week_template.json changes
+    architect = VibeArchitect(VIBE_DB_PATH, conn=vibe_conn)
     
     now = datetime.now()
     if now.hour > 20: now += timedelta(days=1)
-    
-    total_scheduled = 0
-    LOOKAHEAD_DAYS = 15 
 
-    # FETCH ALL PENDING TASKS (To manage backlog in memory)
-    current_backlog_pool, _ = architect.get_balanced_batch(limit_per_subject=100)
+    # FETCH ALL PENDING TASKS (To manage backlog in memory), due-soon ones first ⏰
+    current_backlog_pool, _ = architect.get_balanced_batch(limit_per_subject=100, now=now if DEADLINE_MODE != "off" else None)
 
     if not current_backlog_pool:
         print("✨ No pending tasks found. System Idle.")
-        return
+        return plan_summary([], [], 0)
 
-    # 4. THE LOOP 🗓️
-    for day_offset in range(LOOKAHEAD_DAYS):
-        if not current_backlog_pool: break
+    # DEPENDENCIES 🔗: BLOCKED dependents of the pool join it (same solve, after their predecessors)
+    with stage("planner.dependencies"):
+        graph = DependencyGraph(vibe_conn, current_backlog_pool, max_depth=LOOKAHEAD_DAYS)
+    current_backlog_pool = graph.tasks
+    if graph.joined or graph.held_back:
+        print(f"   🔗 Dependencies: {graph.joined} blocked tasks planned with their predecessors, {len(graph.held_back)} held back.")
 
-        current_date = now + timedelta(days=day_offset)
-        
-        # A. Sync Routine (Legacy Support)
-        sync_routine_blocks(fluid_cursor, feed_id, current_date)
+    # REALITY FACTORS 📏: estimates -> realistic durations before slot-fitting (new history_log samples folded in first)
+    with stage("planner.reality"):
+        with vibe_conn:
+            update_duration_stats(vibe_conn)
+        reality = RealityFactors(vibe_conn)
+        calibrated = reality.apply(current_backlog_pool)
+    if calibrated:
+        print(f"   📏 Reality Factors: {calibrated} task durations calibrated (global x{reality.global_factor:.2f}).")
 
-        # B. Get Slots (NEW: Split into Free & Constant)
-        # utils.py tuple return karega
-        slots_data = flatten_template_to_slots(template, current_date, days_ahead=1)
-        
-        if isinstance(slots_data, tuple):
-            free_slots, constant_blocks = slots_data
-        else:
-            free_slots = slots_data
-            constant_blocks = []
+    # 4. FIXED BLOCKS 🟢 (Routine + Constant, for every day of the lookahead)
+    days = [(now + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(LOOKAHEAD_DAYS)]
+    writer = PlanWriter(fluid_cursor, feed_id, days)
+    routine = load_routine()
+    for day_offset in range(LOOKAHEAD_DAYS):
+        sync_routine_blocks(writer, now + timedelta(days=day_offset), routine)
+    with stage("planner.flatten"):
+        free_slots, constant_blocks = flatten_template_to_slots(template, now, days_ahead=LOOKAHEAD_DAYS)
+    sync_constant_blocks(writer, constant_blocks)
 
-        # C. Insert CONSTANT Blocks (Directly to Calendar) 🟢
-        for block in constant_blocks:
-            # Duplicate check by Title + Time
-            fluid_cursor.execute("SELECT id FROM CalendarEvent WHERE title = ? AND start LIKE ?", (block['label'], f"{current_date.strftime('%Y-%m-%d')}%"))
-            if not fluid_cursor.fetchone():
-                fluid_cursor.execute("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, 0, ?, ?)", 
-                (str(uuid.uuid4()), feed_id, block['label'], to_utc_iso(block['start']), to_utc_iso(block['end']), to_iso_now(), to_iso_now()))
+    # 5. CHANGE TRACKING 🔍 (Only re-plan days whose inputs changed)
+    free_by_day = group_slots_by_day(free_slots, days)
+    constants_by_day = group_slots_by_day(constant_blocks, days)
 
-        if not free_slots:
-            continue
+    tracker = ChangeTracker(vibe_conn)
+    with stage("planner.change_tracking"):
+        pacing_used = load_pacing_used(v_cursor, days)
+        fingerprints, _ = snapshot_days(days, free_by_day, constants_by_day, writer.events_by_day(), writer.busy,
+                                        current_backlog_pool, pacing_used)
+    dirty = days if full_replan else tracker.dirty_days(fingerprints)
+    print(f"   🔍 Change Tracker: {len(dirty)}/{len(days)} days changed since last plan.")
 
-        # D. Get Balanced Batch for TODAY ⚖️
-        day_batch = []
-        used_keys = {}
-        next_day_pool = []
-        
-        for task in current_backlog_pool:
-            cat = task.get('category', 'General')
-            subject = task['name'].split()[0] if ' ' in task['name'] else 'Gen'
-            key = f"{cat}_{subject}"
-            
-            if used_keys.get(key, 0) < 1: # STRICT LIMIT: 1 per subject/day
-                day_batch.append(task)
-                used_keys[key] = used_keys.get(key, 0) + 1
+    def commit_item(item):
+        # 🛡️ FINAL SAFETY CHECK: Is slot truly empty? (Interval Index over the whole feed)
+        if not writer.add_task(item):
+            print(f"   ⚠️ SKIPPING OVERLAP: {item['name']} collided with existing event.")
+            # Is task ko fail maano aur agle din ke liye chhod do
+            return False
+        print(f"   ✅ {item['name']} -> {item['start'].strftime('%H:%M')}")
+        return True
+
+    # 6. PLAN 🗓️ (dirty days only, into the windows left free by existing events)
+    placed, solver_stats, planned_days = [], [], []
+    pool = current_backlog_pool
+    while dirty:
+        # The planner's own placements on those days are re-solved too (warm-started from where they are)
+        released = release_placements(vibe_conn, writer, dirty, datetime.now())
+        for task in released:
+            keys = pacing_used.get(task['released_day'], {})
+            key = get_subject_key(task)
+            if keys.get(key):
+                keys[key] -= 1
+        if released:
+            print(f"   ♻️ Re-solving {len(released)} existing placements on the changed days.")
+            pool = released + pool
+        day_windows = {day: subtract_busy(free_by_day[day], writer.busy) for day in dirty}
+        with stage("planner.solve"):  # Model build + CpSolver.Solve per model are in the solver metrics
+            if mode == "horizon":
+                round_placed, round_stats = plan_horizon(pool, day_windows, commit_item, solver_mode, pacing_used=pacing_used, progress=progress,
+                                                         graph=graph, deadline_mode=DEADLINE_MODE, scheduler=SCHEDULER)
             else:
-                next_day_pool.append(task)
+                round_placed, round_stats = plan_daily(pool, day_windows, commit_item, solver_mode, pacing_used=pacing_used, progress=progress,
+                                                       graph=graph, deadline_mode=DEADLINE_MODE, scheduler=SCHEDULER)
+        placed += round_placed
+        solver_stats += round_stats
+        planned_days += dirty
 
-        if not day_batch:
-            current_backlog_pool = next_day_pool
-            continue
+        by_id = {task['id']: task for task in pool}
+        for item in round_placed:
+            keys = pacing_used.setdefault(item['start'].strftime("%Y-%m-%d"), {})
+            key = get_subject_key(by_id[item['task_id']])
+            keys[key] = keys.get(key, 0) + 1
+        placed_now = {item['task_id'] for item in round_placed}
+        pool = [task for task in pool if task['id'] not in placed_now]
 
-        # E. Run Optimizer for FREE slots 🧠
-        optimizer = VibeOptimizer(day_batch, free_slots)
-        schedule = optimizer.solve()
+        # Left over (bumped by a more important task, or no room) and landing on a day not solved yet: that day goes next
+        rest = [day for day in days if day not in planned_days]
+        landing = landing_days(pool, {day: subtract_busy(free_by_day[day], writer.busy) for day in rest}, pacing_used, SUBJECT_LIMIT_PER_DAY)
+        dirty = [day for day in rest if landing[day]]
+        if dirty:
+            print(f"   ↪️ Left-over tasks land on {len(dirty)} more days. Re-solving those too.")
+    if not planned_days:
+        print("   💤 Nothing changed. Existing plan kept as is.")
+    total_scheduled = len(placed)
+    solver_time = sum(st['wall_time'] for st in solver_stats)
+    fast = sum(1 for st in solver_stats if st.get('engine') == 'greedy')
+    not_proven = sum(1 for st in solver_stats if st.get('engine') != 'greedy' and st['status'] != 'OPTIMAL')
+    print(f"   🧠 Solver: {len(solver_stats)} solves ({fast} greedy), {solver_time:.2f}s total, {not_proven} CP-SAT stopped before proving optimal.")
 
-        if schedule:
-            print(f"📅 Scheduling {current_date.strftime('%a, %d %b')}:")
-            scheduled_ids = []
-            for item in schedule:
-                # 🛡️ FINAL SAFETY CHECK: Is slot truly empty?
-                check_start = to_utc_iso(item['start'] + timedelta(minutes=1)) 
-                check_end = to_utc_iso(item['end'] - timedelta(minutes=1))
-                
-                fluid_cursor.execute("""
-                    SELECT id FROM CalendarEvent 
-                    WHERE feedId = ? 
-                    AND (
-                        (start <= ? AND end >= ?) OR 
-                        (start <= ? AND end >= ?)
-                    )
-                """, (feed_id, check_start, check_start, check_end, check_end))
-                
-                if fluid_cursor.fetchone():
-                    print(f"   ⚠️ SKIPPING OVERLAP: {item['name']} collided with existing event.")
-                    # Is task ko fail maano aur agle din ke liye chhod do
-                    continue
-
-                # Insert if safe
-                event_id = str(uuid.uuid4())
-                fluid_cursor.execute("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, 0, ?, ?)", 
-                                     (event_id, feed_id, item['name'], to_utc_iso(item['start']), to_utc_iso(item['end']), to_iso_now(), to_iso_now()))
-                
-                v_cursor.execute("UPDATE tasks SET status = 'SCHEDULED', scheduled_start = ?, calendar_event_id = ? WHERE id = ?", 
-                                 (to_utc_iso(item['start']), event_id, item['task_id']))
-                
-                print(f"   ✅ {item['name']} -> {item['start'].strftime('%H:%M')}")
-                scheduled_ids.append(item['task_id'])
-                total_scheduled += 1
-            
-            # Update backlog: keep leftovers for tomorrow
-            failed_to_fit = [t for t in day_batch if t['id'] not in scheduled_ids]
-            current_backlog_pool = failed_to_fit + next_day_pool
-        else:
-            current_backlog_pool = day_batch + next_day_pool
+    # 7. FINAL COMMIT (bulk writes, one transaction per DB)
+    placed_ids = {item['task_id'] for item in placed}
+    with stage("planner.flush"):
+        writer.flush(fluid_conn, vibe_conn)
+        # Dependents of what was just planned can go next run (after their predecessor's end)
+        with vibe_conn:
+            unblocked = unblock_successors(vibe_conn, placed_ids)
+    if unblocked:
+        print(f"   🔓 Unblocked {len(unblocked)} tasks whose predecessors are planned now.")
 
-    # 5. FINAL COMMIT
-    fluid_conn.commit()
-    vibe_conn.commit()
-    fluid_conn.close()
-    vibe_conn.close()
+    # Remember what this plan was built from (post-placement state, so a no-change run is clean)
+    remaining_pool = [t for t in pool if t['id'] not in placed_ids]
+    fingerprints, _ = snapshot_days(days, free_by_day, constants_by_day, writer.events_by_day(), writer.busy,
+                                    remaining_pool, load_pacing_used(v_cursor, days))
+    with vibe_conn:
+        tracker.save(fingerprints)
     
-    print(f"\n✅ Planner Cycle Finished. {total_scheduled} tasks spread over 15 days. CPU is safe! 😎")
+    print(f"\n✅ Planner Cycle Finished. {total_scheduled} tasks spread over {LOOKAHEAD_DAYS} days. CPU is safe! 😎")
+    return plan_summary(placed, solver_stats, len(planned_days))
 
 if __name__ == "__main__":
-    run_planner()
\ No newline at end of file
+    # Usage: python engine.py [daily|horizon] [interval|capacity]
+    run_planner(*sys.argv[1:3])
\ No newline at end of file
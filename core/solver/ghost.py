@@ -3,15 +3,27 @@ import os
 import sys
 from datetime import datetime, timezone, timedelta
 
-# --- CONFIG ---
+# Path setup so 'core' is importable when run as a script
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from core.db import migrations
+from core.metrics import stage
+from core.solver.change_feed import CalendarChangeFeed
+from core.planner.dependencies import unblock_successors
+from core.solver.intervals import IntervalIndex
+from core.solver.utils import from_utc_iso, to_utc_iso
+
+# --- CONFIG ---
 VIBE_DB_PATH = os.path.join(BASE_DIR, "data", "db", "vibe_core.db")
 
 # 🔥 FIX: Path corrected to 'dev.db' (Not dev.dbcd)
 FLUID_DB_PATH = os.path.join(BASE_DIR, "gui", "fluid-calendar", "prisma", "dev.db")
+GHOST_MODE = "incremental"  # "incremental" = only events changed since the last sync (updatedAt watermark), "full" = every scheduled task
 
 def get_vibe_db():
-    conn = sqlite3.connect(VIBE_DB_PATH)
+    conn = migrations.connect(VIBE_DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -21,81 +33,237 @@ def get_fluid_db():
         return None
     return sqlite3.connect(FLUID_DB_PATH)
 
-def run_ghost_protocol():
-    print("\n👻 Starting Ghost Protocol (Sync Check)...")
-    
-    vibe_conn = get_vibe_db()
-    fluid_conn = get_fluid_db()
+EVENT_CHUNK = 500  # Event ids per IN (...) lookup (stays under SQLite's variable limit)
 
-    if not fluid_conn:
-        print("   ⚠️ Fluid DB not found. Skipping Ghost Protocol.")
-        return
-    
-    v_cursor = vibe_conn.cursor()
-    f_cursor = fluid_conn.cursor()
+def fetch_scheduled_tasks(v_cursor, event_ids):
+    """SCHEDULED tasks pointing at the given events (incremental sync)."""
+    event_ids = list(event_ids)
+    tasks = []
+    for i in range(0, len(event_ids), EVENT_CHUNK):
+        chunk = event_ids[i:i + EVENT_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        v_cursor.execute(f"""
+            SELECT id, name, calendar_event_id, scheduled_start, duration, planned_duration, actual_duration
+            FROM tasks
+            WHERE status = 'SCHEDULED' AND calendar_event_id IN ({placeholders})
+        """, chunk)
+        tasks.extend(v_cursor.fetchall())
+    return tasks
 
-    # 🔥 SAFETY CHECK: Check if Table Exists
-    try:
-        f_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='CalendarEvent'")
-        if not f_cursor.fetchone():
-            print("   ⚠️ Fluid DB exists but tables are missing. Skipping Ghost Protocol.")
-            return
-    except Exception as e:
-        print(f"   ❌ DB Connection Error: {e}")
-        return
-
-    # 1. Fetch all tasks that VibeOS thinks are SCHEDULED
+def fetch_all_scheduled_tasks(v_cursor):
+    """Every SCHEDULED task with a calendar event (full reconcile)."""
     v_cursor.execute("""
-        SELECT id, name, calendar_event_id, scheduled_start 
+        SELECT id, name, calendar_event_id, scheduled_start, duration, planned_duration, actual_duration
         FROM tasks 
         WHERE status = 'SCHEDULED' AND calendar_event_id IS NOT NULL
     """)
-    vibe_tasks = v_cursor.fetchall()
-    
-    updates_count = 0
-    deleted_count = 0
+    return v_cursor.fetchall()
+
+def fetch_events(f_cursor, event_ids):
+    """{event id: (start, end)} for the given CalendarEvent ids. Missing ids = deleted in the UI."""
+    event_ids = list(dict.fromkeys(event_ids))
+    events = {}
+    for i in range(0, len(event_ids), EVENT_CHUNK):
+        chunk = event_ids[i:i + EVENT_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        f_cursor.execute(f"SELECT id, start, end FROM CalendarEvent WHERE id IN ({placeholders})", chunk)
+        for e_id, start, end in f_cursor.fetchall():
+            events[e_id] = (start, end)
+    return events
+
+def minutes_between(planned, actual):
+    """actual - planned in minutes (positive = moved later), None if a timestamp can't be parsed."""
+    try:
+        return round((from_utc_iso(actual) - from_utc_iso(planned)).total_seconds() / 60)
+    except (TypeError, ValueError):
+        return None
+
+def event_minutes(start, end):
+    """Length of a calendar event in minutes, None if a timestamp can't be parsed."""
+    try:
+        if isinstance(start, str) and isinstance(end, str):
+            # Hot path (every event of a full reconcile): a length needs no IST shift
+            return round((datetime.fromisoformat(end.replace("Z", "+00:00")) -
+                          datetime.fromisoformat(start.replace("Z", "+00:00"))).total_seconds() / 60)
+        return round((from_utc_iso(end) - from_utc_iso(start)).total_seconds() / 60)
+    except (TypeError, ValueError):
+        return None
+
+def find_clashes(f_cursor, moved):
+    """
+    Warns when a task moved in the UI now overlaps another calendar event.
+    Events around the moved tasks are loaded with ONE query into an IntervalIndex.
+    """
+    if not moved:
+        return 0
+
+    first = min(start for _, _, start, _ in moved)
+    last = max(end for _, _, _, end in moved)
+    moved_ids = {event_id for _, event_id, _, _ in moved}
+
+    f_cursor.execute("SELECT id, start, end FROM CalendarEvent WHERE start < ? AND end > ?",
+                     (to_utc_iso(last), to_utc_iso(first)))
+    busy = IntervalIndex(
+        (from_utc_iso(start), from_utc_iso(end))
+        for e_id, start, end in f_cursor.fetchall() if e_id not in moved_ids
+    )
+
+    clashes = 0
+    for name, _, start, end in sorted(moved, key=lambda m: m[2]):
+        if busy.overlaps(start, end):
+            print(f"   ⚠️ Clash: '{name}' was moved on top of another event")
+            clashes += 1
+        busy.add(start, end)  # Two moved tasks on the same time also clash
+    return clashes
+
+def diff_calendar(vibe_tasks, events):
+    """
+    The reconcile step, in memory (no DB access): scheduled tasks vs their calendar events.
+    vibe_tasks: rows with id, name, calendar_event_id, scheduled_start, duration, planned_duration, actual_duration.
+    events: {event id: (start, end)} -- a missing id means the event was deleted in the UI.
+    Returns {"deleted", "moves", "history", "resized", "samples", "moved"}: the rows sync_calendar_changes writes.
+    """
+    deleted = []   # (task_id,)
+    moves = []     # (new_start, task_id)
+    history = []   # (task_id, planned_start, actual_start, time_diff_minutes)
+    resized = []   # (actual_duration, task_id)
+    samples = []   # (task_id, planned_start, actual_start, estimate, actual_duration) -> reality factors
+    moved = []     # (name, event_id, start, end) -> clash check
 
     for task in vibe_tasks:
         v_id = task['id']
         f_id = task['calendar_event_id']
         v_start = task['scheduled_start']
-
-        # 2. Check logic in Fluid DB
-        f_cursor.execute("SELECT start, end FROM CalendarEvent WHERE id = ?", (f_id,))
-        f_event = f_cursor.fetchone()
+        f_event = events.get(f_id)
 
         # CASE A: Event Deleted in Calendar ❌
         if not f_event:
             print(f"   🗑️  Task Deleted in UI: {task['name']} -> Moving to Backlog")
-            
             # Change status to 'MISSED' (or PENDING if you want retry)
-            v_cursor.execute("""
-                UPDATE tasks 
-                SET status = 'MISSED', 
-                    is_soft_deleted = 1, 
-                    calendar_event_id = NULL 
-                WHERE id = ?
-            """, (v_id,))
-            deleted_count += 1
+            deleted.append((v_id,))
 
         # CASE B: Event Moved in Calendar ↔️
         else:
-            f_start_str = f_event[0]
-            
+            f_start_str, f_end_str = f_event
+
             if v_start != f_start_str:
                 print(f"   🔄 Task Moved in UI: {task['name']}")
                 print(f"      Old: {v_start} -> New: {f_start_str}")
-                
-                v_cursor.execute("UPDATE tasks SET scheduled_start = ? WHERE id = ?", (f_start_str, v_id))
-                v_cursor.execute("INSERT INTO history_log (task_id, action, planned_start, actual_start) VALUES (?, 'MOVED', ?, ?)", 
-                                 (v_id, v_start, f_start_str))
-                updates_count += 1
-
-    vibe_conn.commit()
-    vibe_conn.close()
-    fluid_conn.close()
-    
-    print(f"✅ Ghost Protocol Finished. Moved: {updates_count}, Backlogged: {deleted_count}")
+
+                moves.append((f_start_str, v_id))
+                history.append((v_id, v_start, f_start_str, minutes_between(v_start, f_start_str)))
+                moved.append((task['name'], f_id, from_utc_iso(f_start_str), from_utc_iso(f_end_str)))
+
+            # CASE C: Event Resized in Calendar ↕️ (the real length of the task -> reality factors)
+            # Detection compares against the event's last known length (booked = calibrated, or the
+            # last resize). The sample compares against the raw estimate (tasks.duration): that is
+            # what the learned multiplier scales. One sample per task: the first resize. Later ones
+            # only keep actual_duration current (duration_stats has already folded the first in).
+            length = event_minutes(f_start_str, f_end_str)
+            booked = task['actual_duration'] or task['planned_duration'] or task['duration']
+            if length and length > 0 and booked and length != booked:
+                print(f"   ↕️  Task Resized in UI: {task['name']} ({booked} -> {length} min)")
+                resized.append((length, v_id))
+                if task['actual_duration'] is None:
+                    samples.append((v_id, v_start, f_start_str, task['duration'], length))
+
+    return {"deleted": deleted, "moves": moves, "history": history, "resized": resized, "samples": samples, "moved": moved}
+
+def run_ghost_protocol(vibe_conn=None, fluid_conn=None, full=False):
+    """
+    vibe_conn / fluid_conn: shared connections (API server's ConnectionManager).
+    Left open for the caller; without them the stage opens and closes its own.
+    full: Ignore the watermark and reconcile every scheduled task.
+    Returns: {"scope", "moved", "resized", "backlogged", "clashes"} (None if skipped).
+    """
+    print("\n👻 Starting Ghost Protocol (Sync Check)...")
+
+    own_vibe, own_fluid = vibe_conn is None, fluid_conn is None
+    if own_fluid:
+        fluid_conn = get_fluid_db()
+    if not fluid_conn:
+        print("   ⚠️ Fluid DB not found. Skipping Ghost Protocol.")
+        return
+    if own_vibe:
+        vibe_conn = get_vibe_db()
+
+    try:
+        return sync_calendar_changes(vibe_conn, fluid_conn, full=full or GHOST_MODE == "full")
+    finally:
+        if own_vibe:
+            vibe_conn.close()
+        if own_fluid:
+            fluid_conn.close()
+
+def sync_calendar_changes(vibe_conn, fluid_conn, full=False):
+    v_cursor = vibe_conn.cursor()
+    v_cursor.row_factory = sqlite3.Row
+    f_cursor = fluid_conn.cursor()
+
+    # 🔥 SAFETY CHECK: Check if Table Exists
+    try:
+        f_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='CalendarEvent'")
+        if not f_cursor.fetchone():
+            print("   ⚠️ Fluid DB exists but tables are missing. Skipping Ghost Protocol.")
+            return
+    except Exception as e:
+        print(f"   ❌ DB Connection Error: {e}")
+        return
+
+    # 0. CHANGE FEED: what moved in the VibeOS feed since the last sync?
+    feed = CalendarChangeFeed(vibe_conn, f_cursor)
+    watermark = None if full else feed.load()
+    with stage("ghost.change_feed"):
+        state = feed.snapshot(watermark)
+        deletions = state is not None and watermark is not None and feed.deletions_possible(watermark)
+    if state is None or watermark is None or deletions:
+        full = True
+    elif state == watermark:
+        print("✅ Ghost Protocol Finished. 💤 No calendar changes since last sync.")
+        return {"scope": "no changes", "moved": 0, "resized": 0, "backlogged": 0, "clashes": 0}
+    else:
+        events = feed.changed_events(watermark)
+        # 1. Only the tasks behind the changed events
+        vibe_tasks = fetch_scheduled_tasks(v_cursor, events)
+
+    if full:
+        # 1. Fetch all tasks that VibeOS thinks are SCHEDULED
+        vibe_tasks = fetch_all_scheduled_tasks(v_cursor)
+
+        # 2. Their events from Fluid DB: one IN (...) read per chunk instead of one SELECT per task
+        events = fetch_events(f_cursor, [task['calendar_event_id'] for task in vibe_tasks])
+
+    # 3. Diff in memory
+    changes = diff_calendar(vibe_tasks, events)
+    deleted, moves, history = changes["deleted"], changes["moves"], changes["history"]
+    resized, samples, moved = changes["resized"], changes["samples"], changes["moved"]
+
+    # 4. Apply (one transaction, executemany)
+    with stage("ghost.write"), vibe_conn:
+        vibe_conn.executemany("""
+            UPDATE tasks 
+            SET status = 'MISSED', 
+                is_soft_deleted = 1, 
+                calendar_event_id = NULL 
+            WHERE id = ?
+        """, deleted)
+        vibe_conn.executemany("UPDATE tasks SET scheduled_start = ? WHERE id = ?", moves)
+        vibe_conn.executemany("INSERT INTO history_log (task_id, action, planned_start, actual_start, time_diff_minutes) VALUES (?, 'MOVED', ?, ?, ?)",
+                              history)
+        vibe_conn.executemany("UPDATE tasks SET actual_duration = ? WHERE id = ?", resized)
+        vibe_conn.executemany("INSERT INTO history_log (task_id, action, planned_start, actual_start, planned_duration, actual_duration) "
+                              "VALUES (?, 'RESIZED', ?, ?, ?, ?)", samples)
+        # Dropped tasks no longer hold back their dependents
+        unblock_successors(vibe_conn, [task_id for task_id, in deleted])
+        if state is not None:
+            feed.save(state)
+    updates_count, deleted_count = len(moves), len(deleted)
+
+    clashes = find_clashes(f_cursor, moved)
+
+    scope = "full reconcile" if full else f"{len(events)} changed events"
+    print(f"✅ Ghost Protocol Finished ({scope}). Moved: {updates_count}, Resized: {len(resized)}, Backlogged: {deleted_count}, Clashes: {clashes}")
+    return {"scope": scope, "moved": updates_count, "resized": len(resized), "backlogged": deleted_count, "clashes": clashes}
 
 if __name__ == "__main__":
     run_ghost_protocol()
\ No newline at end of file
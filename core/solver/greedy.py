@@ -0,0 +1,264 @@
+import heapq
+import time
+from datetime import timedelta
+
+from core.planner.architect import get_subject_key, task_deadline
+from core.solver.intervals import IntervalIndex
+from core.solver.solver import ENERGY_MAP, SOLVER_MODES, DEADLINE_MODES, SlotIndex, score_assignment, lay_out, count_late
+from core.metrics import record_solve
+
+class GreedyScheduler:
+    """
+    Pure-Python fast path with VibeOptimizer's interface (same arguments, solve() -> same schedule items,
+    objective_value / stats / utilization). No model: tasks are taken in priority order (then the
+    most demanding energy, then the fewest options) and each goes to its best-scoring compatible
+    slot -- score_assignment, so both objectives compare 1:1 -- ties going to the tightest fit.
+    Same hard filters (SlotIndex: duration, Fixed slot, category zone, weekend guard), pacing,
+    precedences, not_before and deadlines as the CP-SAT model. Not optimal: it never moves a task
+    it has placed to make room for a later one. stats['gap'] is measured against _upper_bound, so the
+    caller can tell a near-optimal plan from a poor one (engine.solve_batch escalates to CP-SAT then).
+    """
+    def __init__(self, tasks, slots, pacing_limit=None, mode="interval", time_limit=None, num_workers=None, pacing_used=None,
+                 precedences=None, deadline_mode="off"):
+        if mode not in SOLVER_MODES:
+            raise ValueError(f"Unknown solver mode: {mode}")
+        if deadline_mode not in DEADLINE_MODES:
+            raise ValueError(f"Unknown deadline mode: {deadline_mode}")
+        self.tasks = tasks
+        self.slots = slots
+        self.pacing_limit = pacing_limit
+        self.pacing_used = pacing_used or {}
+        self.precedences = precedences or []
+        self.mode = mode
+        self.deadline_mode = deadline_mode
+        self.objective_value = 0
+        self.build_time = 0.0
+        self.utilization = 0.0
+        self.due_tasks = 0
+        self.late = 0
+        self.linked = 0
+        self.unplaced = 0  # Tasks with at least one compatible slot that didn't get one
+        self.bound = 0     # _upper_bound: the objective no schedule can beat
+        self.stats = {}
+
+    def _order(self, options):
+        """Task order: priority, energy, fewest options first -- predecessors always before their dependents."""
+        def key(t_idx):
+            task = self.tasks[t_idx]
+            return (-task.get('priority', 1), -ENERGY_MAP.get(task.get('energy_req', 'Medium'), 2), len(options[t_idx]), t_idx)
+
+        t_index = {task.get('id'): t_idx for t_idx, task in enumerate(self.tasks)}
+        preds, succs = {}, {}
+        for pred_id, succ_id in self.precedences:
+            p_idx, s_idx = t_index.get(pred_id), t_index.get(succ_id)
+            if p_idx is not None and s_idx is not None:
+                preds.setdefault(s_idx, set()).add(p_idx)
+                succs.setdefault(p_idx, set()).add(s_idx)
+        self.linked = sum(len(p) for p in preds.values())
+        indegree = {t_idx: len(preds.get(t_idx, ())) for t_idx in range(len(self.tasks))}
+        heap = [(key(t_idx), t_idx) for t_idx, n in indegree.items() if n == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            _, t_idx = heapq.heappop(heap)
+            order.append(t_idx)
+            for s_idx in succs.get(t_idx, ()):
+                indegree[s_idx] -= 1
+                if indegree[s_idx] == 0:
+                    heapq.heappush(heap, (key(s_idx), s_idx))
+        return order, preds  # Tasks on a cycle never come out (CP-SAT can't place them either)
+
+    def _upper_bound(self, options):
+        """
+        Optimistic objective, interactions ignored: every task in its best slot. In interval mode a slot
+        holds one task, so it is also capped by every slot taking its best-scoring task (the lower of both).
+        Pacing and precedences only take score away, so no schedule can beat it.
+        """
+        per_task = sum(max(score for _, score, _ in opts) for opts in options.values() if opts)
+        if self.mode == "capacity":
+            return per_task
+        per_slot = {}
+        for opts in options.values():
+            for s_idx, score, _ in opts:
+                per_slot[s_idx] = max(per_slot.get(s_idx, 0), score)
+        return min(per_task, sum(per_slot.values()))
+
+    def solve(self):
+        print(f"   ⚡ Greedy: {len(self.tasks)} Tasks into {len(self.slots)} Slots...")
+        started = time.perf_counter()
+        index = SlotIndex(self.slots)
+        ordered_slots = sorted(self.slots, key=lambda x: x['start'])
+        disjoint = all(a['end'] <= b['start'] for a, b in zip(ordered_slots, ordered_slots[1:]))
+        if self.mode == "capacity" and not disjoint:
+            print("   ⚠️ Slots overlap each other. Capacity mode needs disjoint slots, using 'interval' mode.")
+            self.mode = "interval"
+        busy = IntervalIndex() if self.mode == "interval" and not disjoint else None
+
+        # Compatible slots per task (hard filters + release time + hard deadline), with their scores
+        options = {}
+        self.due_tasks = 0
+        for t_idx, task in enumerate(self.tasks):
+            release = int(task['not_before'].timestamp() / 60) if task.get('not_before') else None
+            due = task_deadline(task) if self.deadline_mode != "off" else None
+            due_min = int(due.timestamp() / 60) if due else None
+            self.due_tasks += due is not None
+            options[t_idx] = []
+            for s_idx in index.candidates(task):
+                start_min = index.start_mins[s_idx]
+                if release is not None and start_min < release:
+                    continue
+                finish = start_min + (self.slots[s_idx].get('duration', 0) if self.mode == "capacity" else task.get('duration', 60))
+                late = finish - due_min if due_min is not None and finish > due_min else 0
+                if late and self.deadline_mode == "hard":
+                    continue
+                score = score_assignment(task, self.slots[s_idx], s_idx, late)
+                options[t_idx].append((s_idx, score, finish))
+        order, preds = self._order(options)
+        self.bound = self._upper_bound(options)
+
+        remaining = [slot.get('duration', 0) for slot in self.slots]  # Free minutes per slot
+        has_fixed = set()  # Capacity mode: slots already holding a Fixed task
+        paced = dict(self.pacing_used)
+        end_min = {}       # t_idx -> end (minutes) as the precedence rule sees it
+        chosen = {}        # s_idx -> [t_idx]
+        left_out = []      # Tasks no free slot was left for (repair candidates)
+        objective = 0
+        self.unplaced = 0
+
+        for t_idx in order:
+            task = self.tasks[t_idx]
+            if not options[t_idx]:
+                continue
+            if any(p_idx not in end_min for p_idx in preds.get(t_idx, ())):
+                self.unplaced += 1  # A predecessor wasn't placed: neither is its dependent
+                continue
+            t_duration = task.get('duration', 60)
+            after = max((end_min[p_idx] for p_idx in preds.get(t_idx, ())), default=None)
+            subject = get_subject_key(task) if self.pacing_limit is not None else None
+            is_fixed = task.get('task_type') == 'Fixed'
+
+            best = None  # ((score, -leftover), s_idx, end)
+            for s_idx, score, finish in options[t_idx]:
+                slot = self.slots[s_idx]
+                if after is not None and index.start_mins[s_idx] < after:
+                    continue
+                if self.mode == "capacity":
+                    if remaining[s_idx] < t_duration or (is_fixed and s_idx in has_fixed):
+                        continue
+                else:
+                    if s_idx in chosen:
+                        continue
+                    if busy is not None and busy.overlaps(slot['start'], slot['start'] + timedelta(minutes=t_duration)):
+                        continue
+                if subject is not None and paced.get((subject, index.dates[s_idx]), 0) >= self.pacing_limit:
+                    continue
+                rank = (score, -(remaining[s_idx] - t_duration))
+                if best is None or rank > best[0]:
+                    best = (rank, s_idx, finish)
+
+            if best is None:
+                self.unplaced += 1
+                left_out.append(t_idx)
+                continue
+            (score, _), s_idx, finish = best
+            chosen.setdefault(s_idx, []).append(t_idx)
+            remaining[s_idx] -= t_duration
+            if is_fixed:
+                has_fixed.add(s_idx)
+            if busy is not None:
+                busy.add(self.slots[s_idx]['start'], self.slots[s_idx]['start'] + timedelta(minutes=t_duration))
+            if subject is not None:
+                day_key = (subject, index.dates[s_idx])
+                paced[day_key] = paced.get(day_key, 0) + 1
+            end_min[t_idx] = finish
+            objective += score
+
+        if self.mode == "interval" and busy is None and left_out:
+            objective += self._repair(left_out, options, preds, chosen, paced, index)
+
+        schedule = lay_out(self.tasks, self.slots, chosen)
+        self.build_time = time.perf_counter() - started
+        self.objective_value = objective
+        self.late = count_late(self.tasks, schedule) if self.due_tasks else 0
+        used = sum(self.tasks[t_idx].get('duration', 60) for members in chosen.values() for t_idx in members)
+        available = sum(slot.get('duration', 0) for slot in self.slots)
+        self.utilization = used / available if available else 0.0
+        self.stats = self._collect_stats(len(schedule))
+        record_solve(self.stats)
+        print(f"   ✅ Greedy Plan: {len(schedule)} placed, {self.unplaced} left out (Score: {objective}, gap {self.stats['gap']:.2%}, "
+              f"{self.build_time * 1000:.1f} ms)")
+        return schedule
+
+    def _repair(self, left_out, options, preds, chosen, paced, index):
+        """
+        Interval mode, disjoint slots: a left-out task takes an occupied slot when its occupant can move
+        to a slot nobody uses (one move each, best gain first). Tasks with precedences never move.
+        Updates chosen / paced in place. Returns the objective gained.
+        """
+        linked = set(preds) | {p_idx for p_idxs in preds.values() for p_idx in p_idxs}
+        occupant = {s_idx: members[0] for s_idx, members in chosen.items()}
+        score_at = {(t_idx, s_idx): score for t_idx, opts in options.items() for s_idx, score, _ in opts}
+
+        def subject(t_idx):
+            return get_subject_key(self.tasks[t_idx]) if self.pacing_limit is not None else None
+
+        gained = 0
+        for t_idx in left_out:
+            if t_idx in linked:
+                continue
+            t_subject = subject(t_idx)
+            best = None  # (gain, s_idx, o_idx, n_idx)
+            for s_idx, score, _ in options[t_idx]:
+                o_idx = occupant.get(s_idx)
+                if o_idx is None or o_idx in linked:
+                    continue
+                o_subject, day = subject(o_idx), index.dates[s_idx]
+                for n_idx, n_score, _ in options[o_idx]:
+                    if n_idx in occupant:
+                        continue
+                    moves_day = index.dates[n_idx] != day
+                    if t_subject is not None:
+                        if moves_day and paced.get((o_subject, index.dates[n_idx]), 0) >= self.pacing_limit:
+                            continue
+                        left = paced.get((t_subject, day), 0) - (moves_day and o_subject == t_subject)
+                        if left >= self.pacing_limit:
+                            continue
+                    gain = score + n_score - score_at[(o_idx, s_idx)]
+                    if gain > 0 and (best is None or gain > best[0]):
+                        best = (gain, s_idx, o_idx, n_idx)
+            if best is None:
+                continue
+            gain, s_idx, o_idx, n_idx = best
+            chosen[s_idx], chosen[n_idx] = [t_idx], [o_idx]
+            occupant[s_idx], occupant[n_idx] = t_idx, o_idx
+            if t_subject is not None:
+                o_subject, day = subject(o_idx), index.dates[s_idx]
+                paced[(o_subject, day)] -= 1
+                paced[(o_subject, index.dates[n_idx])] = paced.get((o_subject, index.dates[n_idx]), 0) + 1
+                paced[(t_subject, day)] = paced.get((t_subject, day), 0) + 1
+            self.unplaced -= 1
+            gained += gain
+        return gained
+
+    def _collect_stats(self, placed):
+        """Same keys as VibeOptimizer.stats (no model: variables / constraints / search effort are 0)."""
+        return {
+            "engine": "greedy",
+            "status": "HEURISTIC",
+            "mode": self.mode,
+            "build_time": 0.0,
+            "wall_time": self.build_time,
+            "gap": max(0, self.bound - self.objective_value) / max(1.0, abs(self.objective_value)),
+            "branches": 0,
+            "conflicts": 0,
+            "hinted": 0,
+            "precedences": self.linked,
+            "due_tasks": self.due_tasks,
+            "late": self.late,
+            "variables": 0,
+            "constraints": 0,
+            "objective": self.objective_value,
+            "placed": placed,
+            "unplaced": self.unplaced,
+            "bound": self.bound,
+        }
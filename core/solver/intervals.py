@@ -0,0 +1,52 @@
+from bisect import bisect_left, bisect_right
+
+class IntervalIndex:
+    """
+    Busy-time index: (start, end) ranges kept sorted and merged into a disjoint list.
+    Works with anything comparable (datetimes, minute offsets, ISO strings).
+
+    overlaps() -> O(log n)
+    add()      -> O(log n) search + list splice
+    gaps()     -> O(log n + k) free sub-ranges of a window
+    """
+    def __init__(self, ranges=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(ranges):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, end):
+        """Marks [start, end) busy, merging with touching/overlapping ranges."""
+        i = bisect_left(self.ends, start)     # First range that ends at/after our start
+        j = bisect_right(self.starts, end)    # Ranges starting after our end stay untouched
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def overlaps(self, start, end):
+        """True if [start, end) intersects any busy range (containment included)."""
+        i = bisect_right(self.ends, start)    # First range ending after our start
+        return i < len(self.starts) and self.starts[i] < end
+
+    def gaps(self, start, end):
+        """Free (start, end) sub-ranges of the window [start, end)."""
+        free = []
+        cursor = start
+        i = bisect_right(self.ends, start)
+        while i < len(self.starts) and self.starts[i] < end:
+            if self.starts[i] > cursor:
+                free.append((cursor, self.starts[i]))
+            cursor = max(cursor, self.ends[i])
+            i += 1
+        if cursor < end:
+            free.append((cursor, end))
+        return free
@@ -1,134 +1,454 @@
 from ortools.sat.python import cp_model
+from bisect import bisect_left
 from datetime import timedelta
+import time
+
+from core.planner.architect import get_subject_key, task_deadline
+from core.solver.utils import from_utc_iso
+from core.metrics import record_solve
+
+# Energy Scoring Map
+ENERGY_MAP = {"High": 3, "Medium": 2, "Low": 1, "Any": 2}
+TARDINESS_WEIGHT = 100  # Objective points per started late hour, per priority point
+
+def score_assignment(task, slot, s_idx, late_minutes=0):
+    """
+    Objective weight of placing `task` into `slot` (s_idx = position in the slot list).
+    late_minutes: how far the task would end past its deadline (weighted tardiness).
+    Shared by the solver and the benchmarks so both modes are scored the same way.
+    """
+    t_prio = task.get('priority', 1)
+    t_energy = task.get('energy_req', 'Medium')
+    s_energy = slot.get('energy_supply', 'Medium')
+
+    # Base Score
+    score = 10000 
+    score += t_prio * 5000 
+    
+    # Energy Match
+    req = ENERGY_MAP.get(t_energy, 2)
+    sup = ENERGY_MAP.get(s_energy, 2)
+    if req == sup: score += 500
+    elif req > sup: score -= 1000
+    else: score += 100
+    
+    # Urgency (Early slots better)
+    score -= s_idx * 10 
+
+    # Tardiness: every late hour costs more for important tasks. Capped so late still beats never.
+    if late_minutes > 0:
+        late_hours = -(-late_minutes // 60)
+        score -= min(TARDINESS_WEIGHT * t_prio * late_hours, max(0, score - 1))
+    return score
+
+class SlotIndex:
+    """
+    Slot metadata computed ONCE (start string, weekday, timestamp), bucketed by
+    (category, is_weekend, "HH:MM") and sorted by duration.
+    A task only looks at the buckets its hard filters allow, then bisects on duration,
+    instead of re-checking every slot with strftime/weekday/timestamp per task.
+    """
+    def __init__(self, slots):
+        self.start_mins = []
+        self.dates = []
+        raw = {}  # (category, is_weekend, start_str) -> [(duration, s_idx)]
+
+        for s_idx, slot in enumerate(slots):
+            s_start = slot['start']
+            self.start_mins.append(int(s_start.timestamp() / 60))
+            self.dates.append(s_start.date())
+            key = (slot.get('category', 'General'), s_start.weekday() >= 5, s_start.strftime("%H:%M"))
+            raw.setdefault(key, []).append((slot.get('duration', 0), s_idx))
+
+        # Exact buckets (for Fixed tasks) + merged per (category, weekend) buckets (for the rest)
+        self.buckets = {}
+        merged = {}
+        for key, items in raw.items():
+            self.buckets[key] = self._sorted_bucket(items)
+            merged.setdefault(key[:2], []).extend(items)
+        self.zone_buckets = {zone: self._sorted_bucket(items) for zone, items in merged.items()}
+
+    @staticmethod
+    def _sorted_bucket(items):
+        items.sort()
+        return [d for d, _ in items], [s_idx for _, s_idx in items]
+
+    def has_candidate(self, task):
+        """True if at least one slot passes all HARD FILTERS for this task."""
+        return any(True for _ in self._matches(task))
+
+    def candidates(self, task):
+        """Slot indices (in slot order) that pass all HARD FILTERS for this task."""
+        found = [s_idx for s_idxs in self._matches(task) for s_idx in s_idxs]
+        found.sort()
+        return found
+
+    def _matches(self, task):
+        """Yields non-empty runs of compatible slot indices, bucket by bucket."""
+        t_duration = task.get('duration', 60)
+        t_type = task.get('task_type', 'Flexible')
+        t_fixed_slot = task.get('fixed_slot')
+        t_cat = task.get('category', 'General')
+
+        for (s_cat, is_weekend), bucket in self.zone_buckets.items():
+            # Filter 3: Category Match (Flexible tasks stick to their zones, 'Free' slots are Wildcards)
+            if t_type == 'Flexible' and s_cat != 'Free' and s_cat != t_cat:
+                continue
+            # 🔥 Filter 4: WEEKEND GUARD (Lectures (Study/Learn) sirf Mon-Fri honge)
+            if is_weekend and t_cat in ['Study', 'Learn']:
+                continue
+            # Filter 2: Fixed Tasks only look at the bucket of their start time
+            if t_type == 'Fixed':
+                bucket = self.buckets.get((s_cat, is_weekend, t_fixed_slot))
+                if not bucket:
+                    continue
+            # Filter 1: Duration (Slot must be big enough)
+            durations, s_idxs = bucket
+            pos = bisect_left(durations, t_duration)
+            if pos < len(s_idxs):
+                yield s_idxs[pos:]
+
+# Solver Modes
+# "interval": every task starts at slot['start'] -> max ONE task per slot.
+# "capacity": slot = bucket of minutes -> several short tasks packed back-to-back.
+SOLVER_MODES = ("interval", "capacity")
+
+# Deadline Modes (deadline = architect.task_deadline)
+# "off": deadlines ignored.
+# "hard": latest finish -- slots ending after the deadline are ruled out (a task that can't make it isn't placed).
+# "tardiness": late is allowed, but costs TARDINESS_WEIGHT per late hour x priority in the objective.
+DEADLINE_MODES = ("off", "hard", "tardiness")
 
 class VibeOptimizer:
-    def __init__(self, tasks, slots):
+    def __init__(self, tasks, slots, pacing_limit=None, mode="interval", time_limit=None, num_workers=None, pacing_used=None,
+                 precedences=None, deadline_mode="off"):
+        """
+        pacing_limit: Max tasks per subject per calendar day (Horizon mode).
+        None = no pacing inside the model (Daily mode does pacing before solving).
+        pacing_used: {(subject_key, date): count} already placed on the calendar (counts against the limit).
+        mode: One of SOLVER_MODES.
+        time_limit: Seconds before CP-SAT returns its best plan so far (None = no limit).
+        num_workers: Parallel search workers (None/0 = CP-SAT default, all cores).
+        precedences: [(predecessor id, dependent id)] -- the dependent is only placed with its
+        predecessor, and starts after it ends (core/planner/dependencies.py).
+        A task's 'not_before' (datetime) rules out earlier slots.
+        deadline_mode: One of DEADLINE_MODES. Capacity mode packs tasks anywhere in their slot,
+        so there a task counts as finishing at its slot's end.
+        """
+        if mode not in SOLVER_MODES:
+            raise ValueError(f"Unknown solver mode: {mode}")
+        if deadline_mode not in DEADLINE_MODES:
+            raise ValueError(f"Unknown deadline mode: {deadline_mode}")
         self.tasks = tasks
         self.slots = slots
+        self.pacing_limit = pacing_limit
+        self.pacing_used = pacing_used or {}
+        self.precedences = precedences or []
+        self.mode = mode
+        self.deadline_mode = deadline_mode
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
+        if time_limit:
+            self.solver.parameters.max_time_in_seconds = float(time_limit)
+        if num_workers:
+            self.solver.parameters.num_workers = int(num_workers)
+        self.objective_value = 0
+        self.build_time = 0.0
+        self.utilization = 0.0
+        self.status = cp_model.UNKNOWN
+        self.hinted = 0
+        self.linked = 0
+        self.due_tasks = 0
+        self.late = 0
+        self.stats = {}
+
+    def _slots_are_disjoint(self):
+        ordered = sorted(self.slots, key=lambda x: x['start'])
+        return all(a['end'] <= b['start'] for a, b in zip(ordered, ordered[1:]))
+
+    def build_model(self):
+        """
+        Creates variables, constraints & objective.
+        Returns: allocation dict (t_idx, s_idx) -> BoolVar
+        """
+        self.index = SlotIndex(self.slots)
 
-    def solve(self):
-        print(f"   🧠 OR-Tools Optimizing: {len(self.tasks)} Tasks into {len(self.slots)} Slots...")
-        
         # Data Structures
         allocation = {}      # (t_idx, s_idx) -> BoolVar
         task_intervals = []  # List of IntervalVars for NoOverlap constraint
-        
-        # Energy Scoring Map
-        energy_map = {"High": 3, "Medium": 2, "Low": 1, "Any": 2}
+        lateness = {}        # (t_idx, s_idx) -> minutes past the deadline (tardiness mode)
+        self.due_tasks = 0
 
-        # 1. CREATE VARIABLES
+        # NoOverlap is only needed if slots themselves overlap: for disjoint slots (the normal
+        # template case) "max one task per slot" below already implies it, and its presolve is quadratic.
+        slots_disjoint = self._slots_are_disjoint()
+        if self.mode == "capacity" and not slots_disjoint:
+            # Packed offsets can't be checked against a neighbouring overlapping slot
+            print("   ⚠️ Slots overlap each other. Capacity mode needs disjoint slots, using 'interval' mode.")
+            self.mode = "interval"
+        need_no_overlap = self.mode == "interval" and not slots_disjoint
+
+        # 1. CREATE VARIABLES (only for compatible slots, straight from the index)
         for t_idx, task in enumerate(self.tasks):
             possible_slots = []
-            
-            # Task Data
             t_duration = task.get('duration', 60)
-            t_type = task.get('task_type', 'Flexible')
-            t_fixed_slot = task.get('fixed_slot')
-            t_cat = task.get('category', 'General')
+            release = int(task['not_before'].timestamp() / 60) if task.get('not_before') else None
+            due = task_deadline(task) if self.deadline_mode != "off" else None
+            due_min = int(due.timestamp() / 60) if due else None
+            self.due_tasks += due is not None
             
-            for s_idx, slot in enumerate(self.slots):
-                # Slot Data
-                s_duration = slot.get('duration', 0)
-                s_start = slot['start']
-                s_cat = slot.get('category', 'General')
-                s_start_str = s_start.strftime("%H:%M")
-                
-                # Check Day
-                is_weekend = s_start.weekday() >= 5 # 5=Saturday, 6=Sunday
-
-                # --- HARD FILTERS ---
-                
-                # Filter 1: Duration (Slot must be big enough)
-                if s_duration < t_duration:
-                    continue
-
-                # Filter 2: Fixed Tasks
-                if t_type == 'Fixed' and t_fixed_slot != s_start_str:
-                    continue
-                
-                # Filter 3: Category Match (Flexible tasks stick to their zones)
-                # 'Free' slots are Wildcards, BUT...
-                if t_type == 'Flexible':
-                    if s_cat != 'Free' and s_cat != t_cat:
-                        continue
-
-                # 🔥 Filter 4: WEEKEND GUARD (No Lectures on Sat/Sun)
-                # Lectures (Study/Learn) sirf Mon-Fri honge.
-                # Weekends par sirf Project/Code/General allow karenge.
-                if is_weekend and t_cat in ['Study', 'Learn']:
-                    continue
-
+            for s_idx in self.index.candidates(task):
+                if release is not None and self.index.start_mins[s_idx] < release:
+                    continue  # Before a predecessor ends
+                if due_min is not None:
+                    end_min = self.index.start_mins[s_idx] + (self.slots[s_idx].get('duration', 0) if self.mode == "capacity" else t_duration)
+                    if end_min > due_min:
+                        if self.deadline_mode == "hard":
+                            continue  # ⏰ Would finish after the deadline
+                        lateness[(t_idx, s_idx)] = end_min - due_min
                 # ✅ CREATE DECISION VARIABLE
                 is_present = self.model.NewBoolVar(f't{t_idx}_s{s_idx}')
                 allocation[(t_idx, s_idx)] = is_present
                 possible_slots.append(is_present)
 
                 # 🌟 INTERVAL VARIABLE FOR NO-OVERLAP
-                start_min = int(s_start.timestamp() / 60) 
-                end_var = self.model.NewIntVar(start_min + t_duration, start_min + t_duration, f'end_{t_idx}_{s_idx}')
-                
-                interval = self.model.NewOptionalIntervalVar(
-                    start_min, t_duration, end_var, is_present, f'interval_t{t_idx}_s{s_idx}'
-                )
-                task_intervals.append(interval)
+                if need_no_overlap:
+                    start_min = self.index.start_mins[s_idx]
+                    end_var = self.model.NewIntVar(start_min + t_duration, start_min + t_duration, f'end_{t_idx}_{s_idx}')
+                    
+                    interval = self.model.NewOptionalIntervalVar(
+                        start_min, t_duration, end_var, is_present, f'interval_t{t_idx}_s{s_idx}'
+                    )
+                    task_intervals.append(interval)
 
             # Constraint: Task can be in AT MOST 1 slot
             if possible_slots:
                 self.model.Add(sum(possible_slots) <= 1)
         
+        per_slot = {}  # s_idx -> [(t_idx, BoolVar)]
+        for (t_idx, s_idx), var in allocation.items():
+            per_slot.setdefault(s_idx, []).append((t_idx, var))
+
+        if self.mode == "capacity":
+            # 📦 CAPACITY: Sum of assigned durations must fit in the slot
+            for s_idx, members in per_slot.items():
+                durations = [self.tasks[t_idx].get('duration', 60) for t_idx, _ in members]
+                if sum(durations) > self.slots[s_idx].get('duration', 0):
+                    self.model.Add(sum(d * var for d, (_, var) in zip(durations, members)) <= self.slots[s_idx].get('duration', 0))
+                # Fixed tasks must start exactly at slot['start'] -> max one of them per slot
+                fixed_vars = [var for t_idx, var in members if self.tasks[t_idx].get('task_type') == 'Fixed']
+                if len(fixed_vars) > 1:
+                    self.model.AddAtMostOne(fixed_vars)
+        else:
+            # Every task in a slot starts at slot['start'], so one slot = max one task.
+            # Gives the LP a tight bound (big horizon models prove optimal fast).
+            for members in per_slot.values():
+                if len(members) > 1:
+                    self.model.AddAtMostOne([var for _, var in members])
+
         # 🛡️ STRICT NO OVERLAP
         if task_intervals:
             self.model.AddNoOverlap(task_intervals)
 
+        # ⚖️ PACING (Horizon mode): max N tasks per subject per day
+        if self.pacing_limit is not None:
+            paced = {}  # (subject_key, date) -> [BoolVar]
+            for (t_idx, s_idx), var in allocation.items():
+                key = (get_subject_key(self.tasks[t_idx]), self.index.dates[s_idx])
+                paced.setdefault(key, []).append(var)
+            for key, day_vars in paced.items():
+                room = max(0, self.pacing_limit - self.pacing_used.get(key, 0))
+                if len(day_vars) > room:
+                    self.model.Add(sum(day_vars) <= room)
+
+        # 🔗 PRECEDENCE: dependents after their predecessors
+        self.linked = self._add_precedences(allocation)
+
+        # 🔥 WARM START: Seed from the previous plan (scheduled_start) so a small change
+        # re-solves close to the old optimum instead of searching from scratch
+        self.hinted = self._add_hints(allocation)
+
         # 2. SCORING OBJECTIVES
         objective_terms = []
         for (t_idx, s_idx), var in allocation.items():
-            task = self.tasks[t_idx]
-            slot = self.slots[s_idx]
-            
-            t_prio = task.get('priority', 1)
-            t_energy = task.get('energy_req', 'Medium')
-            s_energy = slot.get('energy_supply', 'Medium')
-
-            # Base Score
-            score = 10000 
-            score += t_prio * 5000 
-            
-            # Energy Match
-            req = energy_map.get(t_energy, 2)
-            sup = energy_map.get(s_energy, 2)
-            if req == sup: score += 500
-            elif req > sup: score -= 1000
-            else: score += 100
-            
-            # Urgency (Early slots better)
-            score -= s_idx * 10 
-
+            score = score_assignment(self.tasks[t_idx], self.slots[s_idx], s_idx, lateness.get((t_idx, s_idx), 0))
             objective_terms.append(var * score)
 
         if objective_terms:
             self.model.Maximize(sum(objective_terms))
 
+        return allocation
+
+    def _add_precedences(self, allocation):
+        """
+        Dependent placed => predecessor placed, and dependent start >= predecessor end.
+        Capacity mode packs tasks anywhere in their slot, so there the predecessor's slot end counts.
+        Returns the number of precedence pairs in the model.
+        """
+        if not self.precedences:
+            return 0
+        by_task = {}
+        for (t_idx, s_idx), var in allocation.items():
+            by_task.setdefault(t_idx, []).append((s_idx, var))
+        t_index = {task.get('id'): t_idx for t_idx, task in enumerate(self.tasks)}
+        base = min(self.index.start_mins, default=0)  # Small coefficients: minutes since the first slot
+
+        placed = {}
+        def is_placed(t_idx):
+            if t_idx not in placed:
+                placed[t_idx] = self.model.NewBoolVar(f'placed_t{t_idx}')
+                self.model.Add(sum(var for _, var in by_task[t_idx]) == placed[t_idx])
+            return placed[t_idx]
+
+        linked = 0
+        for pred_id, succ_id in self.precedences:
+            p_idx, succ_idx = t_index.get(pred_id), t_index.get(succ_id)
+            if p_idx is None or succ_idx is None or succ_idx not in by_task:
+                continue
+            if p_idx not in by_task:
+                # Predecessor can't be placed in this model: neither can its dependent
+                for _, var in by_task[succ_idx]:
+                    self.model.Add(var == 0)
+                continue
+            succ_placed = is_placed(succ_idx)
+            self.model.AddImplication(succ_placed, is_placed(p_idx))
+            p_duration = self.tasks[p_idx].get('duration', 60)
+            pred_end = sum((self.index.start_mins[k] - base + (self.slots[k].get('duration', 0) if self.mode == "capacity" else p_duration)) * var
+                           for k, var in by_task[p_idx])
+            succ_start = sum((self.index.start_mins[k] - base) * var for k, var in by_task[succ_idx])
+            self.model.Add(succ_start >= pred_end).OnlyEnforceIf(succ_placed)
+            linked += 1
+        return linked
+
+    def _add_hints(self, allocation):
+        """
+        Hints the slot holding each task's previous scheduled_start. Once any task is hinted, the rest
+        (new tasks, old starts that no longer match a slot) are hinted OUT, so the hint is the complete
+        previous plan: feasible as is, CP-SAT starts from it instead of from nothing.
+        Returns hinted task count.
+        """
+        by_task = {}
+        for (t_idx, s_idx), var in allocation.items():
+            by_task.setdefault(t_idx, []).append((s_idx, var))
+
+        previous = {}  # t_idx -> s_idx of its previous placement
+        for t_idx, options in by_task.items():
+            prev_start = self.tasks[t_idx].get('scheduled_start')
+            if not prev_start:
+                continue
+            try:
+                prev_start = from_utc_iso(prev_start)
+            except (TypeError, ValueError):
+                continue
+
+            if self.mode == "capacity":
+                # Packed tasks sit anywhere inside their slot
+                match = [s_idx for s_idx, _ in options if self.slots[s_idx]['start'] <= prev_start < self.slots[s_idx]['end']]
+            else:
+                match = [s_idx for s_idx, _ in options if self.slots[s_idx]['start'] == prev_start]
+            if match:
+                previous[t_idx] = match[0]
+
+        if not previous:
+            return 0
+        for t_idx, options in by_task.items():
+            for s_idx, var in options:
+                self.model.AddHint(var, 1 if previous.get(t_idx) == s_idx else 0)
+        return len(previous)
+
+    def solve(self):
+        print(f"   🧠 OR-Tools Optimizing: {len(self.tasks)} Tasks into {len(self.slots)} Slots...")
+        build_started = time.perf_counter()
+        allocation = self.build_model()
+        self.build_time = time.perf_counter() - build_started
+
         # 3. SOLVE
         status = self.solver.Solve(self.model)
+        self.status = status
+        self.stats = self._collect_stats(status)
         schedule = []
         
         if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            print(f"   ✅ Solution Found! (Score: {self.solver.ObjectiveValue()})")
+            self.objective_value = self.solver.ObjectiveValue()
+            print(f"   ✅ Solution Found! (Score: {self.objective_value}, {self.stats['status']} in {self.stats['wall_time']:.2f}s, "
+                  f"gap {self.stats['gap']:.2%}, {self.stats['branches']} branches, {self.hinted} hinted)")
+            chosen = {}  # s_idx -> [t_idx]
             for (t_idx, s_idx), var in allocation.items():
                 if self.solver.Value(var) == 1:
-                    slot = self.slots[s_idx]
-                    task = self.tasks[t_idx]
-                    schedule.append({
-                        "task_id": task.get('id'),
-                        "name": task.get('name'),
-                        "start": slot['start'],
-                        "end": slot['start'] + timedelta(minutes=task.get('duration', 60)),
-                        "slot_energy": slot.get('energy_supply', 'Medium')
-                    })
+                    chosen.setdefault(s_idx, []).append(t_idx)
+            schedule = self._lay_out(chosen)
+            if self.due_tasks:
+                self.late = self._count_late(schedule)
+                self.stats["late"] = self.late
+                print(f"   ⏰ Deadlines: {self.due_tasks} tasks due, {self.late} placed after their deadline.")
+
+            used = sum(self.tasks[t_idx].get('duration', 60) for members in chosen.values() for t_idx in members)
+            available = sum(slot.get('duration', 0) for slot in self.slots)
+            self.utilization = used / available if available else 0.0
         else:
             print("   ⚠️ No feasible solution found for this batch.")
-            
-        return schedule
\ No newline at end of file
+
+        record_solve(self.stats)
+        return schedule
+
+    def _collect_stats(self, status):
+        """Solver report: status, build / wall time, model size, optimality gap & search effort."""
+        proto = self.model.Proto()
+        stats = {
+            "engine": "cp-sat",
+            "status": self.solver.StatusName(status),
+            "mode": self.mode,
+            "build_time": self.build_time,
+            "wall_time": self.solver.WallTime(),
+            "gap": None,
+            "branches": self.solver.NumBranches(),
+            "conflicts": self.solver.NumConflicts(),
+            "hinted": self.hinted,
+            "precedences": self.linked,
+            "due_tasks": self.due_tasks,
+            "late": 0,
+            "variables": len(proto.variables),
+            "constraints": len(proto.constraints),
+            "objective": 0,
+        }
+        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            objective = self.solver.ObjectiveValue()
+            stats["gap"] = abs(self.solver.BestObjectiveBound() - objective) / max(1.0, abs(objective))
+            stats["objective"] = objective
+        return stats
+
+    def _count_late(self, schedule):
+        return count_late(self.tasks, schedule)
+
+    def _lay_out(self, chosen):
+        return lay_out(self.tasks, self.slots, chosen)
+
+# --- SHARED BY VibeOptimizer AND GreedyScheduler ---
+def count_late(tasks, schedule):
+    """Placed items ending after their task's deadline."""
+    by_id = {task.get('id'): task for task in tasks}
+    return sum(1 for item in schedule
+               if (due := task_deadline(by_id[item['task_id']])) and item['end'] > due)
+
+def lay_out(tasks, slots, chosen):
+    """
+    Turns chosen (slot -> tasks) into timed items.
+    Capacity mode packs back-to-back from slot['start'] (Fixed task first, then higher priority).
+    """
+    schedule = []
+    for s_idx in sorted(chosen):
+        slot = slots[s_idx]
+        members = sorted(chosen[s_idx], key=lambda t_idx: (tasks[t_idx].get('task_type') != 'Fixed', -tasks[t_idx].get('priority', 1), t_idx))
+        offset = 0
+        for t_idx in members:
+            task = tasks[t_idx]
+            start = slot['start'] + timedelta(minutes=offset)
+            schedule.append({
+                "task_id": task.get('id'),
+                "name": task.get('name'),
+                "start": start,
+                "end": start + timedelta(minutes=task.get('duration', 60)),
+                "slot_energy": slot.get('energy_supply', 'Medium')
+            })
+            offset += task.get('duration', 60)
+    return schedule
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+from core.solver.intervals import IntervalIndex
+from core.loader.config_loader import CONFIG_CACHE, TEMPLATE_FILE, validate_week_template
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+class CompiledTemplate:
+    """
+    Week Template resolved ONCE into minute offsets.
+    days[weekday] = (free_blocks, constant_blocks), each block:
+    (start_min, end_min, category, label, energy_supply, notes)
+    References are followed, duplicates dropped and Free blocks already masked by Constants,
+    so generating N days is just offset arithmetic (no string parsing).
+    """
+    def __init__(self, mode_name, days):
+        self.mode_name = mode_name
+        self.days = days
+
+    def slots_for(self, start_date, days_ahead=7):
+        """(free_slots, constant_blocks) as slot dicts for days_ahead days starting at start_date."""
+        free_slots = []
+        constant_blocks = []
+        base = datetime(start_date.year, start_date.month, start_date.day)
+
+        for d in range(days_ahead):
+            day_start = base + timedelta(days=d)
+            free, constant = self.days[day_start.weekday()]
+            free_slots.extend(_to_slot(day_start, block) for block in free)
+            constant_blocks.extend(_to_slot(day_start, block) for block in constant)
+
+        # Sort slots by time (midnight-crossing blocks can interleave with the next day)
+        free_slots.sort(key=lambda x: x['start'])
+        constant_blocks.sort(key=lambda x: x['start'])
+        return free_slots, constant_blocks
+
+def _to_slot(day_start, block):
+    start_min, end_min, category, label, energy, notes = block
+    return {
+        "start": day_start + timedelta(minutes=start_min),
+        "end": day_start + timedelta(minutes=end_min),
+        "duration": end_min - start_min,
+        "category": category,
+        "label": label,
+        "energy_supply": energy,
+        "notes": notes
+    }
+
+def _to_minutes(hhmm):
+    t = datetime.strptime(hhmm, "%H:%M")
+    return t.hour * 60 + t.minute
+
+def _compile_day(day_name, day_config):
+    # --- STEP A: Parse All Raw Blocks ---
+    blocks = []
+    for s in day_config:
+        try:
+            start_min = _to_minutes(s['start'])
+            end_min = _to_minutes(s['end'])
+        except ValueError as e:
+            print(f"   ⚠️ Invalid time format in {day_name}: {e}")
+            continue
+
+        # Handle Midnight Crossing
+        if end_min < start_min:
+            end_min += 24 * 60
+
+        category = s.get('category', 'General')
+        blocks.append((start_min, end_min, category, s.get('label', category),
+                       s.get('energy_supply', 'Medium'), s.get('notes', "")))
+
+    # --- STEP B: Constant blocks are King. They reserve the time first. ---
+    seen_starts = set()  # Dedupe for exact duplicate start times
+    constant = []
+    for block in blocks:
+        if block[2] == "Constant" and block[0] not in seen_starts:
+            constant.append(block)
+            seen_starts.add(block[0])
+    mask = IntervalIndex((b[0], b[1]) for b in constant)
+
+    # --- STEP C: Free blocks minus the mask (sorted sweep over merged Constant ranges) ---
+    free = []
+    j = 0
+    for block in sorted((b for b in blocks if b[2] != "Constant"), key=lambda b: b[0]):
+        start_min, end_min = block[0], block[1]
+        if start_min in seen_starts: continue
+        while j < len(mask) and mask.ends[j] <= start_min:
+            j += 1
+        if j < len(mask) and mask.starts[j] < end_min:
+            continue  # Overlaps a Constant block
+        free.append(block)
+        seen_starts.add(start_min)
+
+    return tuple(free), tuple(sorted(constant, key=lambda b: b[0]))
+
+def compile_week_template(week_template):
+    """Resolves the active mode of a Week Template into a CompiledTemplate."""
+    mode_name = week_template.get("current_mode", "Normal")
+    active_schedule = week_template.get("modes", {}).get(mode_name, {})
+
+    days = []
+    for day_name in WEEKDAYS:
+        day_config = active_schedule.get(day_name)
+
+        # Reference Check ("Tuesday": "Monday")
+        if isinstance(day_config, str):
+            day_config = active_schedule.get(day_config)
+
+        if not day_config or not isinstance(day_config, list):
+            days.append(((), ()))
+        else:
+            days.append(_compile_day(day_name, day_config))
+
+    return CompiledTemplate(mode_name, days)
+
+# --- CACHE (shared ConfigCache: recompiled only when week_template.json changes) ---
+def _load_compiled(data):
+    return compile_week_template(validate_week_template(data))
+
+def get_compiled_template():
+    """Compiled Week Template from disk, cached until the file's mtime/size change."""
+    compiled = CONFIG_CACHE.get(TEMPLATE_FILE, _load_compiled)
+    return compiled or compile_week_template({})
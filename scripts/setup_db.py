@@ -5,40 +5,48 @@ import sys
 # --- PATH SETUP ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "data", "db", "vibe_core.db")
-SCHEMA_PATH = os.path.join(BASE_DIR, "core", "db", "schema.sql")
+sys.path.append(BASE_DIR)
+
+from core.db import migrations
 
 def init_db():
     print(f"⚙️  Initializing VibeOS Database...")
     print(f"   📂 Target: {DB_PATH}")
     
     # 1. Check if Schema exists
-    if not os.path.exists(SCHEMA_PATH):
-        print(f"   ❌ Error: Schema file not found at {SCHEMA_PATH}")
-        return
+    if not os.path.exists(migrations.SCHEMA_PATH):
+        print(f"   ❌ Error: Schema file not found at {migrations.SCHEMA_PATH}")
+        return False
 
-    # 2. Connect to DB
+    # 2. Connect + Migrate (schema.sql baseline + versioned steps) 🛠️
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # 3. Read & Execute Schema (FIX: Added encoding='utf-8') 🛠️
-        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
-            schema_sql = f.read()
-            cursor.executescript(schema_sql)
+        conn = migrations.connect(DB_PATH, migrate_schema=False)
+        before = migrations.get_version(conn)
+        version = migrations.migrate(conn, verbose=True)
+        print(f"   ✅ Schema at version {version} (was {before}).")
         
-        print("   ✅ Schema applied successfully.")
-        
-        # 4. Verification
+        # 3. Verification
+        cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
         tables = cursor.fetchall()
         print(f"   📊 Tables Created: {[t[0] for t in tables]}")
+
+        # 4. Query Plans: hot queries must use their indexes (no full scans / temp sorts)
+        all_ok = True
+        for name, ok, plan in migrations.check_query_plans(conn):
+            print(f"   {'✅' if ok else '❌'} {name}: {plan}")
+            all_ok = all_ok and ok
         
-        conn.commit()
         conn.close()
+        if not all_ok:
+            print("\n⚠️  Some hot queries are not using their index!")
+            return False
         print("\n✨ VibeOS Brain is Ready! (vibe_core.db)")
+        return True
         
-    except Exception as e:
+    except (sqlite3.Error, migrations.MigrationError) as e:
         print(f"   ❌ Database Creation Failed: {e}")
+        return False
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    sys.exit(0 if init_db() else 1)
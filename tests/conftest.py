@@ -0,0 +1,36 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from core.db import migrations
+
+@pytest.fixture
+def vibe_db(tmp_path):
+    """Path of a fresh vibe_core.db, migrated to LATEST_VERSION."""
+    path = str(tmp_path / "vibe_core.db")
+    migrations.connect(path).close()
+    return path
+
+@pytest.fixture
+def vibe_conn(vibe_db):
+    conn = migrations.connect(vibe_db)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def fluid_conn(tmp_path):
+    """Fluid's dev.db (Prisma schema subset) with an empty VibeOS feed."""
+    from benchmarks.bench_db_writes import FLUID_SCHEMA
+    conn = sqlite3.connect(str(tmp_path / "dev.db"))
+    conn.executescript(FLUID_SCHEMA)
+    conn.execute("INSERT INTO CalendarFeed (id, name, type, enabled, userId) VALUES ('feed', 'VibeOS', 'LOCAL', 1, 'user')")
+    conn.commit()
+    yield conn
+    conn.close()
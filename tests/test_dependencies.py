@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.db import migrations
+from core.planner.dependencies import DependencyGraph, fetch_tasks, unblock_successors
+from core.solver.greedy import GreedyScheduler
+from core.solver.solver import VibeOptimizer
+
+def add_tasks(conn, statuses, edges=()):
+    """statuses: {id: status}, edges: [(task_id, depends_on_id)]."""
+    with conn:
+        conn.executemany("INSERT INTO tasks (id, project_id, name, status) VALUES (?, 'p', ?, ?)",
+                         [(t_id, f"Task {t_id}", status) for t_id, status in statuses.items()])
+        conn.executemany("INSERT INTO task_edges (task_id, depends_on_id) VALUES (?, ?)", list(edges))
+
+def status(conn, t_id):
+    return conn.execute("SELECT status FROM tasks WHERE id = ?", (t_id,)).fetchone()[0]
+
+def finishes(fn, timeout=10):
+    """Runs fn in a thread: (True, result) if it returned in time, (False, None) if it hung."""
+    out = {}
+    worker = threading.Thread(target=lambda: out.setdefault("result", fn()), daemon=True)
+    worker.start()
+    worker.join(timeout)
+    return "result" in out, out.get("result")
+
+def test_successor_unblocks_only_when_all_predecessors_are_done(vibe_conn):
+    add_tasks(vibe_conn, {"a": "PENDING", "b": "PENDING", "c": "BLOCKED"}, [("c", "a"), ("c", "b")])
+
+    with vibe_conn:
+        vibe_conn.execute("UPDATE tasks SET status = 'DONE' WHERE id = 'a'")
+        assert unblock_successors(vibe_conn, ["a"]) == []
+    assert status(vibe_conn, "c") == "BLOCKED"
+
+    with vibe_conn:
+        vibe_conn.execute("UPDATE tasks SET status = 'DONE' WHERE id = 'b'")
+        assert unblock_successors(vibe_conn, ["b"]) == ["c"]
+    assert status(vibe_conn, "c") == "PENDING"
+
+# --- Solves: a chain whose LAST link has the highest priority (unconstrained, it would go first) ---
+MONDAY = datetime(2026, 3, 2, 9, 0)
+
+def make_slots(count, minutes):
+    return [{"start": MONDAY + timedelta(minutes=minutes * i), "end": MONDAY + timedelta(minutes=minutes * (i + 1)),
+             "duration": minutes, "category": "General", "energy_supply": "Medium"} for i in range(count)]
+
+def make_chain(length, minutes):
+    return [{"id": f"t{i}", "name": f"Chain {i}", "priority": 1 + i, "duration": minutes, "category": "General",
+             "task_type": "Flexible", "energy_req": "Medium"} for i in range(length)]
+
+@pytest.mark.parametrize("engine", [VibeOptimizer, GreedyScheduler])
+@pytest.mark.parametrize("mode, slots, minutes", [("interval", make_slots(4, 60), 60), ("capacity", make_slots(3, 120), 30)])
+def test_plan_never_starts_a_successor_before_its_predecessor_ends(engine, mode, slots, minutes):
+    tasks = make_chain(4, minutes)
+    precedences = [(f"t{i}", f"t{i + 1}") for i in range(3)]
+
+    schedule = engine(tasks, slots, mode=mode, time_limit=10, precedences=precedences).solve()
+
+    placed = {item["task_id"]: item for item in schedule}
+    assert placed, "nothing was planned"
+    slot_end = {slot["start"]: slot["end"] for slot in slots}
+    for pred_id, succ_id in precedences:
+        if succ_id not in placed:
+            continue
+        assert pred_id in placed, f"{succ_id} planned without {pred_id}"
+        pred, succ = placed[pred_id], placed[succ_id]
+        assert succ["start"] >= pred["end"]
+        if mode == "capacity":  # Packed anywhere in its slot: the predecessor's slot end counts
+            slot_start = max(start for start in slot_end if start <= pred["start"])
+            assert succ["start"] >= slot_end[slot_start]
+
+def test_dependency_cycle_does_not_hang_topological_order(vibe_db, vibe_conn):
+    add_tasks(vibe_conn, {"a": "PENDING", "b": "PENDING", "c": "PENDING", "free": "PENDING"},
+              [("a", "c"), ("b", "a"), ("c", "b")])
+    pool = list(fetch_tasks(vibe_conn, ["free", "a", "b", "c"]).values())
+
+    def build():
+        conn = migrations.connect(vibe_db)  # sqlite3 connections stay on their own thread
+        try:
+            return DependencyGraph(conn, pool, max_depth=3)
+        finally:
+            conn.close()
+
+    done, graph = finishes(build)
+
+    assert done, "DependencyGraph hung on a cycle"
+    assert [task["id"] for task in graph.tasks] == ["free"]
+    assert sorted(graph.cyclic) == ["a", "b", "c"]
+
+def test_greedy_order_skips_a_cycle():
+    tasks = make_chain(3, 60)
+    greedy = GreedyScheduler(tasks, make_slots(3, 60), precedences=[("t0", "t1"), ("t1", "t0")])
+
+    done, (order, _) = finishes(lambda: greedy._order({t_idx: [] for t_idx in range(len(tasks))}))
+
+    assert done, "GreedyScheduler._order hung on a cycle"
+    assert order == [2]
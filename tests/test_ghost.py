@@ -0,0 +1,66 @@
+from core.solver.ghost import sync_calendar_changes
+
+def add_task(vibe_conn, task_id, start, event_id, duration=60):
+    vibe_conn.execute("INSERT INTO tasks (id, project_id, name, status, scheduled_start, calendar_event_id, duration) "
+                      "VALUES (?, 'p', ?, 'SCHEDULED', ?, ?, ?)", (task_id, f"Task {task_id}", start, event_id, duration))
+    vibe_conn.commit()
+
+def put_event(fluid_conn, event_id, start, end, updated_at="2026-01-01T00:00:00.000Z"):
+    fluid_conn.execute("INSERT INTO CalendarEvent (id, feedId, title, start, end, allDay, updatedAt) VALUES (?, 'feed', 'x', ?, ?, 0, ?) "
+                       "ON CONFLICT(id) DO UPDATE SET start = excluded.start, end = excluded.end, updatedAt = excluded.updatedAt",
+                       (event_id, start, end, updated_at))
+    fluid_conn.commit()
+
+def task_row(vibe_conn, task_id):
+    return vibe_conn.execute("SELECT status, is_soft_deleted, scheduled_start, calendar_event_id, actual_duration "
+                             "FROM tasks WHERE id = ?", (task_id,)).fetchone()
+
+def history(vibe_conn, action):
+    return vibe_conn.execute("SELECT task_id, planned_start, actual_start, time_diff_minutes, planned_duration, actual_duration "
+                             "FROM history_log WHERE action = ? ORDER BY id", (action,)).fetchall()
+
+def test_deleted_event_sends_task_to_backlog(vibe_conn, fluid_conn):
+    add_task(vibe_conn, "kept", "2026-03-02T04:00:00.000Z", "e1")
+    add_task(vibe_conn, "gone", "2026-03-02T06:00:00.000Z", "e2")
+    put_event(fluid_conn, "e1", "2026-03-02T04:00:00.000Z", "2026-03-02T05:00:00.000Z")
+
+    result = sync_calendar_changes(vibe_conn, fluid_conn)
+
+    assert result["backlogged"] == 1 and result["moved"] == 0
+    assert task_row(vibe_conn, "gone") == ("MISSED", 1, "2026-03-02T06:00:00.000Z", None, None)
+    assert task_row(vibe_conn, "kept") == ("SCHEDULED", 0, "2026-03-02T04:00:00.000Z", "e1", None)
+
+def test_moved_event_updates_start_and_logs_time_diff(vibe_conn, fluid_conn):
+    add_task(vibe_conn, "t1", "2026-03-02T04:00:00.000Z", "e1")
+    put_event(fluid_conn, "e1", "2026-03-02T05:30:00.000Z", "2026-03-02T06:30:00.000Z")
+
+    result = sync_calendar_changes(vibe_conn, fluid_conn)
+
+    assert result["moved"] == 1 and result["resized"] == 0
+    assert task_row(vibe_conn, "t1")[2] == "2026-03-02T05:30:00.000Z"
+    assert history(vibe_conn, "MOVED") == [("t1", "2026-03-02T04:00:00.000Z", "2026-03-02T05:30:00.000Z", 90, None, None)]
+
+def test_unparseable_start_logs_null_time_diff(vibe_conn, fluid_conn):
+    add_task(vibe_conn, "t1", "not a timestamp", "e1")
+    put_event(fluid_conn, "e1", "2026-03-02T05:00:00.000Z", "2026-03-02T06:00:00.000Z")
+
+    sync_calendar_changes(vibe_conn, fluid_conn)
+
+    assert history(vibe_conn, "MOVED") == [("t1", "not a timestamp", "2026-03-02T05:00:00.000Z", None, None, None)]
+    assert task_row(vibe_conn, "t1")[2] == "2026-03-02T05:00:00.000Z"
+
+def test_resize_keeps_one_sample_per_task(vibe_conn, fluid_conn):
+    add_task(vibe_conn, "t1", "2026-03-02T04:00:00.000Z", "e1", duration=60)
+    put_event(fluid_conn, "e1", "2026-03-02T04:00:00.000Z", "2026-03-02T05:00:00.000Z")
+    assert sync_calendar_changes(vibe_conn, fluid_conn)["resized"] == 0  # Same length as booked
+
+    put_event(fluid_conn, "e1", "2026-03-02T04:00:00.000Z", "2026-03-02T05:30:00.000Z", "2026-01-02T00:00:00.000Z")
+    assert sync_calendar_changes(vibe_conn, fluid_conn)["resized"] == 1
+    assert task_row(vibe_conn, "t1")[4] == 90
+    # Sample base = the estimate (tasks.duration)
+    assert history(vibe_conn, "RESIZED") == [("t1", "2026-03-02T04:00:00.000Z", "2026-03-02T04:00:00.000Z", None, 60, 90)]
+
+    put_event(fluid_conn, "e1", "2026-03-02T04:00:00.000Z", "2026-03-02T06:00:00.000Z", "2026-01-03T00:00:00.000Z")
+    assert sync_calendar_changes(vibe_conn, fluid_conn)["resized"] == 1
+    assert task_row(vibe_conn, "t1")[4] == 120
+    assert len(history(vibe_conn, "RESIZED")) == 1
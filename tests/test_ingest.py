@@ -0,0 +1,109 @@
+import itertools
+import json
+import os
+
+import pytest
+
+from core.loader import ingest
+
+MTIMES = itertools.count(1_700_000_000)  # Seconds; one per write_input call
+TASK_COLUMNS = "id, name, status, category, priority, duration, energy_req, task_type, dependency, notes, idempotency_key"
+
+@pytest.fixture
+def inputs_dir(tmp_path, monkeypatch):
+    path = tmp_path / "inputs"
+    path.mkdir()
+    monkeypatch.setattr(ingest, "INPUTS_DIR", str(path))
+    return path
+
+def write_input(inputs_dir, file_name, tasks, **header):
+    """An input file; every rewrite gets a new mtime so the manifest's stat check can't skip it."""
+    path = inputs_dir / file_name
+    path.write_text(json.dumps({"project_name": header.pop("project_name", file_name), **header, "tasks": tasks}))
+    stamp = next(MTIMES)
+    os.utime(path, (stamp, stamp))
+    return path
+
+def tasks_by_name(conn):
+    return {row[1]: row for row in conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY name")}
+
+def test_editing_one_task_updates_only_its_row(vibe_conn, inputs_dir):
+    tasks = [{"name": f"Lecture {i}", "duration": 60} for i in range(5)]
+    write_input(inputs_dir, "1_course.json", tasks)
+    ingest.ingest_data(vibe_conn)
+    before = tasks_by_name(vibe_conn)
+
+    tasks[2]["duration"] = 90
+    write_input(inputs_dir, "1_course.json", tasks)
+    summary = ingest.ingest_data(vibe_conn)
+
+    after = tasks_by_name(vibe_conn)
+    assert summary["new"] == 0 and summary["updated"] == 1
+    assert after["Lecture 2"][5] == 90
+    assert after["Lecture 2"][0] == before["Lecture 2"][0]  # Same id / idempotency key: updated in place
+    assert {name: row for name, row in after.items() if name != "Lecture 2"} == \
+           {name: row for name, row in before.items() if name != "Lecture 2"}
+
+def test_edits_only_reach_pending_and_blocked_tasks(vibe_conn, inputs_dir):
+    tasks = [{"name": "Pending"}, {"name": "Blocked", "depends_on": "Pending"}, {"name": "Scheduled"}, {"name": "Done"}]
+    write_input(inputs_dir, "1_course.json", tasks)
+    ingest.ingest_data(vibe_conn)
+    with vibe_conn:
+        vibe_conn.execute("UPDATE tasks SET status = 'SCHEDULED' WHERE name = 'Scheduled'")
+        vibe_conn.execute("UPDATE tasks SET status = 'DONE' WHERE name = 'Done'")
+    assert tasks_by_name(vibe_conn)["Blocked"][2] == "BLOCKED"
+
+    for task in tasks:
+        task["notes"] = "edited"
+    write_input(inputs_dir, "1_course.json", tasks)
+    summary = ingest.ingest_data(vibe_conn)
+
+    notes = {name: row[9] for name, row in tasks_by_name(vibe_conn).items()}
+    assert summary["updated"] == 2
+    assert notes == {"Pending": "edited", "Blocked": "edited", "Scheduled": "", "Done": ""}
+
+def counts(conn):
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("projects", "tasks")}
+
+def test_reingesting_unchanged_files_inserts_nothing(vibe_conn, inputs_dir):
+    write_input(inputs_dir, "1_course.json", [{"name": f"Lecture {i}"} for i in range(50)])
+    write_input(inputs_dir, "2_backlog.json", [{"name": f"Chore {i}"} for i in range(20)])
+    assert ingest.ingest_data(vibe_conn)["new"] == 70
+    loaded = tasks_by_name(vibe_conn)
+
+    assert ingest.ingest_data(vibe_conn)["new"] == 0  # Manifest: skipped without parsing
+    # Manifest gone: every row goes through the bulk INSERT again, the UNIQUE key skips them all
+    with vibe_conn:
+        vibe_conn.execute("DELETE FROM ingest_manifest")
+        vibe_conn.execute("DELETE FROM ingest_manifest_tasks")
+    summary = ingest.ingest_data(vibe_conn)
+
+    assert summary["new"] == 0 and summary["parsed"] == 70
+    assert tasks_by_name(vibe_conn) == loaded
+    assert counts(vibe_conn) == {"projects": 2, "tasks": 70}
+
+def test_duplicate_project_task_is_skipped(vibe_conn, inputs_dir):
+    # Same project in two files, "Shared" in both + twice in the first: the first one (filename priority) wins
+    write_input(inputs_dir, "1_main.json", [{"name": "Shared", "duration": 45}, {"name": "Shared", "duration": 90}],
+                project_name="Course")
+    write_input(inputs_dir, "2_extra.json", [{"name": "Shared", "duration": 30}, {"name": "Only extra"}], project_name="Course")
+
+    summary = ingest.ingest_data(vibe_conn)
+
+    assert summary["new"] == 2
+    rows = vibe_conn.execute("SELECT name, duration FROM tasks ORDER BY name").fetchall()
+    assert rows == [("Only extra", 60), ("Shared", 45)]
+
+def test_broken_file_rolls_back_only_itself(vibe_conn, inputs_dir):
+    write_input(inputs_dir, "1_before.json", [{"name": "A"}], project_name="Before")
+    # Valid JSON, but the second task can't be bound to a column: fails after its project row was written
+    write_input(inputs_dir, "2_broken.json", [{"name": "ok"}, {"name": "bad", "duration": {"minutes": 60}}], project_name="Broken")
+    write_input(inputs_dir, "3_after.json", [{"name": "B"}], project_name="After")
+
+    summary = ingest.ingest_data(vibe_conn)
+
+    assert summary["new"] == 2
+    assert [row[0] for row in vibe_conn.execute("SELECT name FROM projects ORDER BY name")] == ["After", "Before"]
+    assert [row[0] for row in vibe_conn.execute("SELECT name FROM tasks ORDER BY name")] == ["A", "B"]
+    manifest = {row[0] for row in vibe_conn.execute("SELECT file_name FROM ingest_manifest")}
+    assert manifest == {"1_before.json", "3_after.json"}  # Not remembered: the next run retries it
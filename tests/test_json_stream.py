@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from core.loader import json_stream
+from core.loader.json_stream import JSONStreamError, TaskStream
+
+ITEMS = [
+    {"name": "Lecture é \"1\"", "duration": 60, "energy": "High", "tags": ["a\\b", "✓"]},
+    {"name": "Quiz", "duration": -1.5e3, "fixed_slot": None, "optional": True, "done": False},
+    {"name": "Nested", "sub": {"k": [1, 2.25, [3]]}, "notes": ""},
+]
+
+def write_doc(path, items, header=None, trailing=None):
+    doc = {**(header or {}), "tasks": items, **(trailing or {})}
+    path.write_text(json.dumps(doc))  # ensure_ascii: \uXXXX escapes get cut by small chunks too
+    return str(path)
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_values_cut_at_any_chunk_boundary_decode(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(json_stream, "CHUNK_SIZE", chunk_size)
+    path = write_doc(tmp_path / "doc.json", ITEMS * 5, header={"project_name": "P", "priority": 3}, trailing={"color": "#fff"})
+
+    with TaskStream(path) as stream:
+        assert stream.header == {"project_name": "P", "priority": 3}
+        assert list(stream) == ITEMS * 5
+        assert stream.trailing == {"color": "#fff"}
+
+def test_malformed_item_fails_without_reading_the_rest(tmp_path):
+    items = [json.dumps({"name": f"Lecture {i}", "duration": 60, "notes": "x" * 50}) for i in range(40000)]
+    broken_at = len(items) // 2
+    items[broken_at] = '{"name": "Broken", "duration": 60,, "notes": "x"}'
+    path = tmp_path / "huge.json"
+    path.write_text('{"project_name": "Huge", "tasks": [' + ", ".join(items) + "]}")
+    size = path.stat().st_size
+    offset = path.read_text().index('"Broken"')
+
+    seen = 0
+    with TaskStream(str(path)) as stream:
+        with pytest.raises(JSONStreamError):
+            for _ in stream:
+                seen += 1
+        assert seen == broken_at
+        # Bounded: at most the chunk holding the broken item (plus the one it started in), not the rest
+        assert stream.chars_read <= offset + 2 * json_stream.CHUNK_SIZE < size
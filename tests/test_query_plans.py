@@ -0,0 +1,17 @@
+import pytest
+
+from core.db import migrations
+
+def test_schema_is_at_latest_version(vibe_conn):
+    assert vibe_conn.execute("PRAGMA user_version").fetchone()[0] == migrations.LATEST_VERSION
+    assert migrations.get_version(vibe_conn) == migrations.LATEST_VERSION
+
+@pytest.mark.parametrize("name", [name for name, *_ in migrations.HOT_QUERIES])
+def test_hot_query_uses_its_index(vibe_conn, name):
+    """Every HOT_QUERIES entry: expected index in the plan, no TEMP B-TREE (full scan / temp sort)."""
+    results = {q_name: (ok, plan) for q_name, ok, plan in migrations.check_query_plans(vibe_conn)}
+    expected = next(exp for q_name, _, _, exp in migrations.HOT_QUERIES if q_name == name)
+    ok, plan = results[name]
+    assert expected in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+    assert ok, plan